@@ -0,0 +1,311 @@
+"""
+async_graph_interface.py
+
+Contains the AsyncGraphInterface class, an asyncio version of the GraphInterface methods that submits traversals without blocking,
+so that many requests can be in flight to the Gremlin server at once.
+
+Anatoly Zavyalov, 2021
+"""
+
+import asyncio
+
+from gremlin_python.process.graph_traversal import __
+from gremlin_python.driver.protocol import GremlinServerError # Gremlin server error
+
+from log_to_file import log_to_file
+
+from graph_interface import GraphInterface
+
+
+class AsyncGraphInterface():
+    """
+    A wrapper around a GraphInterface whose methods return awaitables.
+
+    Traversals are submitted with gremlin_python's Traversal.promise(), so the event loop is never blocked by a round trip, and at most
+    :ivar max_in_flight: of them are in flight at once. The vertex ID cache, interval index and snapshot cache of :ivar gi: are shared
+    with the synchronous methods.
+
+    Example:
+
+        agi = await AsyncGraphInterface.create(max_in_flight=32)
+        await asyncio.gather(*[agi.set_connection(a, b, time, True) for (a, b) in pairs])
+
+    :ivar gi: The wrapped GraphInterface.
+    :ivar max_in_flight: The maximum number of traversals submitted at once.
+    """
+
+    DEFAULT_MAX_IN_FLIGHT: int = 16
+
+    gi: GraphInterface
+
+    max_in_flight: int
+
+
+    def __init__(self, gi: GraphInterface, max_in_flight: int=DEFAULT_MAX_IN_FLIGHT) -> None:
+        """
+        Wrap an existing GraphInterface. Its pool_size should be at least :param max_in_flight:, otherwise requests queue up for a
+        connection instead of being in flight.
+
+        :param gi: The GraphInterface to wrap.
+        :type gi: GraphInterface
+        :param max_in_flight: The maximum number of traversals submitted at once, defaults to DEFAULT_MAX_IN_FLIGHT
+        :type max_in_flight: int, optional
+        """
+
+        self.gi = gi
+
+        self.max_in_flight = max_in_flight
+
+        # Created on first use, so that it belongs to the running event loop.
+        self._semaphore = None
+
+
+    @classmethod
+    async def create(cls, max_in_flight: int=DEFAULT_MAX_IN_FLIGHT, **kwargs) -> 'AsyncGraphInterface':
+        """
+        Instantiate a GraphInterface with :param max_in_flight: connections and wrap it.
+
+        gremlin_python runs its own event loop while connecting, which fails inside a running event loop (hence nest_asyncio in the
+        notebooks), so the GraphInterface is instantiated in a worker thread.
+
+        :param max_in_flight: The maximum number of traversals submitted at once, defaults to DEFAULT_MAX_IN_FLIGHT
+        :type max_in_flight: int, optional
+        :param kwargs: Keyword arguments passed on to the GraphInterface constructor.
+        :rtype: AsyncGraphInterface
+        """
+
+        kwargs.setdefault('pool_size', max_in_flight)
+
+        gi = await asyncio.get_running_loop().run_in_executor(None, lambda: GraphInterface(**kwargs))
+
+        return cls(gi=gi, max_in_flight=max_in_flight)
+
+
+    async def _submit(self, traversal, terminal: str='toList'):
+        """
+        Submit :param traversal: without blocking the event loop, waiting for a free slot if :ivar max_in_flight: traversals are in flight.
+
+        :param traversal: The traversal to submit.
+        :type traversal: GraphTraversal
+        :param terminal: The name of the terminal step to apply to the results, 'toList', 'next' or 'iterate', defaults to 'toList'
+        :type terminal: str, optional
+        :return: The result of the terminal step.
+        """
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+
+        if terminal == 'iterate':
+            # Traversal.iterate() only adds the none() step after the traversal was submitted, so add it here to not send back results.
+            traversal = traversal.none()
+
+        async with self._semaphore:
+            return await asyncio.wrap_future(traversal.promise(lambda t: getattr(t, terminal)()))
+
+
+    async def _run_sync(self, fn, *args):
+        """
+        Run the synchronous GraphInterface method :param fn: in a worker thread, for the operations that need several dependent
+        round trips, such as those of the 'changelog' connection storage.
+        """
+
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+
+    async def get_vertex_id(self, label: str, name: str):
+        """
+        Asynchronous version of GraphInterface.get_vertex_id.
+
+        :param label: The label of the vertex, 'component' or 'type'.
+        :type label: str
+        :param name: The 'name' property of the vertex.
+        :type name: str
+        :return: The ID of the vertex, or None if no such vertex exists.
+        """
+
+        vertex_id = self.gi.vertex_id_cache.get((label, name))
+
+        if vertex_id is None:
+
+            if (label, name) in self.gi.missing_vertex_cache:
+                return None
+
+            ids = await self._submit(self.gi.g.V().has(label, 'name', name).id_().limit(1))
+
+            if len(ids) == 0:
+                self.gi.missing_vertex_cache.put((label, name), True)
+                return None
+
+            vertex_id = ids[0]
+
+            self.gi.vertex_id_cache.put((label, name), vertex_id)
+
+        return vertex_id
+
+
+    async def _avoid_type_id(self, avoid_type: str):
+        """
+        Asynchronous version of GraphInterface._avoid_type_id.
+        """
+
+        return await self.get_vertex_id('type', avoid_type) if avoid_type else None
+
+
+    async def add_vertex(self, label: str, name: str, allow_duplicates: bool=False) -> None:
+        """
+        Asynchronous version of GraphInterface.add_vertex. The label scheme is always enforced.
+
+        :param label: What to label the vertex. 'component' or 'type'.
+        :type label: str
+        :param name: The 'name' property of the vertex.
+        :type name: str
+        :param allow_duplicates: Whether to allow vertices of the same label and name to be added, defaults to False
+        :type allow_duplicates: bool, optional
+        """
+
+        if label not in GraphInterface.ALLOWED_VERTEX_LABELS:
+            log_to_file(message=f"Vertex label {label} is not in {GraphInterface.ALLOWED_VERTEX_LABELS}", urgency=2)
+            return
+
+        try:
+            if allow_duplicates or ((label, name) not in self.gi.vertex_id_cache and await self._submit(self.gi.g.V().has('name', name).count(), 'next') == 0):
+                self.gi.vertex_id_cache.put((label, name), await self._submit(self.gi.g.addV(label).property('name', name).id_(), 'next'))
+                self.gi.missing_vertex_cache.pop((label, name))
+
+            else:
+                log_to_file(message=f"Vertex of name {name} already exists.", urgency=2)
+
+        except GremlinServerError as e:
+            log_to_file(message=f"Failed to add component of name {name}. {e}", urgency=2)
+
+
+    async def add_component(self, name: str) -> None:
+        """
+        Asynchronous version of GraphInterface.add_component.
+
+        :param name: Value of the 'name' property to assign the vertex to.
+        :type name: str
+        """
+
+        await self.add_vertex(label='component', name=name)
+
+
+    async def add_type(self, type_: str) -> None:
+        """
+        Asynchronous version of GraphInterface.add_type.
+
+        :param type_: Value of the 'name' property to assign the vertex to.
+        :type type_: str
+        """
+
+        await self.add_vertex(label='type', name=type_)
+
+
+    async def set_type(self, name: str, type_: str) -> None:
+        """
+        Asynchronous version of GraphInterface.set_type.
+
+        :param name: Value of the 'name' property of the component vertex to connect to the type vertex.
+        :type name: str
+        :param type_: Value of the 'name' property of the type vertex.
+        :type type_: str
+        """
+
+        try:
+            component_id, type_id = await asyncio.gather(self.get_vertex_id('component', name), self.get_vertex_id('type', type_))
+
+            if component_id is None or type_id is None:
+                log_to_file(message=f"Failed to set type of component {name} to type {type_}: no such component or type.", urgency=2)
+                return
+
+            await self._submit(self.gi.g.V(component_id).addE("type").to(__.V(type_id)), 'iterate')
+
+        except GremlinServerError as e:
+            log_to_file(message=f"Failed to set type of component {name} to type {type_}. {e}", urgency=2)
+
+
+    async def set_connection(self, name1: str, name2: str, time: float, connection: bool) -> None:
+        """
+        Asynchronous version of GraphInterface.set_connection.
+
+        Calls for the same pair of components should not be in flight at the same time, as the server may apply them in any order.
+        With the 'changelog' connection storage, GraphInterface.set_connection is run in a worker thread.
+
+        :param name1: Value of the 'name' property of the first vertex.
+        :type name1: str
+        :param name2: Value of the 'name' property of the second vertex.
+        :type name2: str
+        :param time: Time at which the connection was altered.
+        :type time: float
+        :param connection: True if a connection was created, False otherwise.
+        :type connection: bool
+        """
+
+        if self.gi.connection_storage == 'changelog':
+            return await self._run_sync(self.gi.set_connection, name1, name2, time, connection)
+
+        try:
+            id1, id2 = await asyncio.gather(self.get_vertex_id('component', name1), self.get_vertex_id('component', name2))
+
+            if id1 is None or id2 is None:
+                log_to_file(message=f"Failed to set {connection} connection between components {name1} and {name2} at time {time}: no such component.", urgency=2)
+                return
+
+            await self._submit(self.gi._set_connection_traversal(id1, id2, time, connection), 'iterate')
+
+            self.gi._record_connection(name1, name2, time, connection)
+
+        except GremlinServerError as e:
+            log_to_file(message=f"Failed to set {connection} connection between components {name1} and {name2} at time {time}. {e}", urgency=2)
+
+
+    async def find_paths(self, name1: str, name2: str, avoid_type: str, time: float) -> list:
+        """
+        Asynchronous version of GraphInterface.find_paths.
+
+        :param name1: Name parameter of the component vertex to traverse from.
+        :type name1: str
+        :param name2: Name parameter of the component vertex to terminate the traversal.
+        :type name2: str
+        :param avoid_type: Type of the component vertex to avoid when traversing.
+        :type avoid_type: str
+        :param time: Time to check the edges at.
+        :type time: float
+        :return: A list of paths of vertices and edges going from vertex with name :param name1: to vertex with name :param name2:
+        :rtype: list
+        """
+
+        if self.gi.connection_storage == 'changelog':
+            return await self._run_sync(self.gi.find_paths, name1, name2, avoid_type, time)
+
+        try:
+            id1, id2, avoid_type_id = await asyncio.gather(
+                self.get_vertex_id('component', name1), self.get_vertex_id('component', name2), self._avoid_type_id(avoid_type)
+            )
+
+            if id1 is None or id2 is None:
+                return []
+
+            return await self._submit(self.gi._find_paths_traversal(id1, id2, avoid_type_id, time))
+
+        except GremlinServerError as e:
+            log_to_file(message=f"Could not find paths between {name1} and {name2} at time {time} avoiding {avoid_type}. {e}", urgency=2)
+
+
+    async def get_connected_vertices_at_time(self, time: float) -> list:
+        """
+        Asynchronous version of GraphInterface.get_connected_vertices_at_time.
+
+        :param time: Time to check
+        :type time: float
+        :return: List of 2-tuples containing the names of the pairs of vertices connected at :param time:.
+        :rtype: list[tuple[str, str]]
+        """
+
+        if self.gi.interval_index is not None:
+            return self.gi.interval_index.pairs_at(time)
+
+        if self.gi.connection_storage == 'changelog':
+            return await self._run_sync(self.gi.get_connected_vertices_at_time, time)
+
+        return [tuple(d.values()) for d in await self._submit(self.gi._connected_vertices_traversal(time))]
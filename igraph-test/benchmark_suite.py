@@ -0,0 +1,428 @@
+"""
+benchmark_suite.py
+
+Contains a reproducible benchmark suite for GraphInterface and LocalGraph, replacing the single hardcoded scenario of test_load_graph.benchmark_paths.
+
+Every scenario of a grid of dish counts and churn rates measures load throughput, set_connection latency, find_paths latency,
+LocalGraph path latency and snapshot build time, with warmup runs, repeated runs and percentile statistics. Results are written
+as JSON and can be compared against a saved baseline to flag regressions.
+
+Run `python benchmark_suite.py --help` for the options. `--backend memory` runs without a JanusGraph server.
+
+Anatoly Zavyalov, 2021
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+from datetime import datetime
+
+from graph_interface import GraphInterface
+
+from local_graph import LocalGraph
+
+from hirax import CORRELATOR, TYPES, dish_signal_chain
+
+from log_to_file import log_to_file
+
+from workload_generator import WorkloadGenerator
+
+
+# The length in seconds of the history of the 'churn' workload.
+WORKLOAD_HISTORY = 3600
+
+# The settings that must be the same for two runs to be compared, and their defaults.
+COMPARED_SETTINGS = {'backend': 'remote', 'connection_storage': 'edges', 'workload': 'chains', 'redundancy': 0, 'batch_size': GraphInterface.DEFAULT_BULK_BATCH_SIZE, 'queries': 16}
+
+
+def measure(fn, warmup: int, repeats: int) -> list:
+    """
+    Call :param fn: :param warmup: times without timing it, then :param repeats: times, timing each call.
+
+    :param fn: The function to time, taking no arguments.
+    :type fn: Callable[[], Any]
+    :param warmup: The number of untimed calls.
+    :type warmup: int
+    :param repeats: The number of timed calls.
+    :type repeats: int
+    :return: The duration of each timed call in seconds.
+    :rtype: list[float]
+    """
+
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+
+    for _ in range(repeats):
+        now = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - now)
+
+    return samples
+
+
+def summarize(samples: list) -> dict:
+    """
+    Return the statistics of a list of durations.
+
+    :param samples: Durations in seconds.
+    :type samples: list[float]
+    :return: A dictionary with keys 'n', 'mean', 'min', 'p50', 'p90', 'p99' and 'max'.
+    :rtype: dict
+    """
+
+    ordered = sorted(samples)
+
+    def percentile(p: float) -> float:
+        # Nearest-rank percentile.
+        return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))]
+
+    return {
+        'n': len(ordered),
+        'mean': sum(ordered) / len(ordered),
+        'min': ordered[0],
+        'p50': percentile(50),
+        'p90': percentile(90),
+        'p99': percentile(99),
+        'max': ordered[-1],
+    }
+
+
+def churn_connections(dish: int, churn: int) -> list:
+    """
+    Return the connection events of the signal chain of :param dish: when it is reconnected :param churn: times.
+
+    The chain is connected at time dish % 4 + 2k and disconnected at dish % 4 + 2k + 1 for k in range(:param churn:).
+
+    :param dish: The number of the dish.
+    :type dish: int
+    :param churn: The number of times the chain is connected.
+    :type churn: int
+    :rtype: list[tuple[int, bool]]
+    """
+
+    offset = dish % 4
+
+    return [event for k in range(churn) for event in ((offset + 2 * k, True), (offset + 2 * k + 1, False))]
+
+
+def load_scenario(gi: GraphInterface, dishes: int, churn: int, batch_size: int, workload: str='chains', redundancy: int=0, seed: int=0) -> int:
+    """
+    Load :param dishes: signal chains, each reconnected :param churn: times, into :param gi:.
+
+    With :param workload: 'chains', every chain is reconnected as a whole (see churn_connections). With 'churn', the chains are generated
+    by a WorkloadGenerator over WORKLOAD_HISTORY seconds with :param churn: expected changes per dish, :param redundancy: and :param seed:,
+    and loaded one chunk of dishes at a time.
+
+    :return: The number of components loaded.
+    :rtype: int
+    """
+
+    for t in TYPES:
+        gi.add_type(t)
+
+    gi.add_component(CORRELATOR)
+    gi.set_type(CORRELATOR, 'COR')
+
+    if workload == 'churn':
+
+        generator = WorkloadGenerator(dishes=dishes, churn_rate=churn / WORKLOAD_HISTORY, history=WORKLOAD_HISTORY, redundancy=redundancy, seed=seed)
+
+        loaded = 0
+
+        for (components, connections) in generator.chunks():
+            gi.bulk_load(components=components, connections=connections, batch_size=batch_size)
+            loaded += len(components)
+
+        return loaded
+
+    components, connections = [], []
+
+    for i in range(1, dishes + 1):
+
+        dish_components, dish_connections = dish_signal_chain(i=i, cor=CORRELATOR, connections=churn_connections(i, churn))
+
+        components += dish_components
+        connections += dish_connections
+
+    gi.bulk_load(components=components, connections=connections, batch_size=batch_size)
+
+    return len(components)
+
+
+def run_scenario(make_graph_interface, dishes: int, churn: int, warmup: int, repeats: int, queries: int, batch_size: int, seed: int, workload: str='chains', redundancy: int=0) -> list:
+    """
+    Run every benchmark of one scenario.
+
+    :param make_graph_interface: A function taking no arguments returning a new GraphInterface with an empty graph.
+    :type make_graph_interface: Callable[[], GraphInterface]
+    :param dishes: Number of dishes in the graph.
+    :type dishes: int
+    :param churn: Number of times each signal chain is reconnected.
+    :type churn: int
+    :param warmup: Number of untimed runs per benchmark.
+    :type warmup: int
+    :param repeats: Number of timed runs per benchmark.
+    :type repeats: int
+    :param queries: Number of antennas queried per path benchmark run.
+    :type queries: int
+    :param batch_size: Batch size passed to GraphInterface.bulk_load.
+    :type batch_size: int
+    :param seed: Seed of the random choice of antennas and pairs, and of the 'churn' workload.
+    :type seed: int
+    :param workload: 'chains' or 'churn', see load_scenario, defaults to 'chains'
+    :type workload: str, optional
+    :param redundancy: The number of redundant fibres per polarization of the 'churn' workload, defaults to 0
+    :type redundancy: int, optional
+    :return: A list of result dictionaries of the format {'benchmark': ..., 'dishes': ..., 'churn': ..., 'unit': ..., **summarize(...)}.
+    :rtype: list[dict]
+    """
+
+    rng = random.Random(seed)
+
+    results = []
+
+    def record(benchmark: str, samples: list, unit: str='seconds') -> None:
+        results.append({'benchmark': benchmark, 'dishes': dishes, 'churn': churn, 'unit': unit, **summarize(samples)})
+
+    # Load throughput: every run loads the whole graph into a fresh, empty graph.
+    load_samples = []
+
+    for run in range(warmup + repeats):
+
+        gi = make_graph_interface()
+
+        now = time.perf_counter()
+        components = load_scenario(gi, dishes=dishes, churn=churn, batch_size=batch_size, workload=workload, redundancy=redundancy, seed=seed)
+        seconds = time.perf_counter() - now
+
+        if run >= warmup:
+            load_samples.append(components / seconds)
+
+        if run < warmup + repeats - 1:
+            gi.close()
+
+    record('load_throughput', load_samples, unit='components/second')
+
+    # The last loaded graph is used for the other benchmarks.
+    # Times at which roughly a quarter of the chains are connected, or any time of the 'churn' workload.
+    # With no churn, the chains of the 'chains' workload are never connected, so any time is as good as another.
+    query_time = rng.randrange(WORKLOAD_HISTORY) if workload == 'churn' else 2 * rng.randrange(max(churn, 1)) + rng.randrange(4)
+
+    antennas = [f'ANT{str(rng.randint(1, dishes)).zfill(6)}' for _ in range(queries)]
+
+    record('find_paths', measure(lambda: [gi.find_paths(ant, CORRELATOR, '', query_time) for ant in antennas], warmup, repeats))
+
+    def build_snapshot() -> LocalGraph:
+        local_graph = LocalGraph()
+        local_graph.create_from_connections_undirected(gi.get_connected_vertices_at_time(query_time))
+        return local_graph
+
+    record('snapshot_build', measure(build_snapshot, warmup, repeats))
+
+    local_graph = build_snapshot()
+
+    record('local_graph_paths', measure(lambda: [local_graph.find_shortest_paths(ant, CORRELATOR) for ant in antennas if ant in local_graph.vertex_name_to_ind], warmup, repeats))
+
+    # set_connection latency: connect and disconnect a new antenna-feed pair far after the loaded history.
+    latest = WORKLOAD_HISTORY + WorkloadGenerator.MAX_REPAIR_TIME if workload == 'churn' else 2 * churn + 4
+
+    gi.add_component('ANT999999')
+    gi.add_component('DPF999999')
+
+    toggle_times = iter(range(latest, latest + 2 * (warmup + repeats) * queries + 2))
+
+    def toggle() -> None:
+        for _ in range(queries):
+            t = next(toggle_times)
+            gi.set_connection('ANT999999', 'DPF999999', t, t % 2 == latest % 2)
+
+    record('set_connection', [seconds / queries for seconds in measure(toggle, warmup, repeats)])
+
+    gi.close()
+
+    return results
+
+
+def compare(results: list, baseline: list, tolerance: float) -> list:
+    """
+    Compare results against a baseline and return the regressions.
+
+    A benchmark regresses if its median is more than :param tolerance: worse than the baseline median: slower for durations,
+    lower for throughputs.
+
+    :param results: The 'results' of a run_suite output.
+    :type results: list[dict]
+    :param baseline: The 'results' of a saved run_suite output.
+    :type baseline: list[dict]
+    :param tolerance: The allowed relative change, e.g. 0.2 for 20%.
+    :type tolerance: float
+    :return: A list of dictionaries of the format {'benchmark': ..., 'dishes': ..., 'churn': ..., 'baseline': ..., 'current': ..., 'change': ...}.
+    :rtype: list[dict]
+    """
+
+    key = lambda r: (r['benchmark'], r['dishes'], r['churn'])
+
+    baseline_by_key = {key(r): r for r in baseline}
+
+    regressions = []
+
+    for r in results:
+
+        b = baseline_by_key.get(key(r))
+
+        if b is None or b['p50'] == 0:
+            continue
+
+        change = (r['p50'] - b['p50']) / b['p50']
+
+        # Throughputs regress when they go down, durations when they go up.
+        worse = -change if r['unit'] != 'seconds' else change
+
+        if worse > tolerance:
+            regressions.append({'benchmark': r['benchmark'], 'dishes': r['dishes'], 'churn': r['churn'], 'baseline': b['p50'], 'current': r['p50'], 'change': change})
+
+    return regressions
+
+
+def mismatched_settings(meta: dict, baseline_meta: dict) -> dict:
+    """
+    Return the settings of COMPARED_SETTINGS that differ between the 'meta' of a run_suite output and the 'meta' of a baseline, whose
+    results are then not comparable. A setting missing from an older baseline is taken to be its default.
+
+    :return: Dictionary of style {..., setting: (current, baseline), ...}, empty if the runs are comparable.
+    :rtype: dict
+    """
+
+    mismatched = {}
+
+    for (setting, default) in COMPARED_SETTINGS.items():
+
+        current, base = meta.get(setting, default), baseline_meta.get(setting, default)
+
+        if current != base:
+            mismatched[setting] = (current, base)
+
+    return mismatched
+
+
+def run_suite(make_graph_interface, dish_counts: list, churn_rates: list, warmup: int=1, repeats: int=5, queries: int=16, batch_size: int=GraphInterface.DEFAULT_BULK_BATCH_SIZE, seed: int=0, workload: str='chains', redundancy: int=0) -> dict:
+    """
+    Run every scenario of the grid :param dish_counts: x :param churn_rates:.
+
+    :return: A dictionary of the format {'meta': {...}, 'results': [...]}, where 'results' concatenates the run_scenario results.
+    :rtype: dict
+    """
+
+    meta = {
+        'started': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'warmup': warmup,
+        'repeats': repeats,
+        'queries': queries,
+        'batch_size': batch_size,
+        'seed': seed,
+        'workload': workload,
+        'redundancy': redundancy,
+    }
+
+    results = []
+
+    for dishes in dish_counts:
+        for churn in churn_rates:
+
+            log_to_file(message=f"Benchmark suite: running scenario with {dishes} dishes and churn {churn}.")
+
+            results += run_scenario(make_graph_interface, dishes=dishes, churn=churn, warmup=warmup, repeats=repeats, queries=queries, batch_size=batch_size, seed=seed, workload=workload, redundancy=redundancy)
+
+    return {'meta': meta, 'results': results}
+
+
+def main(argv: list=None) -> int:
+    """
+    Command-line entry point. Returns 1 if a regression against the baseline was found, 2 if the baseline was run with different
+    settings (see mismatched_settings) and was not compared, 0 otherwise.
+    """
+
+    parser = argparse.ArgumentParser(description="Benchmark GraphInterface and LocalGraph over a grid of dish counts and churn rates.")
+    parser.add_argument('--backend', choices=GraphInterface.BACKENDS, default='remote', help="'remote' uses the Gremlin server, 'memory' an in-process MemoryGraph.")
+    parser.add_argument('--port', type=int, default=8182)
+    parser.add_argument('--connection-storage', choices=GraphInterface.CONNECTION_STORAGES, default='edges', help="How the 'remote' backend stores connections.")
+    parser.add_argument('--dishes', type=int, nargs='+', default=[16, 64])
+    parser.add_argument('--churn', type=int, nargs='+', default=[1, 4], help="Reconnects per chain ('chains') or expected changes per dish ('churn'), at least 0.")
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--queries', type=int, default=16)
+    parser.add_argument('--batch-size', type=int, default=GraphInterface.DEFAULT_BULK_BATCH_SIZE)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workload', choices=('chains', 'churn'), default='chains', help="'chains' reconnects whole chains --churn times, 'churn' generates balun swaps, fibre re-splices and reconnects with workload_generator.py, --churn per dish on average.")
+    parser.add_argument('--redundancy', type=int, default=0, help="Redundant fibres per polarization of the 'churn' workload.")
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', default=None, help="A previous --output file to compare against.")
+    parser.add_argument('--tolerance', type=float, default=0.2)
+
+    args = parser.parse_args(argv)
+
+    if min(args.churn) < 0:
+        parser.error("--churn must be at least 0.")
+
+    if args.backend == 'memory':
+        make_graph_interface = lambda: GraphInterface(backend='memory')
+
+    else:
+        def make_graph_interface() -> GraphInterface:
+            gi = GraphInterface(port=args.port, connection_storage=args.connection_storage)
+
+            gi.reset_graph()
+
+            return gi
+
+    suite = run_suite(make_graph_interface, dish_counts=args.dishes, churn_rates=args.churn, warmup=args.warmup, repeats=args.repeats, queries=args.queries, batch_size=args.batch_size, seed=args.seed, workload=args.workload, redundancy=args.redundancy)
+
+    suite['meta']['backend'] = args.backend
+    suite['meta']['connection_storage'] = args.connection_storage
+
+    regressions = []
+
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+        mismatched = mismatched_settings(suite['meta'], baseline.get('meta', {}))
+
+        if len(mismatched) > 0:
+            # Results of different configurations are not like for like, so they are not compared.
+            suite['mismatched_settings'] = {setting: {'current': current, 'baseline': base} for (setting, (current, base)) in mismatched.items()}
+
+            for (setting, (current, base)) in mismatched.items():
+                print(f"NOT COMPARED: {setting} is {current!r}, but {base!r} in the baseline {args.baseline}.")
+
+        else:
+            regressions = compare(suite['results'], baseline['results'], tolerance=args.tolerance)
+
+            suite['regressions'] = regressions
+
+    with open(args.output, 'w') as file:
+        json.dump(suite, file, indent=2)
+
+    for r in suite['results']:
+        print(f"{r['benchmark']:>18} dishes={r['dishes']:<6} churn={r['churn']:<3} p50={r['p50']:.6g} p90={r['p90']:.6g} {r['unit']}")
+
+    for r in regressions:
+        print(f"REGRESSION {r['benchmark']} dishes={r['dishes']} churn={r['churn']}: {r['baseline']:.6g} -> {r['current']:.6g} ({r['change']:+.1%})")
+
+    if 'mismatched_settings' in suite:
+        return 2
+
+    return 1 if len(regressions) > 0 else 0
+
+
+if __name__ == "__main__":
+
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+component_ids.py
+
+Contains functions to intern component names as integers.
+
+A name following the HIRAX naming scheme (see hirax.py), a type prefix from hirax.TYPES followed by a 6-digit serial, is encoded as
+TYPES.index(prefix) * SERIALS + serial without any lookup, so 'ANT000123' is 1000123. Any other name is given the next free integer
+from FALLBACK_BASE on, remembered for the lifetime of the process. Both directions are O(1), so names only need to be converted at
+the edge of an API, and integers are stored and hashed everywhere else.
+
+Anatoly Zavyalov, 2021
+"""
+
+import threading
+
+from operator import add, itemgetter
+
+from hirax import TYPES
+
+
+# The number of serials of each type.
+SERIALS = 10**6
+
+SERIAL_DIGITS = 6
+
+PREFIX_LENGTH = 3
+
+# Dictionary of style {..., prefix: index, ...} of the types of the naming scheme.
+TYPE_INDEX = {type_: i for (i, type_) in enumerate(TYPES)}
+
+# Dictionary of style {..., prefix: TYPE_INDEX[prefix] * SERIALS, ...}, for encode_all.
+_TYPE_OFFSET = {type_: i * SERIALS for (type_, i) in TYPE_INDEX.items()}
+
+_prefix, _serial = itemgetter(slice(None, PREFIX_LENGTH)), itemgetter(slice(PREFIX_LENGTH, None))
+
+# The first integer given to a name outside of the naming scheme.
+FALLBACK_BASE = len(TYPES) * SERIALS
+
+# The names outside of the naming scheme, in order of encoding, and their integers.
+_fallback_names = []
+
+_fallback_ids = {}
+
+_fallback_lock = threading.Lock()
+
+
+def encode(name: str) -> int:
+    """
+    Return the integer of the component name :param name:.
+
+    :param name: A component name, e.g. 'ANT000123'.
+    :type name: str
+    :rtype: int
+    """
+
+    if len(name) == PREFIX_LENGTH + SERIAL_DIGITS:
+
+        type_index = TYPE_INDEX.get(name[:PREFIX_LENGTH])
+
+        serial = name[PREFIX_LENGTH:]
+
+        if type_index is not None and serial.isascii() and serial.isdigit():
+            return type_index * SERIALS + int(serial)
+
+    component_id = _fallback_ids.get(name)
+
+    if component_id is None:
+        with _fallback_lock:
+            component_id = _fallback_ids.get(name)
+
+            if component_id is None:
+                component_id = _fallback_ids[name] = FALLBACK_BASE + len(_fallback_names)
+                _fallback_names.append(name)
+
+    return component_id
+
+
+def encode_all(names: list) -> list:
+    """
+    Return the integers of the component names :param names:, like [encode(name) for name in names].
+
+    If every name follows the naming scheme, they are encoded with built-in functions mapped over the whole list instead of one
+    encode call per name, which is several times faster on the hundreds of thousands of names of a full array. Otherwise every
+    name goes through encode.
+
+    :param names: A list of component names.
+    :type names: list[str]
+    :rtype: list[int]
+    """
+
+    offsets = list(map(_TYPE_OFFSET.get, map(_prefix, names)))
+
+    serials = list(map(_serial, names))
+
+    digits = ''.join(serials)
+
+    if None in offsets or not set(map(len, serials)) <= {SERIAL_DIGITS} or not (digits.isascii() and digits.isdigit()):
+        return list(map(encode, names))
+
+    return list(map(add, offsets, map(int, serials)))
+
+
+def lookup(name: str) -> int:
+    """
+    Return the integer of the component name :param name: like encode, or None if it is outside of the naming scheme and has
+    never been encoded. Unlike encode it never remembers a new name, so it is meant for membership tests and other lookups.
+
+    :param name: A component name, e.g. 'ANT000123'.
+    :type name: str
+    :rtype: int
+    """
+
+    if len(name) == PREFIX_LENGTH + SERIAL_DIGITS:
+
+        type_index = TYPE_INDEX.get(name[:PREFIX_LENGTH])
+
+        serial = name[PREFIX_LENGTH:]
+
+        if type_index is not None and serial.isascii() and serial.isdigit():
+            return type_index * SERIALS + int(serial)
+
+    return _fallback_ids.get(name)
+
+
+def decode(component_id: int) -> str:
+    """
+    Return the component name of the integer :param component_id: returned by encode.
+
+    :param component_id: An integer returned by encode.
+    :type component_id: int
+    :rtype: str
+    """
+
+    if component_id < FALLBACK_BASE:
+        return TYPES[component_id // SERIALS] + str(component_id % SERIALS).zfill(SERIAL_DIGITS)
+
+    return _fallback_names[component_id - FALLBACK_BASE]
+
+
+def type_of(component_id: int) -> str:
+    """
+    Return the type prefix of the integer :param component_id:, or None if its name is outside of the naming scheme (or if
+    :param component_id: is None, as returned by lookup for an unknown name).
+    """
+
+    return TYPES[component_id // SERIALS] if component_id is not None and component_id < FALLBACK_BASE else None
+
+
+def encode_pairs(pairs: list) -> list:
+    """
+    Return :param pairs: of component names as pairs of integers.
+
+    :param pairs: A list of the format [(name1, name2), ...].
+    :type pairs: list[tuple[str, str]]
+    :rtype: list[tuple[int, int]]
+    """
+
+    return [(encode(a), encode(b)) for (a, b) in pairs]
+
+
+def decode_pairs(pairs: list) -> list:
+    """
+    Return :param pairs: of integers as pairs of component names.
+
+    :param pairs: A list of the format [(id1, id2), ...].
+    :type pairs: list[tuple[int, int]]
+    :rtype: list[tuple[str, str]]
+    """
+
+    return [(decode(a), decode(b)) for (a, b) in pairs]
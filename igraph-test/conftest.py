@@ -0,0 +1,34 @@
+"""
+conftest.py
+
+Contains the pytest fixtures shared by the test modules.
+
+Anatoly Zavyalov, 2021
+"""
+
+import os
+
+import pytest
+
+from log_to_file import close_logs
+
+
+# test_load_graph.py is the graph loading and benchmarking script, not a test module, and needs matplotlib.
+collect_ignore = ['test_load_graph.py']
+
+
+@pytest.fixture(scope='session', autouse=True)
+def log_directory(tmp_path_factory):
+    """
+    Run the tests in a temporary directory, so that the log.txt written through log_to_file does not end up in the repository.
+    """
+
+    cwd = os.getcwd()
+
+    os.chdir(tmp_path_factory.mktemp('logs'))
+
+    yield
+
+    close_logs()
+
+    os.chdir(cwd)
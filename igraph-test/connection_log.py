@@ -0,0 +1,195 @@
+"""
+connection_log.py
+
+Contains functions for the change logs of the 'changelog' connection storage of GraphInterface.
+
+A change log is the 'connection_log' property of the single 'connection' edge between two components: a concatenation of entries
+"CTTTTTTTTTT", where C is 1 if the connection was formed and 0 if it was destroyed, and the 10 Ts are the time of the change, in
+seconds, zero-padded (see demo_notebooks/connections_test_2.ipynb). Entries are sorted by time, so the state of a connection at a
+time is found by binary search, and because the times are zero-padded the search compares substrings without parsing the log.
+
+Anatoly Zavyalov, 2021
+"""
+
+from bisect import bisect_right
+
+from math import floor, isfinite
+
+
+# How long each entry is: 1 for C, TIME_DIGITS for the Ts.
+TIME_DIGITS = 10
+
+ENTRY_LENGTH = 1 + TIME_DIGITS
+
+MAX_TIME = 10**TIME_DIGITS - 1
+
+
+class _LogTimes():
+    """
+    A read-only sequence of the zero-padded time strings of the entries of a change log, for bisect.
+    """
+
+    def __init__(self, log: str) -> None:
+        self.log = log
+
+    def __len__(self) -> int:
+        return len(self.log) // ENTRY_LENGTH
+
+    def __getitem__(self, k: int) -> str:
+        return self.log[k * ENTRY_LENGTH + 1:(k + 1) * ENTRY_LENGTH]
+
+
+def is_valid_time(time: float) -> bool:
+    """
+    Return whether :param time: can be stored in a change log, i.e. whether it is a whole number of seconds in [0, MAX_TIME].
+    """
+
+    return isfinite(time) and time == int(time) and 0 <= time <= MAX_TIME
+
+
+def encode_entry(time: float, connection: bool) -> str:
+    """
+    Return the "CTTTTTTTTTT" entry of a change of a connection. :param time: must satisfy is_valid_time.
+
+    :param time: Time of the change.
+    :type time: float
+    :param connection: True if the connection was formed, False otherwise.
+    :type connection: bool
+    :rtype: str
+    """
+
+    return str(int(connection)) + str(int(time)).zfill(TIME_DIGITS)
+
+
+def _index_at(log: str, time: float) -> int:
+    """
+    Return the number of entries of :param log: at or before :param time:.
+    """
+
+    if time < 0:
+        return 0
+
+    # Entry times are whole seconds, so an entry is at or before :param time: exactly if it is at or before its floor.
+    return bisect_right(_LogTimes(log), str(min(floor(time), MAX_TIME)).zfill(TIME_DIGITS))
+
+
+def state_at(log: str, time: float) -> bool:
+    """
+    Return whether the connection of the change log :param log: existed at :param time:, in O(log n) for n entries.
+
+    :param log: The change log.
+    :type log: str
+    :param time: Time to check.
+    :type time: float
+    :rtype: bool
+    """
+
+    k = _index_at(log, time)
+
+    return k > 0 and log[(k - 1) * ENTRY_LENGTH] == '1'
+
+
+def append(log: str, time: float, connection: bool) -> str:
+    """
+    Return :param log: with the change (:param time:, :param connection:) inserted, or None if the connection is already in that
+    state at :param time:.
+
+    Changes are normally appended at the end, but a change older than the last entry is inserted at its position in time. The log
+    is kept normalized, so that there are never multiple entries of the same type in a row nor at the same time: the following
+    entry is dropped if it makes the same change, and an entry at the same time as :param time: is replaced by the change.
+
+    :param log: The change log, or '' if the pair has never been connected.
+    :type log: str
+    :param time: Time of the change. Must satisfy is_valid_time.
+    :type time: float
+    :param connection: True if the connection was formed, False otherwise.
+    :type connection: bool
+    :return: The new change log, or None if nothing changed.
+    :rtype: str
+    """
+
+    if state_at(log, time) == connection:
+        return None
+
+    k = _index_at(log, time)
+
+    entry = encode_entry(time, connection)
+
+    start = end = k * ENTRY_LENGTH
+
+    # The previous entry is a change at the same time in the other direction, so both cancel out: it is removed, and the change
+    # is only logged if the connection was in the other state before that entry.
+    if k > 0 and log[start - TIME_DIGITS:start] == entry[1:]:
+        start -= ENTRY_LENGTH
+
+        if (k > 1 and log[start - ENTRY_LENGTH] == '1') == connection:
+            entry = ''
+
+    # After the change the connection is in the state :param connection:, so a following entry making the same change is redundant.
+    if end < len(log) and (log[end] == '1') == connection:
+        end += ENTRY_LENGTH
+
+    return log[:start] + entry + log[end:]
+
+
+def entries(log: str) -> list:
+    """
+    Return the entries of :param log: as a list of (time, connection) 2-tuples.
+
+    :rtype: list[tuple[int, bool]]
+    """
+
+    return [(int(log[i + 1:i + ENTRY_LENGTH]), log[i] == '1') for i in range(0, len(log), ENTRY_LENGTH)]
+
+
+def to_intervals(log: str, open_end: float) -> list:
+    """
+    Return the [start, end) intervals during which the connection of :param log: existed.
+
+    :param log: The change log.
+    :type log: str
+    :param open_end: The end of an interval that has not been terminated.
+    :type open_end: float
+    :rtype: list[tuple[int, float]]
+    """
+
+    intervals = []
+
+    start = None
+
+    for (time, connection) in entries(log):
+
+        if connection and start is None:
+            start = time
+
+        elif not connection and start is not None:
+            intervals.append((start, time))
+            start = None
+
+    if start is not None:
+        intervals.append((start, open_end))
+
+    return intervals
+
+
+def from_intervals(intervals: list, open_end: float) -> str:
+    """
+    Return the change log of the non-overlapping [start, end) intervals :param intervals:. Ends equal to :param open_end: are not logged.
+
+    :param intervals: A list of (start, end) 2-tuples, whose times must satisfy is_valid_time.
+    :type intervals: list[tuple[float, float]]
+    :param open_end: The end of an interval that has not been terminated.
+    :type open_end: float
+    :rtype: str
+    """
+
+    log = []
+
+    for (start, end) in sorted(intervals):
+
+        log.append(encode_entry(start, True))
+
+        if end != open_end:
+            log.append(encode_entry(end, False))
+
+    return ''.join(log)
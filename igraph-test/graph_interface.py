@@ -15,13 +15,42 @@ from gremlin_python.process.traversal import P # Import predicates (gt, gte, lt,
 from gremlin_python.process.traversal import Cardinality # Import Cardinality such as list_, set_ and single.
 from gremlin_python.driver.protocol import GremlinServerError # Gremlin server error
 from gremlin_python.process.traversal import Pop # for Pop.all_ in select(Pop.all_, 'v')
+from gremlin_python.process.traversal import Scope # for count(Scope.local)
 from gremlin_python.process.strategies import SubgraphStrategy
 from gremlin_python.process.graph_traversal import GraphTraversalSource
 
 from log_to_file import log_to_file
 
+from datetime import datetime
+
+from itertools import chain, islice
+
+import threading
+
+from time import sleep
+
 from local_graph import LocalGraph
 
+from lru_cache import LRUCache
+
+from interval_index import IntervalIndex
+
+from snapshot_cache import SnapshotCache
+
+from reachability_index import ReachabilityIndex
+
+from memory_graph import MemoryGraph
+
+import connection_log
+
+from property_history import PropertyHistory
+
+import component_ids
+
+from instrumentation import Instrumentation, InstrumentedConnection, instrumented
+
+from hirax import CORRELATOR
+
 
 class GraphInterface:
     """
@@ -30,19 +59,83 @@ class GraphInterface:
     :ivar ALLOWED_VERTEX_LABELS: Contains the allowed labels for vertices in the graph.
     :ivar EXISTING_CONNECTION_END_PLACEHOLDER: The value of the 'end' property of a currently existing connection.
     :ivar g: A GraphTraversalSource element that allows to query the graph stored in the Gremlin Server.
-
+    :ivar remote_connection: The DriverRemoteConnection :ivar g: submits traversals through.
+    :ivar memory_graph: The MemoryGraph holding the graph if the 'memory' backend is used, None otherwise.
+    :ivar connection_storage: How connections are stored in the graph: 'edges' for one 'connection' edge with 'start' and 'end' properties per connection, or 'changelog' for one 'connection' edge per pair of components with a 'connection_log' property (see connection_log.py).
+    :ivar query_mode: 'bytecode' to submit traversals as bytecode through :ivar g:, or 'script' to submit the parameterized scripts (such as CONNECTED_AT_SCRIPT) through a gremlin_python Client. May be changed at any time.
+    :ivar vertex_id_cache: A LRUCache mapping (label, name) 2-tuples of vertices to their vertex IDs, so that traversals can start from V(id).
+    :ivar missing_vertex_cache: A LRUCache of the (label, name) 2-tuples that get_vertex_id found no vertex for, forgotten when this GraphInterface adds such a vertex. Vertices added by other clients are not seen until clear_local_state is called.
+    :ivar interval_index: An IntervalIndex of the intervals of the 'connection' edges, or None if it is disabled.
+    :ivar snapshot_cache: A SnapshotCache of the LocalGraph snapshots returned by get_local_graph_at_time.
+    :ivar reachability_index: A ReachabilityIndex of the connected components of the snapshots, used by reaches, chain_of and unreachable_at.
+    :ivar property_cache: A LRUCache mapping component names to the PropertyHistory of their property vertices, used by get_properties and get_properties_at.
+    :ivar instrumentation: An Instrumentation recording the latency, round trips, result size and errors of the public methods and of every traversal submitted through :ivar g:, or None if instrumentation is disabled.
 
     """
 
     ALLOWED_VERTEX_LABELS: tuple = ('component', 'type')
 
+    BACKENDS: tuple = ('remote', 'memory')
+
+    QUERY_MODES: tuple = ('bytecode', 'script')
+
+    CONNECTION_STORAGES: tuple = ('edges', 'changelog')
+
+    # Parameterized Gremlin scripts used in the 'script' query mode. They only change through their bindings, so the Gremlin server
+    # compiles each of them once and reuses the cached compiled script.
+    CONNECTED_AT_SCRIPT: str = "g.V().has('component', 'name', name1).bothE('connection').has('start', lte(time)).has('end', gt(time)).otherV().has('component', 'name', name2).hasNext()"
+
+    CONNECTED_AT_BATCH_SCRIPT: str = "queries.collect { q -> g.V().has('component', 'name', q[0]).bothE('connection').has('start', lte(q[2])).has('end', gt(q[2])).otherV().has('component', 'name', q[1]).hasNext() }"
+
+    # The 'changelog' storage cannot be filtered by time on the server, so the change logs are returned and searched client-side.
+    CONNECTION_LOG_BATCH_SCRIPT: str = "queries.collect { q -> g.V().has('component', 'name', q[0]).bothE('connection').where(__.otherV().has('component', 'name', q[1])).values('connection_log').fold().next() }"
+
     EXISTING_CONNECTION_END_PLACEHOLDER = 2**63 - 1
 
+    DEFAULT_BULK_BATCH_SIZE: int = 250
+
+    DEFAULT_VERTEX_ID_CACHE_SIZE: int = 100000
+
+    DEFAULT_SNAPSHOT_CACHE_SIZE: int = 16
+
+    DEFAULT_REACHABILITY_CACHE_SIZE: int = 64
+
+    DEFAULT_PROPERTY_CACHE_SIZE: int = 10000
+
+    DEFAULT_PAGE_SIZE: int = 10000
+
+    DEFAULT_PATH_BATCH_SIZE: int = 64
+
+    DEFAULT_RESET_CHUNK_SIZE: int = 1000
+
+    DEFAULT_RESET_MAX_RETRIES: int = 5
+
+    # Seconds to wait before the first retry of a failed reset chunk, doubled on every retry up to DEFAULT_RESET_MAX_BACKOFF.
+    RESET_INITIAL_BACKOFF: float = 0.5
+
+    DEFAULT_RESET_MAX_BACKOFF: float = 30
+
     g: GraphTraversalSource
 
     local_graph: LocalGraph
 
-    def __init__(self, port: int=8182, traversal_source: str='g') -> None:
+    vertex_id_cache: LRUCache
+
+    missing_vertex_cache: LRUCache
+
+    interval_index: IntervalIndex
+
+    snapshot_cache: SnapshotCache
+
+    reachability_index: ReachabilityIndex
+
+    property_cache: LRUCache
+
+    memory_graph: MemoryGraph
+
+    instrumentation: Instrumentation
+
+    def __init__(self, port: int=8182, traversal_source: str='g', vertex_id_cache_size: int=DEFAULT_VERTEX_ID_CACHE_SIZE, use_interval_index: bool=False, snapshot_cache_size: int=DEFAULT_SNAPSHOT_CACHE_SIZE, pool_size: int=None, backend: str='remote', query_mode: str='bytecode', connection_storage: str='edges', property_cache_size: int=DEFAULT_PROPERTY_CACHE_SIZE, reachability_cache_size: int=DEFAULT_REACHABILITY_CACHE_SIZE, instrument: bool=False, profile_threshold: float=None) -> None:
         """
         Constructor class.
 
@@ -50,6 +143,28 @@ class GraphInterface:
         :type port: int, optional
         :param traversal_source: The traversal source configured in the Gremlin server for the graph (see https://github.com/JanusGraph/janusgraph/issues/1051 for more), defaults to 'g'
         :type traversal_source: str, optional
+        :param vertex_id_cache_size: The maximum number of vertex IDs to cache, 0 to disable caching, defaults to DEFAULT_VERTEX_ID_CACHE_SIZE
+        :type vertex_id_cache_size: int, optional
+        :param use_interval_index: Whether to keep a client-side IntervalIndex of the 'connection' edges, used by get_connected_vertices_at_time, defaults to False
+        :type use_interval_index: bool, optional
+        :param snapshot_cache_size: The maximum number of LocalGraph snapshots to cache, 0 to disable caching, defaults to DEFAULT_SNAPSHOT_CACHE_SIZE
+        :type snapshot_cache_size: int, optional
+        :param pool_size: The number of WebSocket connections to the Gremlin server, which bounds how many requests can be in flight at once, defaults to None (the gremlin_python default)
+        :type pool_size: int, optional
+        :param backend: Where the graph is stored: 'remote' for the Gremlin server, or 'memory' for an in-process MemoryGraph. The 'memory' backend ignores :param port:, :param traversal_source:, :param pool_size: and :param use_interval_index: (it always answers as-of queries from its own index), and does not support the traversal-level features (self.g, AsyncGraphInterface, export_graph), defaults to 'remote'
+        :type backend: str, optional
+        :param query_mode: 'bytecode' or 'script', see :ivar query_mode:, defaults to 'bytecode'
+        :type query_mode: str, optional
+        :param connection_storage: 'edges' or 'changelog', see :ivar connection_storage:. Must match how the connections already in the graph are stored, and is ignored by the 'memory' backend, defaults to 'edges'
+        :type connection_storage: str, optional
+        :param property_cache_size: The maximum number of component property histories to cache, 0 to disable caching, defaults to DEFAULT_PROPERTY_CACHE_SIZE
+        :type property_cache_size: int, optional
+        :param reachability_cache_size: The maximum number of epochs whose connected components are cached, defaults to DEFAULT_REACHABILITY_CACHE_SIZE
+        :type reachability_cache_size: int, optional
+        :param instrument: Whether to record statistics of the methods and traversals in :ivar instrumentation:, defaults to False
+        :type instrument: bool, optional
+        :param profile_threshold: If :param instrument: is True, the latency in seconds above which read-only traversals are submitted again with profile() and the server's metrics are kept (see Instrumentation), defaults to None (never)
+        :type profile_threshold: float, optional
         """
 
         log_to_file(message=f"Instantiating graph interface.")
@@ -58,12 +173,239 @@ class GraphInterface:
 
         self.local_graph = LocalGraph()
 
+        self.vertex_id_cache = LRUCache(max_size=vertex_id_cache_size)
+
+        self.missing_vertex_cache = LRUCache(max_size=vertex_id_cache_size)
+
+        self.interval_index = IntervalIndex(open_end=self.EXISTING_CONNECTION_END_PLACEHOLDER) if use_interval_index else None
+
+        self.snapshot_cache = SnapshotCache(max_size=snapshot_cache_size)
+
+        self.reachability_index = ReachabilityIndex(max_size=reachability_cache_size)
+
+        self.property_cache = LRUCache(max_size=property_cache_size)
+
+        self.memory_graph = None
+
+        self.instrumentation = Instrumentation(profile_threshold=profile_threshold) if instrument else None
+
+        self.query_mode = query_mode
+
+        if connection_storage not in self.CONNECTION_STORAGES:
+            log_to_file(message=f"Connection storage {connection_storage} is not in {self.CONNECTION_STORAGES}, using 'edges'.", urgency=2)
+            connection_storage = 'edges'
+
+        self.connection_storage = connection_storage
+
+        # The Client used in the 'script' query mode, created on first use.
+        self._script_client = None
+        self._script_client_args = (f'ws://localhost:{port}/gremlin', traversal_source, pool_size)
+
+        # Set before connecting, so that close() works even if connecting fails.
+        self.g, self.remote_connection = None, None
+
+        if backend not in self.BACKENDS:
+            log_to_file(message=f"Backend {backend} is not in {self.BACKENDS}, using 'remote'.", urgency=2)
+
+        elif backend == 'memory':
+            self.memory_graph = MemoryGraph(open_end=self.EXISTING_CONNECTION_END_PLACEHOLDER)
+
+            self.interval_index = None
+
+            return
+
         try:
-            self.g = self.graph.traversal().withRemote(DriverRemoteConnection(f'ws://localhost:{port}/gremlin', traversal_source))
+            self.remote_connection = DriverRemoteConnection(f'ws://localhost:{port}/gremlin', traversal_source, pool_size=pool_size)
+
+            # :ivar remote_connection: stays the driver's connection, so close() closes it directly.
+            connection = self.remote_connection if self.instrumentation is None else InstrumentedConnection(self.remote_connection, self.instrumentation)
+
+            self.g = self.graph.traversal().withRemote(connection)
+
+            if use_interval_index:
+                self.load_interval_index()
+
         except GremlinServerError as e:
             log_to_file(message=f"GremlinServerError when trying to instantiate graph traversal. {e}", urgency=2)            
 
 
+    @instrumented
+    def get_vertex_id(self, label: str, name: str):
+        """
+        Return the ID of the vertex with label :param label: and 'name' property of :param name:, or None if it does not exist.
+
+        The ID is read from self.vertex_id_cache if possible, otherwise it is queried and cached. A vertex that does not exist is
+        remembered in self.missing_vertex_cache, so that it is not queried again.
+
+        :param label: The label of the vertex, 'component' or 'type'.
+        :type label: str
+        :param name: The 'name' property of the vertex.
+        :type name: str
+        :return: The ID of the vertex, or None if no such vertex exists.
+        """
+
+        if self.memory_graph is not None:
+            return self.memory_graph.vertex_id(label, name)
+
+        vertex_id = self.vertex_id_cache.get((label, name))
+
+        if vertex_id is None:
+
+            if (label, name) in self.missing_vertex_cache:
+                return None
+
+            ids = self.g.V().has(label, 'name', name).id_().limit(1).toList()
+
+            if len(ids) == 0:
+                self.missing_vertex_cache.put((label, name), True)
+                return None
+
+            vertex_id = ids[0]
+
+            self.vertex_id_cache.put((label, name), vertex_id)
+
+        return vertex_id
+
+
+    def _avoid_type_id(self, avoid_type: str):
+        """
+        Return the ID of the type vertex :param avoid_type:, or None without querying the graph if :param avoid_type: is empty (i.e. no
+        type is avoided, as in find_paths(..., avoid_type='')).
+        """
+
+        return self.get_vertex_id('type', avoid_type) if avoid_type else None
+
+
+    def _vertex_ids(self, label: str, names: list) -> dict:
+        """
+        Batch version of get_vertex_id: the IDs missing from self.vertex_id_cache are queried in a single request and cached.
+
+        :param label: The label of the vertices, 'component' or 'type'.
+        :type label: str
+        :param names: The 'name' properties of the vertices. May contain None and duplicates.
+        :type names: list[str]
+        :return: Dictionary of style {..., name: ID or None, ...}, with None for the vertices that do not exist.
+        :rtype: dict
+        """
+
+        names = set(name for name in names if name is not None)
+
+        if self.memory_graph is not None:
+            return {name: self.memory_graph.vertex_id(label, name) for name in names}
+
+        ids = {name: self.vertex_id_cache.get((label, name)) for name in names}
+
+        missing = [name for (name, vertex_id) in ids.items() if vertex_id is None and (label, name) not in self.missing_vertex_cache]
+
+        if len(missing) > 0:
+
+            for d in self.g.V().has(label, 'name', P.within(missing)).project('name', 'id').by('name').by(__.id_()).toList():
+
+                # Of vertices with duplicate names, get_vertex_id would return any one as well.
+                if ids[d['name']] is None:
+                    ids[d['name']] = d['id']
+                    self.vertex_id_cache.put((label, d['name']), d['id'])
+
+            for name in missing:
+                if ids[name] is None:
+                    self.missing_vertex_cache.put((label, name), True)
+
+        return ids
+
+
+    @instrumented
+    def load_interval_index(self) -> None:
+        """
+        (Re)build self.interval_index from all 'connection' edges in the graph, in a single query.
+        """
+
+        if self.interval_index is None:
+            log_to_file(message=f"Cannot load interval index: interval index is disabled.", urgency=1)
+            return
+
+        log_to_file(message=f"Loading interval index.")
+
+        self.interval_index.clear()
+
+        if self.connection_storage == 'changelog':
+            for ((a, b), start, end) in self._changelog_intervals():
+                self.interval_index.add(a, b, start, end)
+            return
+
+        # Same order of the pair as get_connected_vertices_at_time.
+        for d in self.g.E().hasLabel('connection').project('a', 'b', 'start', 'end').by(__.inV().values('name')).by(__.outV().values('name')).by('start').by('end').toList():
+            self.interval_index.add(d['a'], d['b'], d['start'], d['end'])
+
+
+    def _connection_logs(self) -> list:
+        """
+        Return the change logs of all 'connection' edges of the 'changelog' connection storage, in a single query.
+
+        :return: A list of (pair, log) 2-tuples, with the pair in the order of get_connected_vertices_at_time.
+        :rtype: list[tuple[tuple[str, str], str]]
+        """
+
+        return [((d['a'], d['b']), d['log']) for d in self._connection_logs_traversal().toList()]
+
+
+    def _connection_logs_traversal(self, source: GraphTraversalSource=None):
+        """
+        Return the traversal that _connection_logs submits, starting from :param source: (self.g if None).
+
+        :rtype: GraphTraversal
+        """
+
+        source = self.g if source is None else source
+
+        return source.E().hasLabel('connection').project('a', 'b', 'log').by(__.inV().values('name')).by(__.outV().values('name')).by('connection_log')
+
+
+    def _changelog_intervals(self) -> list:
+        """
+        Return the [start, end) intervals of all connections of the 'changelog' connection storage.
+
+        :return: A list of (pair, start, end) 3-tuples, with the pair in the order of get_connected_vertices_at_time.
+        :rtype: list[tuple[tuple[str, str], float, float]]
+        """
+
+        return [
+            (pair, start, end) for (pair, log) in self._connection_logs() for (start, end) in connection_log.to_intervals(log, self.EXISTING_CONNECTION_END_PLACEHOLDER)
+        ]
+
+
+    def clear_local_state(self) -> None:
+        """
+        Forget all cached vertex IDs, indexed connections, snapshots and property histories. Must be called whenever vertices are dropped from the graph.
+        """
+
+        self.vertex_id_cache.clear()
+
+        self.missing_vertex_cache.clear()
+
+        self.property_cache.clear()
+
+        if self.interval_index is not None:
+            self.interval_index.clear()
+
+        self.snapshot_cache.clear()
+
+        self.reachability_index.clear()
+
+
+    def _connection_index(self) -> IntervalIndex:
+        """
+        Return the IntervalIndex that answers as-of connection queries without the Gremlin server, or None if there is none.
+
+        :rtype: IntervalIndex
+        """
+
+        if self.memory_graph is not None:
+            return self.memory_graph.connections
+
+        return self.interval_index
+
+
+    @instrumented
     def add_vertex(self, label: str, name: str, allow_duplicates: bool=False, enforce_label_scheme: bool=True) -> None:
         """
         Add a vertex to the graph with the label :param label: and 'name' property of :param name:.
@@ -86,9 +428,17 @@ class GraphInterface:
             # TODO: Make own exception (?), raise it here.
             return
 
+        if self.memory_graph is not None:
+            if allow_duplicates or not self.memory_graph.has_name(name):
+                self.memory_graph.add_vertex(label, name)
+            else:
+                log_to_file(message=f"Vertex of name {name} already exists.", urgency=2)
+            return
+
         try:
-            if allow_duplicates or self.g.V().has('name', name).count().next() == 0:
-                self.g.addV(label).property('name', name).iterate()
+            if allow_duplicates or ((label, name) not in self.vertex_id_cache and self.g.V().has('name', name).count().next() == 0):
+                self.vertex_id_cache.put((label, name), self.g.addV(label).property('name', name).id_().next())
+                self.missing_vertex_cache.pop((label, name))
 
             else:
                 log_to_file(message=f"Vertex of name {name} already exists.", urgency=2)
@@ -97,6 +447,7 @@ class GraphInterface:
             log_to_file(message=f"Failed to add component of name {name}. {e}", urgency=2)
 
 
+    @instrumented
     def add_component(self, name: str) -> None:
         """
         Add a vertex with label 'component' to the graph with a 'name' property of :param name: if one with this name does not already exist.
@@ -108,6 +459,7 @@ class GraphInterface:
         self.add_vertex(label='component', name=name)
 
 
+    @instrumented
     def add_type(self, type_: str) -> None:
         """
         Add a vertex with label 'type' to the graph with a 'name' property of :param type_:.
@@ -121,6 +473,7 @@ class GraphInterface:
         self.add_vertex(label='type', name=type_)
 
 
+    @instrumented
     def set_type(self, name: str, type_: str) -> None:
         """
         Connect the component vertex with name property :param name: to a type vertex labelled :param type_: with an edge going into the :param type_: vertex labelled with "type".
@@ -134,12 +487,24 @@ class GraphInterface:
         """
 
         try:
-            self.g.V().has('component', 'name', name).as_("a").V().has('type', 'name', type_).as_("b").addE("type").from_("a").to("b").iterate()
+            component_id, type_id = self.get_vertex_id('component', name), self.get_vertex_id('type', type_)
+
+            if component_id is None or type_id is None:
+                log_to_file(message=f"Failed to set type of component {name} to type {type_}: no such component or type.", urgency=2)
+                return
+
+            if self.memory_graph is not None:
+                self.memory_graph.add_type_edge(component_id, type_id)
+            else:
+                self.g.V(component_id).addE("type").to(__.V(type_id)).iterate()
+
+            self.reachability_index.component_types = None
 
         except GremlinServerError as e:
             log_to_file(message=f"Failed to set type of component {name} to type {type_}. {e}", urgency=2)
 
 
+    @instrumented
     def set_connection(self, name1: str, name2: str, time: float, connection: bool) -> None:
         """
         Given two vertices labelled with :param name1: and :param name2:, create a new connection or terminate their existing connection, 
@@ -156,79 +521,1792 @@ class GraphInterface:
         """
 
         try:
-            if connection:
-                # Add an edge labelled 'connection' with a start time of :param time:
-                self.g.V().has('component', 'name', name1).as_("a").not_( # NEGATE 
-                    __.bothE('connection').as_('e').bothV().has('component', 'name', name2).select('e').has('start', P.lte(time)).has('end', P.gt(time))
-                ).V().has('component', 'name', name2).as_("b").addE('connection').from_("a").to("b").property('start', time).property('end', self.EXISTING_CONNECTION_END_PLACEHOLDER).iterate()
+            id1, id2 = self.get_vertex_id('component', name1), self.get_vertex_id('component', name2)
+
+            if id1 is None or id2 is None:
+                log_to_file(message=f"Failed to set {connection} connection between components {name1} and {name2} at time {time}: no such component.", urgency=2)
+                return
+
+            if self.memory_graph is not None:
+                self.memory_graph.set_connection(id1, id2, time, connection)
+
+            elif self.connection_storage == 'changelog':
+                if not connection_log.is_valid_time(time):
+                    log_to_file(message=f"Failed to set {connection} connection between components {name1} and {name2} at time {time}: change logs only store whole seconds in [0, {connection_log.MAX_TIME}].", urgency=2)
+                    return
+
+                self._set_connection_changelog(id1, id2, time, connection)
 
             else:
-                # For all edges between v1 and v2 labelled 'connection' (there should only be one) that do not have an 'end' property, create an end property of :param time:.
-                self.g.V().has('component', 'name', name1).bothE('connection').as_('e').bothV().has('component', 'name', name2).select('e').has('end', self.EXISTING_CONNECTION_END_PLACEHOLDER).property('end', time).iterate()
+                self._set_connection_traversal(id1, id2, time, connection).iterate()
+
+            self._record_connection(name1, name2, time, connection)
 
         except GremlinServerError as e:
             log_to_file(message=f"Failed to set {connection} connection between components {name1} and {name2} at time {time}. {e}", urgency=2)
 
-    
-    # This will put it in V-E-V-E-V-...-V form as a list per path.
-    def find_paths(self, name1: str, name2: str, avoid_type: str, time: float) -> list:
+
+    def _set_connection_traversal(self, id1, id2, time: float, connection: bool):
         """
-        Given two vertices labelled with <name1> and <name2>, return the paths that connect the vertices by edges that were active at <time> as a list.
+        Return the traversal that set_connection submits for the component vertices of IDs :param id1: and :param id2:.
 
-        Avoid vertices of type avoid_type.
+        :param id1: ID of the first component vertex.
+        :param id2: ID of the second component vertex.
+        :param time: Time at which the connection was altered.
+        :type time: float
+        :param connection: True if a connection was created, False otherwise.
+        :type connection: bool
+        :rtype: GraphTraversal
+        """
 
-        :param name1: Name parameter of the component vertex to traverse from.
+        if connection:
+            # Add an edge labelled 'connection' with a start time of :param time:
+            return self.g.V(id1).not_( # NEGATE 
+                __.bothE('connection').has('start', P.lte(time)).has('end', P.gt(time)).otherV().hasId(id2)
+            ).addE('connection').to(__.V(id2)).property('start', time).property('end', self.EXISTING_CONNECTION_END_PLACEHOLDER)
+
+        else:
+            # For all edges between v1 and v2 labelled 'connection' (there should only be one) that do not have an 'end' property, create an end property of :param time:.
+            return self.g.V(id1).bothE('connection').has('end', self.EXISTING_CONNECTION_END_PLACEHOLDER).where(__.otherV().hasId(id2)).property('end', time)
+
+
+    def _set_connection_changelog(self, id1, id2, time: float, connection: bool) -> None:
+        """
+        set_connection for the 'changelog' connection storage: read the change log of the edge between the component vertices of IDs
+        :param id1: and :param id2:, insert the change with a binary search, and write it back, creating the edge if there is none.
+
+        :param id1: ID of the first component vertex.
+        :param id2: ID of the second component vertex.
+        :param time: Time at which the connection was altered. Must satisfy connection_log.is_valid_time.
+        :type time: float
+        :param connection: True if a connection was created, False otherwise.
+        :type connection: bool
+        """
+
+        logs = self.g.V(id1).bothE('connection').where(__.otherV().hasId(id2)).values('connection_log').toList()
+
+        log = connection_log.append(logs[0] if len(logs) > 0 else '', time, connection)
+
+        # The connection is already in that state.
+        if log is None:
+            return
+
+        self.g.V(id1).coalesce(
+            __.bothE('connection').where(__.otherV().hasId(id2)),
+            __.addE('connection').to(__.V(id2))
+        ).property('connection_log', log).iterate()
+
+
+    def _record_connection(self, name1: str, name2: str, time: float, connection: bool) -> None:
+        """
+        Update the client-side state after set_connection(:param name1:, :param name2:, :param time:, :param connection:) was submitted.
+
+        :param name1: Value of the 'name' property of the first vertex.
         :type name1: str
-        :param name2: Name parameter of the component vertex to terminate the traversal.
+        :param name2: Value of the 'name' property of the second vertex.
         :type name2: str
-        :param avoid_type: Type of the component vertex to avoid when traversing.
-        :type avoid_type: str
-        :param time: Time to check the edges at.
+        :param time: Time at which the connection was altered.
         :type time: float
-        :return: A list of paths of vertices and edges going from vertex with name :param name1: to vertex with name :param name2:
-        :rtype: list
+        :param connection: True if a connection was created, False otherwise.
+        :type connection: bool
         """
-        
+
+        if self.interval_index is not None:
+            # The edge goes from name1 into name2, and get_connected_vertices_at_time lists the in-vertex first.
+            if connection:
+                self.interval_index.connect(name2, name1, time)
+            else:
+                self.interval_index.disconnect(name2, name1, time)
+
+        change_points = self.snapshot_cache.change_points
+
+        # A new change point splits one epoch, and the new epoch only differs from it by this change (see ReachabilityIndex.record_change).
+        parent = self.snapshot_cache.epoch_of(time) if change_points is not None and self.snapshot_cache.epoch_of(time) != time else None
+
+        self.snapshot_cache.record_change(time)
+
+        self.reachability_index.record_change(time, parent=parent, pair=(component_ids.encode(name1), component_ids.encode(name2)), connection=connection)
+
+    
+    @instrumented
+    def set_property(self, name: str, key: str, value, time: float) -> None:
+        """
+        Set the property :param key: of the component with name :param name: to :param value: from :param time: on.
+
+        The change is stored as a 'property' vertex with 'key', 'value' and 'time' properties, connected by a 'had_property' edge going
+        out of the component vertex (see demo_notebooks/property_vertices.ipynb), so the component keeps its whole history.
+
+        :param name: Value of the 'name' property of the component.
+        :type name: str
+        :param key: The name of the property.
+        :type key: str
+        :param value: The new value of the property.
+        :param time: Time at which the property was set.
+        :type time: float
+        """
+
         try:
-            return self.g.V().has('component', 'name', name1).repeat(
-                __.bothE('connection').has('start', P.lte(time)).has('end', P.gt(time)).otherV().not_(__.outE('type').inV().has('type', 'name', avoid_type)).simplePath()
-            ).until(__.has('component', 'name', name2)).path().toList()
-        except GremlinServerError as e:
-            log_to_file(message=f"Could not find paths between {name1} and {name2} at time {time} avoiding {avoid_type}. {e}", urgency=2)
+            component_id = self.get_vertex_id('component', name)
 
+            if component_id is None:
+                log_to_file(message=f"Failed to set property {key} of component {name} at time {time}: no such component.", urgency=2)
+                return
 
-    def get_connected_vertices_at_time(self, time: float) -> list:
-        """Given a time, return the name properties of the component vertices connected by an edge that existed at this time and format it as a list[tuple[str, str]]
+            if self.memory_graph is not None:
+                self.memory_graph.set_property(component_id, key, value, time)
+                return
 
-        # TODO: this Gremlin query returns a really ugly thing, but it works. Fix, maybe?
+            self.g.V(component_id).addE('had_property').to(
+                __.addV('property').property('key', key).property('value', value).property('time', time)
+            ).iterate()
 
-        :param time: Time to check
+            # Keep a cached history up to date instead of dropping it.
+            history = self.property_cache.get(name)
+
+            if history is not None:
+                history.set(key, value, time)
+
+        except GremlinServerError as e:
+            log_to_file(message=f"Failed to set property {key} of component {name} at time {time}. {e}", urgency=2)
+
+
+    @instrumented
+    def get_properties(self, name: str, time: float) -> dict:
+        """
+        Return the properties of the component with name :param name: at :param time:.
+
+        :param name: Value of the 'name' property of the component.
+        :type name: str
+        :param time: Time to check.
         :type time: float
-        :return: List of 2-tuples containing the names of the pairs of vertices connected at :param time:.
-        :rtype: list[tuple[str, str]]
+        :return: A dictionary of style {..., key: value, ...} of the latest value of every property set at or before :param time:.
+        :rtype: dict
         """
 
-        # l is a list containing at most one elemnt, which is a large dictionary of vertex1: vertex2 entries.
-        l = self.g.E().has('start', P.lte(time)).has('end', P.gt(time)).project('a', 'b').by(__.inV().values('name')).by(__.outV().values('name')).toList()
+        return self.get_properties_at([name], time)[name]
 
-        
-        # [{'a': ..., 'b': ...}]
-        
 
-        if len(l) == 0:
-            return l
-        else:
-            return [tuple(d.values()) for d in l]
+    @instrumented
+    def get_properties_at(self, names: list, time: float) -> dict:
+        """
+        Return the properties of every component in :param names: at :param time:.
 
+        The histories of the components not in self.property_cache are queried in a single round trip and cached, and the values at
+        :param time: are then found client-side by binary search (see PropertyHistory). Writes made through other GraphInterface
+        instances are not seen until clear_local_state is called.
 
-    def export_graph(self, file_name: str) -> None:
+        :param names: Values of the 'name' property of the components.
+        :type names: list[str]
+        :param time: Time to check.
+        :type time: float
+        :return: A dictionary of style {..., name: {..., key: value, ...}, ...}. Components that do not exist have no properties.
+        :rtype: dict
         """
-        Export the graph to :param file_name:.
 
-        :param file_name: A file path.
-        :type file_name: str
+        histories = self._property_histories(names)
+
+        return {name: histories[name].as_of(time) if name in histories else {} for name in names}
+
+
+    def _property_histories(self, names: list) -> dict:
+        """
+        Return the PropertyHistory of every existing component in :param names:, querying the uncached ones in one traversal.
+
+        :param names: Values of the 'name' property of the components.
+        :type names: list[str]
+        :return: A dictionary of style {..., name: PropertyHistory, ...}.
+        :rtype: dict
         """
 
+        if self.memory_graph is not None:
+            ids = {name: self.memory_graph.vertex_id('component', name) for name in names}
+
+            return {name: self.memory_graph.property_histories.get(vertex_id, PropertyHistory()) for (name, vertex_id) in ids.items() if vertex_id is not None}
+
+        histories, missing = {}, []
+
+        for name in names:
+
+            history = self.property_cache.get(name)
+
+            if history is None:
+                missing.append(name)
+            else:
+                histories[name] = history
+
+        if len(missing) == 0:
+            return histories
+
+        try:
+            l = self.g.V().has('component', 'name', P.within(list(set(missing)))).project('name', 'changes').by('name').by(
+                __.out('had_property').project('key', 'value', 'time').by('key').by('value').by('time').fold()
+            ).toList()
+
+        except GremlinServerError as e:
+            log_to_file(message=f"Failed to get the properties of {len(missing)} components. {e}", urgency=2)
+            return histories
+
+        for d in l:
+
+            history = PropertyHistory([(change['key'], change['value'], change['time']) for change in d['changes']])
+
+            self.property_cache.put(d['name'], history)
+
+            histories[d['name']] = history
+
+        return histories
+
+
+    def _submit_script(self, script: str, bindings: dict) -> list:
+        """
+        Submit a parameterized Gremlin script and return its results.
+
+        :param script: The script, referring to the keys of :param bindings: as variables.
+        :type script: str
+        :param bindings: The values of the variables of :param script:.
+        :type bindings: dict
+        :return: The list of results.
+        :rtype: list
+        """
+
+        if self._script_client is None:
+            url, traversal_source, pool_size = self._script_client_args
+            self._script_client = client.Client(url, traversal_source, pool_size=pool_size)
+
+        if self.instrumentation is None:
+            return self._script_client.submit(script, bindings).all().result()
+
+        operation = self.instrumentation.current_operation()
+
+        now = datetime.now()
+
+        try:
+            results = self._script_client.submit(script, bindings).all().result()
+
+        except Exception:
+            self.instrumentation.record_submit(operation, (datetime.now() - now).total_seconds(), 0, True)
+            raise
+
+        self.instrumentation.record_submit(operation, (datetime.now() - now).total_seconds(), len(results), False)
+
+        return results
+
+
+    @instrumented
+    def connected_at(self, name1: str, name2: str, time: float) -> bool:
+        """
+        Return whether the components with names :param name1: and :param name2: were connected at :param time:.
+
+        Answered without the Gremlin server if self.interval_index is enabled or the 'memory' backend is used. Otherwise, a single
+        bytecode traversal or CONNECTED_AT_SCRIPT is submitted, depending on self.query_mode.
+
+        :param name1: Value of the 'name' property of the first component.
+        :type name1: str
+        :param name2: Value of the 'name' property of the second component.
+        :type name2: str
+        :param time: Time to check.
+        :type time: float
+        :return: Whether the components were connected, or None if the query failed.
+        :rtype: bool
+        """
+
+        return self.connected_at_batch([(name1, name2, time)])[0]
+
+
+    @instrumented
+    def connected_at_batch(self, queries: list) -> list:
+        """
+        Return connected_at(name1, name2, time) for every (name1, name2, time) in :param queries:, in a single request.
+
+        :param queries: A list of (name1, name2, time) 3-tuples.
+        :type queries: list[tuple[str, str, float]]
+        :return: A list of booleans in the order of :param queries:, or of None if the query failed.
+        :rtype: list[bool]
+        """
+
+        if len(queries) == 0:
+            return []
+
+        index = self._connection_index()
+
+        if index is not None:
+            return [index.is_connected(name1, name2, time) for (name1, name2, time) in queries]
+
+        try:
+            if self.connection_storage == 'changelog':
+                return [any(connection_log.state_at(log, time) for log in logs) for (logs, (_, _, time)) in zip(self._connection_logs_batch(queries), queries)]
+
+            if self.query_mode == 'script':
+
+                if len(queries) == 1:
+                    (name1, name2, time), = queries
+                    return self._submit_script(self.CONNECTED_AT_SCRIPT, {'name1': name1, 'name2': name2, 'time': time})
+
+                return self._submit_script(self.CONNECTED_AT_BATCH_SCRIPT, {'queries': [list(q) for q in queries]})
+
+            # One count() per query, each keyed by its position, in a single traversal.
+            traversal = self.g.inject(0).project(*[f'q{i}' for i in range(len(queries))])
+
+            for (name1, name2, time) in queries:
+                traversal = traversal.by(
+                    self._vertex_traversal('component', name1).bothE('connection').has('start', P.lte(time)).has('end', P.gt(time)).otherV().has('component', 'name', name2).count()
+                )
+
+            counts = traversal.next()
+
+            return [counts[f'q{i}'] > 0 for i in range(len(queries))]
+
+        except GremlinServerError as e:
+            log_to_file(message=f"Failed to check {len(queries)} connections in {self.query_mode} mode. {e}", urgency=2)
+
+            return [None] * len(queries)
+
+
+    def _connection_logs_batch(self, queries: list) -> list:
+        """
+        Return the change logs of the edges between name1 and name2 for every (name1, name2, ...) in :param queries:, in a single request.
+
+        :param queries: A list of tuples starting with the names of two components.
+        :type queries: list[tuple]
+        :return: A list of lists of change logs (empty if the pair was never connected) in the order of :param queries:.
+        :rtype: list[list[str]]
+        """
+
+        if self.query_mode == 'script':
+            return self._submit_script(self.CONNECTION_LOG_BATCH_SCRIPT, {'queries': [[q[0], q[1]] for q in queries]})
+
+        traversal = self.g.inject(0).project(*[f'q{i}' for i in range(len(queries))])
+
+        for (name1, name2, *_) in queries:
+            traversal = traversal.by(
+                self._vertex_traversal('component', name1).bothE('connection').where(__.otherV().has('component', 'name', name2)).values('connection_log').fold()
+            )
+
+        logs = traversal.next()
+
+        return [logs[f'q{i}'] for i in range(len(queries))]
+
+    
+    # This will put it in V-E-V-E-V-...-V form as a list per path.
+    @instrumented
+    def find_paths(self, name1: str, name2: str, avoid_type: str, time: float, max_depth: int=None, limit: int=None, shortest_first: bool=False, timeout: float=None) -> list:
+        """
+        Given two vertices labelled with <name1> and <name2>, return the paths that connect the vertices by edges that were active at <time> as a list.
+
+        Avoid vertices of type avoid_type.
+
+        :param name1: Name parameter of the component vertex to traverse from.
+        :type name1: str
+        :param name2: Name parameter of the component vertex to terminate the traversal.
+        :type name2: str
+        :param avoid_type: Type of the component vertex to avoid when traversing.
+        :type avoid_type: str
+        :param time: Time to check the edges at.
+        :type time: float
+        :param max_depth: The maximum number of edges of a path, so that the server stops extending paths after :param max_depth: steps, defaults to None (unbounded)
+        :type max_depth: int, optional
+        :param limit: The maximum number of paths to return, so that the server stops once it has found them, defaults to None (all)
+        :type limit: int, optional
+        :param shortest_first: Whether to return the paths in order of length, found depth by depth (see iter_paths), defaults to False
+        :type shortest_first: bool, optional
+        :param timeout: The number of seconds after which the server aborts the query (its evaluationTimeout), defaults to None (the server's default)
+        :type timeout: float, optional
+        :return: A list of paths of vertices and edges going from vertex with name :param name1: to vertex with name :param name2:, or None if the query failed or timed out.
+        :rtype: list
+        """
+        
+        try:
+            id1, id2 = self.get_vertex_id('component', name1), self.get_vertex_id('component', name2)
+
+            if id1 is None or id2 is None:
+                return []
+
+            avoid_type_id = self._avoid_type_id(avoid_type)
+
+            if self.memory_graph is not None:
+                return list(islice(self.memory_graph.iter_paths(id1, id2, avoid_type_id, time, max_depth), limit))
+
+            if shortest_first:
+                return list(self._iter_paths_by_depth(id1, id2, avoid_type_id, time, max_depth, limit, timeout))
+
+            source = self._path_source(timeout)
+
+            if self.connection_storage == 'changelog':
+                return self._find_paths_changelog(id1, id2, avoid_type_id, time, max_depth, limit, source)
+
+            traversal = self._find_paths_traversal(id1, id2, avoid_type_id, time, source, max_depth)
+
+            if limit is not None:
+                traversal = traversal.limit(limit)
+
+            return traversal.toList()
+        except GremlinServerError as e:
+            log_to_file(message=f"Could not find paths between {name1} and {name2} at time {time} avoiding {avoid_type}. {e}", urgency=2)
+
+
+    @instrumented
+    def find_paths_batch(self, queries: list, batch_size: int=DEFAULT_PATH_BATCH_SIZE, limit: int=None) -> dict:
+        """
+        Return find_paths(name1, name2, avoid_type, time, limit=:param limit:) for every (name1, name2, avoid_type, time) in :param queries:, in a few requests.
+
+        The vertex IDs of all the queries are looked up in one request. Then, with the 'edges' connection storage, the path traversals of
+        up to :param batch_size: queries are submitted as the by() modulators of a single inject(0).project() traversal, so n queries
+        take about n / :param batch_size: round trips. With the 'changelog' connection storage the paths of a pair of components do not
+        depend on the time, so they are queried once per (name1, name2, avoid_type) and filtered for every time. :param limit: applies to
+        every query on its own, like the limit of find_paths.
+
+        :param queries: A list of (name1, name2, avoid_type, time) 4-tuples.
+        :type queries: list[tuple[str, str, str, float]]
+        :param batch_size: The maximum number of path traversals per request, defaults to DEFAULT_PATH_BATCH_SIZE
+        :type batch_size: int, optional
+        :param limit: The maximum number of paths to return per query, defaults to None (all)
+        :type limit: int, optional
+        :return: Dictionary of style {..., (name1, name2, avoid_type, time): paths, ...} in the order of :param queries:, where paths is what find_paths returns (None if the request of the query failed).
+        :rtype: dict
+        """
+
+        queries = list(dict.fromkeys(tuple(q) for q in queries))
+
+        results = {}
+
+        try:
+            component_vertex_ids = self._vertex_ids('component', [name for q in queries for name in q[:2]])
+            type_ids = self._vertex_ids('type', [q[2] for q in queries if q[2]])
+
+        except GremlinServerError as e:
+            log_to_file(message=f"Could not look up the vertices of {len(queries)} path queries. {e}", urgency=2)
+
+            return {q: None for q in queries}
+
+        # Dictionary of style {..., query: (id1, id2, avoid_type_id, time), ...} of the queries whose components exist.
+        resolved = {}
+
+        for q in queries:
+
+            (name1, name2, avoid_type, time) = q
+
+            id1, id2 = component_vertex_ids[name1], component_vertex_ids[name2]
+
+            if id1 is None or id2 is None:
+                results[q] = []
+            else:
+                resolved[q] = (id1, id2, type_ids.get(avoid_type), time)
+
+        if self.memory_graph is not None:
+
+            for (q, args) in resolved.items():
+                results[q] = list(islice(self.memory_graph.iter_paths(*args), limit))
+
+            return {q: results[q] for q in queries}
+
+        if self.connection_storage == 'changelog':
+
+            # Dictionary of style {..., (id1, id2, avoid_type_id): [query, ...], ...}.
+            groups = {}
+
+            for (q, (id1, id2, avoid_type_id, _)) in resolved.items():
+                groups.setdefault((id1, id2, avoid_type_id), []).append(q)
+
+            groups = list(groups.items())
+
+            for i in range(0, len(groups), batch_size):
+
+                chunk = groups[i:i + batch_size]
+
+                for (group, paths) in zip(chunk, self._submit_path_batch([
+                    self._find_paths_changelog_traversal(id1, id2, avoid_type_id, source=__) for ((id1, id2, avoid_type_id), _) in chunk
+                ])):
+                    for q in group[1]:
+                        results[q] = None if paths is None else self._changelog_paths_at(paths, q[3])[:limit]
+
+            return {q: results[q] for q in queries}
+
+        resolved = list(resolved.items())
+
+        for i in range(0, len(resolved), batch_size):
+
+            chunk = resolved[i:i + batch_size]
+
+            traversals = [self._find_paths_traversal(*args, source=__) for (_, args) in chunk]
+
+            if limit is not None:
+                # Each traversal is the by() modulator of one query, so the limit is local to that query.
+                traversals = [traversal.limit(limit) for traversal in traversals]
+
+            for ((q, _), paths) in zip(chunk, self._submit_path_batch(traversals)):
+                results[q] = paths
+
+        return {q: results[q] for q in queries}
+
+
+    def _submit_path_batch(self, traversals: list) -> list:
+        """
+        Submit the anonymous path traversals :param traversals: in a single request, and return their results.
+
+        :param traversals: A list of anonymous traversals.
+        :type traversals: list[GraphTraversal]
+        :return: A list of the lists of results of :param traversals:, in order, or of None if the request failed.
+        :rtype: list[list]
+        """
+
+        traversal = self.g.inject(0).project(*[f'q{i}' for i in range(len(traversals))])
+
+        for t in traversals:
+            traversal = traversal.by(t.fold())
+
+        try:
+            results = traversal.next()
+
+        except GremlinServerError as e:
+            log_to_file(message=f"Failed to submit a batch of {len(traversals)} path queries. {e}", urgency=2)
+
+            return [None] * len(traversals)
+
+        return [results[f'q{i}'] for i in range(len(traversals))]
+
+
+    def _find_paths_traversal(self, id1, id2, avoid_type_id, time: float, source: GraphTraversalSource=None, max_depth: int=None):
+        """
+        Return the traversal that find_paths submits for the component vertices of IDs :param id1: and :param id2:.
+
+        :param id1: ID of the component vertex to traverse from.
+        :param id2: ID of the component vertex to terminate the traversal.
+        :param avoid_type_id: ID of the type vertex of the components to avoid, or None if the type does not exist.
+        :param time: Time to check the edges at.
+        :type time: float
+        :param source: The traversal source to start from, defaults to None (self.g)
+        :type source: GraphTraversalSource, optional
+        :param max_depth: The maximum number of edges of a path, defaults to None (unbounded)
+        :type max_depth: int, optional
+        :rtype: GraphTraversal
+        """
+
+        source = self.g if source is None else source
+
+        traversal = self._repeat_paths(source.V(id1), self._path_step(time, avoid_type_id), id2, max_depth)
+
+        if max_depth is not None:
+            traversal = traversal.hasId(id2)
+
+        return traversal.path()
+
+
+    def _path_step(self, time: float, avoid_type_id):
+        """
+        Return a new anonymous traversal of one step of a path: to a neighbouring component over a 'connection' edge that existed at
+        :param time:, and that is not of the type of ID :param avoid_type_id:.
+
+        :param time: Time to check the edges at, or None to step over any 'connection' edge (for the 'changelog' connection storage).
+        :type time: float
+        :param avoid_type_id: ID of the type vertex of the components to avoid, or None if the type does not exist.
+        :rtype: GraphTraversal
+        """
+
+        step = __.bothE('connection')
+
+        if time is not None:
+            step = step.has('start', P.lte(time)).has('end', P.gt(time))
+
+        step = step.otherV()
+
+        # If the type to avoid does not exist, no vertex can be of that type.
+        if avoid_type_id is not None:
+            step = step.not_(__.out('type').hasId(avoid_type_id))
+
+        return step
+
+
+    @staticmethod
+    def _repeat_paths(traversal, step, id2, max_depth: int=None):
+        """
+        Return :param traversal: extended by repeating :param step: along simple paths until the vertex of ID :param id2:, or until
+        :param max_depth: steps were taken, in which case the traversers that did not reach :param id2: are not filtered out.
+        """
+
+        if max_depth is None:
+            return traversal.repeat(step.simplePath()).until(__.hasId(id2))
+
+        return traversal.repeat(step.simplePath()).until(__.or_(__.hasId(id2), __.loops().is_(P.gte(max_depth))))
+
+
+    def _path_source(self, timeout: float=None) -> GraphTraversalSource:
+        """
+        Return self.g, with an evaluationTimeout of :param timeout: seconds if it is not None.
+        """
+
+        if timeout is None:
+            return self.g
+
+        return self.g.with_('evaluationTimeout', int(timeout * 1000))
+
+
+    def _find_paths_changelog(self, id1, id2, avoid_type_id, time: float, max_depth: int=None, limit: int=None, source: GraphTraversalSource=None) -> list:
+        """
+        find_paths for the 'changelog' connection storage.
+
+        The server cannot evaluate change logs, so it returns the simple paths over every pair that was ever connected, each with the
+        change logs of its edges, and the paths whose edges all existed at :param time: are kept.
+
+        :param id1: ID of the component vertex to traverse from.
+        :param id2: ID of the component vertex to terminate the traversal.
+        :param avoid_type_id: ID of the type vertex of the components to avoid, or None if the type does not exist.
+        :param time: Time to check the edges at.
+        :type time: float
+        :param max_depth: The maximum number of edges of a path, defaults to None (unbounded)
+        :type max_depth: int, optional
+        :param limit: The maximum number of paths to return, defaults to None (all)
+        :type limit: int, optional
+        :param source: The traversal source to start from, defaults to None (self.g)
+        :type source: GraphTraversalSource, optional
+        :rtype: list
+        """
+
+        if limit is None:
+            return self._changelog_paths_at(self._find_paths_changelog_traversal(id1, id2, avoid_type_id, source, max_depth).toList(), time)
+
+        # The paths that existed at :param time: are only known on the client, so they are pulled in pages until there are enough.
+        pages = self._pages(lambda source: self._find_paths_changelog_traversal(id1, id2, avoid_type_id, source, max_depth), self.DEFAULT_PAGE_SIZE, source)
+
+        return list(islice(chain.from_iterable(self._changelog_paths_at(page, time) for page in pages), limit))
+
+
+    def _find_paths_changelog_traversal(self, id1, id2, avoid_type_id, source: GraphTraversalSource=None, max_depth: int=None):
+        """
+        Return the traversal that _find_paths_changelog submits, starting from :param source: (self.g if None).
+
+        :rtype: GraphTraversal
+        """
+
+        source = self.g if source is None else source
+
+        traversal = self._repeat_paths(source.V(id1), self._path_step(None, avoid_type_id), id2, max_depth)
+
+        if max_depth is not None:
+            traversal = traversal.hasId(id2)
+
+        return self._with_connection_logs(traversal)
+
+
+    @staticmethod
+    def _with_connection_logs(traversal):
+        """
+        Return :param traversal: of paths ending at their last vertex projected to their path and the change logs of its edges.
+        """
+
+        return traversal.project('path', 'logs').by(__.path()).by(
+            __.path().unfold().hasLabel('connection').values('connection_log').fold()
+        )
+
+
+    @staticmethod
+    def _changelog_paths_at(results: list, time: float) -> list:
+        """
+        Return the paths of the results of a _find_paths_changelog_traversal whose edges all existed at :param time:.
+        """
+
+        return [d['path'] for d in results if all(connection_log.state_at(log, time) for log in d['logs'])]
+
+
+    def iter_paths(self, name1: str, name2: str, avoid_type: str, time: float, page_size: int=DEFAULT_PAGE_SIZE, max_depth: int=None, limit: int=None, shortest_first: bool=False, timeout: float=None):
+        """
+        Iterator version of find_paths that pulls the paths from the server in pages of :param page_size:, so that client memory is
+        bounded by a page and the first paths are available before the query is complete.
+
+        Every page re-runs the traversal with range() and the server streams each page in batches of :param page_size:, so the pages are
+        only consistent if the connections around the two components do not change during the iteration.
+
+        If :param shortest_first: is True, the paths are instead found one depth at a time, one request per depth, and yielded in order of
+        length. A caller that stops iterating after the first path, or after k paths, then never makes the server enumerate the longer
+        paths at all.
+
+        :param name1: Name parameter of the component vertex to traverse from.
+        :type name1: str
+        :param name2: Name parameter of the component vertex to terminate the traversal.
+        :type name2: str
+        :param avoid_type: Type of the component vertex to avoid when traversing.
+        :type avoid_type: str
+        :param time: Time to check the edges at.
+        :type time: float
+        :param page_size: The number of paths per page, defaults to DEFAULT_PAGE_SIZE
+        :type page_size: int, optional
+        :param max_depth: See find_paths, defaults to None
+        :type max_depth: int, optional
+        :param limit: See find_paths, defaults to None
+        :type limit: int, optional
+        :param shortest_first: Whether to yield the paths in order of length, defaults to False
+        :type shortest_first: bool, optional
+        :param timeout: The number of seconds after which the server aborts each request, defaults to None (the server's default)
+        :type timeout: float, optional
+        :return: A generator of the paths returned by find_paths.
+        :rtype: Generator[Path, None, None]
+        """
+
+        try:
+            id1, id2 = self.get_vertex_id('component', name1), self.get_vertex_id('component', name2)
+
+            if id1 is None or id2 is None:
+                return
+
+            avoid_type_id = self._avoid_type_id(avoid_type)
+
+            if self.memory_graph is not None:
+                yield from islice(self.memory_graph.iter_paths(id1, id2, avoid_type_id, time, max_depth), limit)
+
+            elif shortest_first:
+                yield from self._iter_paths_by_depth(id1, id2, avoid_type_id, time, max_depth, limit, timeout)
+
+            elif self.connection_storage == 'changelog':
+                pages = self._pages(lambda source: self._find_paths_changelog_traversal(id1, id2, avoid_type_id, source, max_depth), page_size, self._path_source(timeout))
+
+                yield from islice(chain.from_iterable(self._changelog_paths_at(page, time) for page in pages), limit)
+
+            else:
+                pages = self._pages(lambda source: self._find_paths_traversal(id1, id2, avoid_type_id, time, source, max_depth), page_size, self._path_source(timeout))
+
+                yield from islice(chain.from_iterable(pages), limit)
+
+        except GremlinServerError as e:
+            log_to_file(message=f"Could not find paths between {name1} and {name2} at time {time} avoiding {avoid_type}. {e}", urgency=2)
+
+
+    def _iter_paths_by_depth(self, id1, id2, avoid_type_id, time: float, max_depth: int=None, limit: int=None, timeout: float=None):
+        """
+        Yield the paths of find_paths in order of length, with one request per depth.
+
+        The request for depth d returns the paths of exactly d edges (the traversal of find_paths bounded to d steps, keeping the paths
+        of length d) and whether any simple path of d edges does not end at :param id2:. If none does, no longer path can reach it, and
+        the iteration ends; it also ends after :param max_depth: or once :param limit: paths were yielded.
+
+        :param id1: ID of the component vertex to traverse from.
+        :param id2: ID of the component vertex to terminate the traversal.
+        :param avoid_type_id: ID of the type vertex of the components to avoid, or None if the type does not exist.
+        :param time: Time to check the edges at.
+        :type time: float
+        :param max_depth: The maximum number of edges of a path, defaults to None (unbounded)
+        :type max_depth: int, optional
+        :param limit: The maximum number of paths to yield, defaults to None (all)
+        :type limit: int, optional
+        :param timeout: The number of seconds after which the server aborts each request, defaults to None (the server's default)
+        :type timeout: float, optional
+        :rtype: Generator[Path, None, None]
+        """
+
+        source = self._path_source(timeout)
+
+        changelog = self.connection_storage == 'changelog'
+
+        # The change logs are evaluated on the client, so the server steps over every 'connection' edge.
+        step_time = None if changelog else time
+
+        found, depth = 0, 0
+
+        while (max_depth is None or depth < max_depth) and (limit is None or found < limit):
+
+            depth += 1
+
+            paths = self._repeat_paths(__.V(id1), self._path_step(step_time, avoid_type_id), id2, depth).hasId(id2).where(
+                __.path().count(Scope.local).is_(2 * depth + 1)
+            )
+
+            if changelog:
+                paths = self._with_connection_logs(paths)
+            else:
+                paths = paths.path()
+
+                if limit is not None:
+                    paths = paths.limit(limit - found)
+
+            frontier = self._repeat_paths(__.V(id1), self._path_step(step_time, avoid_type_id), id2, depth).not_(__.hasId(id2)).limit(1).count()
+
+            result = source.inject(0).project('paths', 'frontier').by(paths.fold()).by(frontier).next()
+
+            page = self._changelog_paths_at(result['paths'], time) if changelog else result['paths']
+
+            for path in page[:None if limit is None else limit - found]:
+                found += 1
+                yield path
+
+            if result['frontier'] == 0:
+                return
+
+
+    def _pages(self, make_traversal, page_size: int, source: GraphTraversalSource=None):
+        """
+        Submit the traversal returned by :param make_traversal: one range() of :param page_size: results at a time, and yield each page.
+
+        :param make_traversal: A function taking the traversal source to start from and returning the traversal.
+        :type make_traversal: Callable[[GraphTraversalSource], GraphTraversal]
+        :param page_size: The number of results per page.
+        :type page_size: int
+        :param source: The traversal source to configure and pass to :param make_traversal:, defaults to None (self.g)
+        :type source: GraphTraversalSource, optional
+        :return: A generator of lists of results.
+        :rtype: Generator[list, None, None]
+        """
+
+        # The server sends each page back in messages of at most :param page_size: results.
+        source = (self.g if source is None else source).with_('batchSize', page_size)
+
+        offset = 0
+
+        while True:
+
+            page = make_traversal(source).range(offset, offset + page_size).toList()
+
+            if len(page) > 0:
+                yield page
+
+            if len(page) < page_size:
+                return
+
+            offset += page_size
+
+
+    @instrumented
+    def get_connected_vertices_at_time(self, time: float) -> list:
+        """Given a time, return the name properties of the component vertices connected by an edge that existed at this time and format it as a list[tuple[str, str]]
+
+        If self.interval_index is enabled or the 'memory' backend is used, the graph is not queried.
+
+        # TODO: this Gremlin query returns a really ugly thing, but it works. Fix, maybe?
+
+        :param time: Time to check
+        :type time: float
+        :return: List of 2-tuples containing the names of the pairs of vertices connected at :param time:.
+        :rtype: list[tuple[str, str]]
+        """
+
+        if self._connection_index() is not None:
+            return self._connection_index().pairs_at(time)
+
+        if self.connection_storage == 'changelog':
+            return [pair for (pair, log) in self._connection_logs() if connection_log.state_at(log, time)]
+
+        # l is a list containing at most one elemnt, which is a large dictionary of vertex1: vertex2 entries.
+        l = self._connected_vertices_traversal(time).toList()
+
+        
+        # [{'a': ..., 'b': ...}]
+        
+
+        if len(l) == 0:
+            return l
+        else:
+            return [tuple(d.values()) for d in l]
+
+
+    @instrumented
+    def get_change_points(self) -> list:
+        """
+        Return the times at which any connection started or ended, sorted and without duplicates.
+
+        Read from self.interval_index or the 'memory' backend if possible, otherwise queried from the graph.
+
+        :rtype: list[float]
+        """
+
+        index = self._connection_index()
+
+        if index is not None:
+            times = [start for (_, start, _) in index.intervals] + [end for (_, _, end) in index.intervals]
+        elif self.connection_storage == 'changelog':
+            times = [time for (_, log) in self._connection_logs() for (time, _) in connection_log.entries(log)]
+        else:
+            times = self.g.E().hasLabel('connection').union(__.values('start'), __.values('end')).dedup().toList()
+
+        return sorted(set(times) - {self.EXISTING_CONNECTION_END_PLACEHOLDER})
+
+
+    @instrumented
+    def get_local_graph_at_time(self, time: float) -> LocalGraph:
+        """
+        Return a LocalGraph of the connections that existed at :param time:.
+
+        Snapshots are cached per change-point epoch in self.snapshot_cache, so all times between the same two connection changes
+        share one LocalGraph. The returned LocalGraph must therefore not be modified; use move_local_graph_to_time for a LocalGraph
+        that is updated in place.
+
+        :param time: Time to take the snapshot at.
+        :type time: float
+        :rtype: LocalGraph
+        """
+
+        if self.snapshot_cache.change_points is None:
+            self.snapshot_cache.set_change_points(self.get_change_points())
+            self.reachability_index.clear()
+
+        local_graph = self.snapshot_cache.get(time)
+
+        if local_graph is None:
+            # Cached snapshots hold interned component IDs only, and names are decoded when a caller asks for them (see LocalGraph.names).
+            local_graph = LocalGraph()
+            local_graph.create_from_connections_undirected(component_ids.encode_pairs(self.get_connected_vertices_at_time(time)), time=time, interned=True)
+
+            self.snapshot_cache.put(time, local_graph)
+
+        return local_graph
+
+
+    def iter_connected_vertices_at_time(self, time: float, page_size: int=DEFAULT_PAGE_SIZE, interned: bool=False):
+        """
+        Iterator version of get_connected_vertices_at_time that pulls the pairs from the server in pages of :param page_size: (see
+        iter_paths), for full-array queries whose result should not be materialized at once.
+
+        The pairs can be passed directly to LocalGraph.create_from_connections_undirected, with interned=:param interned:.
+
+        :param time: Time to check
+        :type time: float
+        :param page_size: The number of pairs per page, defaults to DEFAULT_PAGE_SIZE
+        :type page_size: int, optional
+        :param interned: Whether to yield the pairs as component IDs (see component_ids.py) instead of names, defaults to False
+        :type interned: bool, optional
+        :return: A generator of the pairs returned by get_connected_vertices_at_time.
+        :rtype: Generator[tuple[str, str], None, None] or Generator[tuple[int, int], None, None]
+        """
+
+        encode = component_ids.encode
+
+        try:
+            if self._connection_index() is not None:
+                pages = [self._connection_index().pairs_at(time)]
+
+            elif self.connection_storage == 'changelog':
+                pages = (
+                    [(d['a'], d['b']) for d in page if connection_log.state_at(d['log'], time)] for page in self._pages(self._connection_logs_traversal, page_size)
+                )
+
+            else:
+                pages = ([(d['a'], d['b']) for d in page] for page in self._pages(lambda source: self._connected_vertices_traversal(time, source), page_size))
+
+            for page in pages:
+                if interned:
+                    yield from ((encode(a), encode(b)) for (a, b) in page)
+                else:
+                    yield from page
+
+        except GremlinServerError as e:
+            log_to_file(message=f"Failed to get the connections at time {time}. {e}", urgency=2)
+
+
+    @instrumented
+    def get_local_graph_over(self, time1: float, time2: float) -> LocalGraph:
+        """
+        Return a LocalGraph of every connection that existed between :param time1: and :param time2:, with the types of the
+        components and the interval of every connection (see LocalGraph.create_from_intervals). Its find_shortest_paths accepts
+        avoid_types and any time in [:param time1:, :param time2:], so find_paths queries over that range can be answered locally.
+
+        :param time1: Start of the time range.
+        :type time1: float
+        :param time2: End of the time range.
+        :type time2: float
+        :rtype: LocalGraph
+        """
+
+        local_graph = LocalGraph()
+
+        try:
+            local_graph.create_from_intervals(self._intervals_overlapping(time1, time2), vertex_types=self.get_component_types())
+
+        except GremlinServerError as e:
+            log_to_file(message=f"Failed to make local graph of the connections between times {time1} and {time2}. {e}", urgency=2)
+
+        return local_graph
+
+
+    @instrumented
+    def get_component_types(self) -> dict:
+        """
+        Return the type of every component that has one, from the 'type' edges. If a component has several types, one of them is returned.
+
+        :return: Dictionary of style {..., name: type, ...}.
+        :rtype: dict
+        """
+
+        if self.memory_graph is not None:
+            return {
+                self.memory_graph.vertices[component_id][1]: self.memory_graph.vertices[min(type_ids)][1]
+                for (component_id, type_ids) in self.memory_graph.vertex_types.items() if len(type_ids) > 0
+            }
+
+        l = self.g.V().hasLabel('component').where(__.out('type')).project('name', 'type').by('name').by(__.out('type').values('name')).toList()
+
+        return {d['name']: d['type'] for d in l}
+
+
+    def _components_at(self, time: float):
+        """
+        Return the connected components at :param time: from self.reachability_index, labeling the snapshot of its epoch if needed.
+        """
+
+        local_graph = self.get_local_graph_at_time(time)
+
+        epoch = self.snapshot_cache.epoch_of(time)
+
+        components = self.reachability_index.get(epoch)
+
+        if components is None:
+            components = self.reachability_index.build(epoch, local_graph)
+
+        return components
+
+
+    @instrumented
+    def reaches(self, name: str, target: str, time: float) -> bool:
+        """
+        Return whether the component with name :param name: was connected to :param target: through any chain of connections at
+        :param time:, e.g. whether an antenna reached the correlator. O(1) once the epoch of :param time: is labeled.
+
+        :param name: Value of the 'name' property of the first component.
+        :type name: str
+        :param target: Value of the 'name' property of the second component.
+        :type target: str
+        :param time: Time to check.
+        :type time: float
+        :rtype: bool
+        """
+
+        if name == target:
+            return True
+
+        labels = self._components_at(time).labels
+
+        label = labels.get(component_ids.lookup(name))
+
+        return label is not None and label == labels.get(component_ids.lookup(target))
+
+
+    @instrumented
+    def chain_of(self, name: str, time: float, type_: str=None, end: str=CORRELATOR) -> list:
+        """
+        Return the components connected to the component with name :param name: through any chain of connections at :param time:,
+        e.g. the ADC inputs an antenna lands on with :param type_: 'ADC'.
+
+        Every signal chain ends at the same correlator input, so the search includes :param end: when it reaches it but does not go
+        through it; otherwise the chain of one antenna would be the whole connected array.
+
+        :param name: Value of the 'name' property of the component.
+        :type name: str
+        :param time: Time to check.
+        :type time: float
+        :param type_: Only return the components of this type (the type prefix of their names), defaults to None (all components)
+        :type type_: str, optional
+        :param end: Value of the 'name' property of the component the chains end at, defaults to hirax.CORRELATOR. None to return the whole connected component.
+        :type end: str, optional
+        :return: The names of the components, including :param name: itself if it matches :param type_:.
+        :rtype: list[str]
+        """
+
+        components = self._components_at(time)
+
+        component_id = component_ids.lookup(name)
+
+        label = components.labels.get(component_id)
+
+        if label is None:
+            # The component has no connections at :param time:.
+            return [name] if type_ is None or component_ids.type_of(component_id) == type_ else []
+
+        if end is None or name == end or components.labels.get(component_ids.lookup(end)) != label:
+            # The chain does not reach :param end:, so it is the whole connected component.
+            chain = components.members[label]
+
+        else:
+            chain = self._chain_before(self.get_local_graph_at_time(time), name, end)
+
+        # The chain is of component IDs, which are only decoded once filtered.
+        return [component_ids.decode(member) for member in chain if type_ is None or component_ids.type_of(member) == type_]
+
+
+    @staticmethod
+    def _chain_before(local_graph: LocalGraph, name: str, end: str) -> list:
+        """
+        Return the component IDs of the vertices of :param local_graph: reachable from :param name: without going through :param end:,
+        and of :param end: itself, by breadth-first search. Both must be vertices of :param local_graph:.
+        """
+
+        name_to_ind = local_graph.vertex_name_to_ind
+
+        start, stop = name_to_ind[name], name_to_ind[end]
+
+        seen = {start, stop}
+
+        frontier = [start]
+
+        while len(frontier) > 0:
+
+            next_frontier = []
+
+            for index in frontier:
+                for neighbour in local_graph.graph.neighbors(index):
+                    if neighbour not in seen:
+                        seen.add(neighbour)
+                        next_frontier.append(neighbour)
+
+            frontier = next_frontier
+
+        return [local_graph.vertex_ids[index] for index in sorted(seen)]
+
+
+    @instrumented
+    def unreachable_at(self, target: str, time: float, type_: str='ANT') -> list:
+        """
+        Return every component of type :param type_: (from the 'type' edges) that was not connected to :param target: at :param time:,
+        e.g. all antennas disconnected from the correlator.
+
+        :param target: Value of the 'name' property of the component to reach.
+        :type target: str
+        :param time: Time to check.
+        :type time: float
+        :param type_: The type of the components to report, defaults to 'ANT'
+        :type type_: str, optional
+        :return: The sorted names of the components.
+        :rtype: list[str]
+        """
+
+        labels = self._components_at(time).labels
+
+        label = labels.get(component_ids.lookup(target))
+
+        if self.reachability_index.component_types is None:
+            self.reachability_index.component_types = self.get_component_types()
+
+        lookup = component_ids.lookup
+
+        return sorted(name for (name, t) in self.reachability_index.component_types.items() if t == type_ and (label is None or labels.get(lookup(name)) != label))
+
+
+    def _connected_vertices_traversal(self, time: float, source: GraphTraversalSource=None):
+        """
+        Return the traversal that get_connected_vertices_at_time submits.
+
+        :param time: Time to check
+        :type time: float
+        :param source: The traversal source to start from, defaults to None (self.g)
+        :type source: GraphTraversalSource, optional
+        :rtype: GraphTraversal
+        """
+
+        source = self.g if source is None else source
+
+        return source.E().has('start', P.lte(time)).has('end', P.gt(time)).project('a', 'b').by(__.inV().values('name')).by(__.outV().values('name'))
+
+
+    @instrumented
+    def get_connection_deltas(self, time1: float, time2: float) -> tuple:
+        """
+        Return the connections that differ between :param time1: and :param time2:. :param time2: may be before :param time1:.
+
+        Read from self.interval_index or the 'memory' backend if possible, otherwise only the 'connection' edges starting or ending between the two
+        times are queried from the graph.
+
+        :param time1: Time to go from.
+        :type time1: float
+        :param time2: Time to go to.
+        :type time2: float
+        :return: A 2-tuple (added, removed) of lists of pairs connected at :param time2: but not :param time1:, and vice versa.
+        :rtype: tuple[list[tuple[str, str]], list[tuple[str, str]]]
+        """
+
+        if self._connection_index() is not None:
+            return self._connection_index().deltas(time1, time2)
+
+        if self.connection_storage == 'changelog':
+            return IntervalIndex.classify_deltas(self._changelog_intervals(), time1, time2)
+
+        low, high = min(time1, time2), max(time1, time2)
+
+        # Same order of the pair as get_connected_vertices_at_time.
+        l = self.g.E().hasLabel('connection').or_(
+            __.has('start', P.gt(low)).has('start', P.lte(high)),
+            __.has('end', P.gt(low)).has('end', P.lte(high))
+        ).project('a', 'b', 'start', 'end').by(__.inV().values('name')).by(__.outV().values('name')).by('start').by('end').toList()
+
+        return IntervalIndex.classify_deltas([((d['a'], d['b']), d['start'], d['end']) for d in l], time1, time2)
+
+
+    def sweep_connections(self, time1: float, time2: float, local_graph: LocalGraph=None):
+        """
+        Yield the connections that changed between :param time1: and :param time2:, in order of time.
+
+        All connection intervals overlapping [:param time1:, :param time2:] are read once (from self.interval_index, the 'memory'
+        backend, or a single query), and replayed client-side with IntervalIndex.sweep. Unlike calling get_connected_vertices_at_time
+        at every sample time, only the changes are returned.
+
+        Example:
+
+            for (time, added, removed) in gi.sweep_connections(0, 100, local_graph=lg):
+                print(time, len(lg.find_shortest_paths('ANT000001', CORRELATOR)))
+
+        :param time1: Time to start at.
+        :type time1: float
+        :param time2: Time to stop at. Must not be before :param time1:.
+        :type time2: float
+        :param local_graph: A LocalGraph to keep at the connections of the yielded time: it is rebuilt at :param time1:, then updated in place with LocalGraph.apply_deltas before each item is yielded, defaults to None
+        :type local_graph: LocalGraph, optional
+        :return: A generator of (time, added, removed) 3-tuples. The first is (:param time1:, pairs connected at :param time1:, []).
+        :rtype: Generator[tuple[float, list[tuple[str, str]], list[tuple[str, str]]], None, None]
+        """
+
+        try:
+            intervals = self._intervals_overlapping(time1, time2)
+
+        except GremlinServerError as e:
+            log_to_file(message=f"Failed to get the connections between times {time1} and {time2}. {e}", urgency=2)
+            return
+
+        for (time, added, removed) in IntervalIndex.sweep(intervals, time1, time2):
+
+            if local_graph is not None:
+                if time == time1:
+                    local_graph.create_from_connections_undirected(added, time=time)
+                else:
+                    local_graph.apply_deltas(added=added, removed=removed)
+                    local_graph.time = time
+
+            yield time, added, removed
+
+
+    def _intervals_overlapping(self, time1: float, time2: float) -> list:
+        """
+        Return the intervals of the connections overlapping [:param time1:, :param time2:].
+
+        :return: A list of (pair, start, end) 3-tuples, with the pair in the order of get_connected_vertices_at_time.
+        :rtype: list[tuple[tuple[str, str], float, float]]
+        """
+
+        if self._connection_index() is not None:
+            return self._connection_index().overlapping(time1, time2)
+
+        if self.connection_storage == 'changelog':
+            return [(pair, start, end) for (pair, start, end) in self._changelog_intervals() if start <= time2 and end > time1]
+
+        # Same order of the pair as get_connected_vertices_at_time.
+        l = self.g.E().hasLabel('connection').has('start', P.lte(time2)).has('end', P.gt(time1)).project('a', 'b', 'start', 'end').by(
+            __.inV().values('name')
+        ).by(__.outV().values('name')).by('start').by('end').toList()
+
+        return [((d['a'], d['b']), d['start'], d['end']) for d in l]
+
+
+    @instrumented
+    def move_local_graph_to_time(self, time: float) -> LocalGraph:
+        """
+        Bring self.local_graph to the connections that existed at :param time:, forwards or backwards in time.
+
+        If self.local_graph is a snapshot of a known time, only the connections that changed in between are applied to it in place
+        (see LocalGraph.apply_deltas). Otherwise it is built from scratch.
+
+        :param time: Time to move self.local_graph to.
+        :type time: float
+        :return: self.local_graph
+        :rtype: LocalGraph
+        """
+
+        if self.local_graph.time is None:
+            self.local_graph.create_from_connections_undirected(self.get_connected_vertices_at_time(time), time=time)
+
+        elif self.local_graph.time != time:
+            added, removed = self.get_connection_deltas(self.local_graph.time, time)
+
+            self.local_graph.apply_deltas(added=added, removed=removed)
+
+            self.local_graph.time = time
+
+        return self.local_graph
+
+
+    @classmethod
+    def connection_events_to_intervals(cls, connections: list) -> list:
+        """
+        Collapse a list of connection events into the [start, end) intervals that set_connection would have stored as 'connection' edges.
+
+        Events are replayed per (unordered) pair of components in order of time: a connection starts an interval if the pair is not
+        already connected, a disconnection ends the open interval if one exists. Intervals that are never closed get an end of
+        self.EXISTING_CONNECTION_END_PLACEHOLDER.
+
+        :param connections: A list of (name1, name2, time, connection) 4-tuples, with the same meaning as the parameters of set_connection.
+        :type connections: list[tuple[str, str, float, bool]]
+        :return: A list of (name1, name2, start, end) 4-tuples, where name1 and name2 are in the order of the event that started the interval.
+        :rtype: list[tuple[str, str, float, float]]
+        """
+
+        # Dictionary of style {..., (name1, name2): [name1, name2, start], ...} of currently open intervals, keyed by the sorted pair.
+        open_intervals = {}
+
+        intervals = []
+
+        # sorted() is stable, so events at the same time are replayed in the order they were given.
+        for (name1, name2, time, connection) in sorted(connections, key=lambda event: event[2]):
+
+            key = (name1, name2) if name1 <= name2 else (name2, name1)
+
+            if connection and key not in open_intervals:
+                open_intervals[key] = [name1, name2, time]
+
+            elif not connection and key in open_intervals:
+                a, b, start = open_intervals.pop(key)
+                intervals.append((a, b, start, time))
+
+        for (a, b, start) in open_intervals.values():
+            intervals.append((a, b, start, cls.EXISTING_CONNECTION_END_PLACEHOLDER))
+
+        return intervals
+
+
+    @instrumented
+    def bulk_load(self, components: list, connections: list, batch_size: int=DEFAULT_BULK_BATCH_SIZE) -> list:
+        """
+        Add many component vertices, their type edges and their 'connection' edges in a small number of chunked traversals,
+        instead of the several round trips per component that add_component, set_type and set_connection need.
+
+        Components whose name already exists in the graph are skipped. The type vertices referenced in :param components: must
+        already exist (see add_type). The connection events are collapsed into intervals client-side
+        (see connection_events_to_intervals), so this is meant for loading new signal chains, not for altering existing connections.
+
+        :param components: A list of (name, type_) 2-tuples of the components to add. type_ may be None to not set a type.
+        :type components: list[tuple[str, str]]
+        :param connections: A list of (name1, name2, time, connection) 4-tuples, with the same meaning as the parameters of set_connection. The names may refer to components that already exist in the graph.
+        :type connections: list[tuple[str, str, float, bool]]
+        :param batch_size: The maximum number of components or edges written per traversal, defaults to DEFAULT_BULK_BATCH_SIZE
+        :type batch_size: int, optional
+        :return: A list of dictionaries, one per traversal, of the format {'kind': 'components' or 'connections', 'size': ..., 'seconds': ..., 'error': ...},
+            where 'error' is None if the traversal succeeded and the message of the server error otherwise (the chunk is then not loaded).
+        :rtype: list[dict]
+        """
+
+        if self.memory_graph is not None:
+            return self._bulk_load_memory(components, connections)
+
+        stats = []
+
+        for i in range(0, len(components), batch_size):
+
+            chunk = components[i:i + batch_size]
+
+            now = datetime.now()
+
+            try:
+                existing = set(self.g.V().has('name', P.within([name for (name, _) in chunk])).values('name').toList())
+
+                adds = []
+
+                for (name, type_) in chunk:
+
+                    if name in existing:
+                        continue
+
+                    # Remember the name so that duplicates within the same chunk are skipped as well.
+                    existing.add(name)
+
+                    add = __.addV('component').property('name', name)
+
+                    if type_ is not None:
+                        add = add.sideEffect(__.addE('type').to(self._vertex_traversal('type', type_)))
+
+                    adds.append(add.project('name', 'id').by('name').by(__.id_()))
+
+                if len(adds) > 0:
+                    for d in self.g.inject(0).union(*adds).toList():
+                        self.vertex_id_cache.put(('component', d['name']), d['id'])
+                        self.missing_vertex_cache.pop(('component', d['name']))
+
+                    self.reachability_index.component_types = None
+
+            except GremlinServerError as e:
+                log_to_file(message=f"Bulk load: failed to add components {chunk[0][0]} to {chunk[-1][0]}. {e}", urgency=2)
+                stats.append({'kind': 'components', 'size': len(chunk), 'seconds': (datetime.now() - now).total_seconds(), 'error': str(e)})
+                continue
+
+            stats.append(self._log_bulk_batch(kind='components', size=len(chunk), seconds=(datetime.now() - now).total_seconds()))
+
+        intervals = self.connection_events_to_intervals(connections)
+
+        if self.connection_storage == 'changelog':
+            intervals, logs = self._intervals_to_connection_logs(intervals)
+
+        for i in range(0, len(intervals), batch_size):
+
+            chunk = intervals[i:i + batch_size]
+
+            now = datetime.now()
+
+            traversal = self.g.inject(0)
+
+            for (name1, name2, start, end) in chunk:
+
+                if self.connection_storage == 'changelog':
+                    key = (name1, name2) if name1 <= name2 else (name2, name1)
+
+                    # Only the first interval of each pair writes the edge, with the change log of all of them.
+                    if key not in logs:
+                        continue
+
+                    traversal = traversal.sideEffect(
+                        self._vertex_traversal('component', name1).coalesce(
+                            __.bothE('connection').where(__.otherV().has('component', 'name', name2)),
+                            __.addE('connection').to(self._vertex_traversal('component', name2))
+                        ).property('connection_log', logs.pop(key))
+                    )
+
+                else:
+                    traversal = traversal.sideEffect(
+                        self._vertex_traversal('component', name1).addE('connection').to(self._vertex_traversal('component', name2)).property('start', start).property('end', end)
+                    )
+
+            try:
+                traversal.iterate()
+
+            except GremlinServerError as e:
+                log_to_file(message=f"Bulk load: failed to add connections {chunk[0][:2]} to {chunk[-1][:2]}. {e}", urgency=2)
+                stats.append({'kind': 'connections', 'size': len(chunk), 'seconds': (datetime.now() - now).total_seconds(), 'error': str(e)})
+                continue
+
+            for (name1, name2, start, end) in chunk:
+
+                if self.interval_index is not None:
+                    self.interval_index.add(name2, name1, start, end)
+
+                self.snapshot_cache.record_change(start)
+                self.reachability_index.record_change(start)
+
+                if end != self.EXISTING_CONNECTION_END_PLACEHOLDER:
+                    self.snapshot_cache.record_change(end)
+                    self.reachability_index.record_change(end)
+
+            stats.append(self._log_bulk_batch(kind='connections', size=len(chunk), seconds=(datetime.now() - now).total_seconds()))
+
+        return stats
+
+
+    def _intervals_to_connection_logs(self, intervals: list) -> tuple:
+        """
+        Group the intervals returned by connection_events_to_intervals into one change log per pair of components, dropping the
+        intervals whose times cannot be stored in a change log.
+
+        :param intervals: A list of (name1, name2, start, end) 4-tuples.
+        :type intervals: list[tuple[str, str, float, float]]
+        :return: A 2-tuple of the valid intervals, and a dictionary of style {..., (name1, name2): log, ...} keyed by the sorted pair.
+        :rtype: tuple[list[tuple[str, str, float, float]], dict]
+        """
+
+        valid, by_pair = [], {}
+
+        for (name1, name2, start, end) in intervals:
+
+            if not connection_log.is_valid_time(start) or not (end == self.EXISTING_CONNECTION_END_PLACEHOLDER or connection_log.is_valid_time(end)):
+                log_to_file(message=f"Bulk load: failed to add connection between {name1} and {name2} from {start} to {end}: change logs only store whole seconds in [0, {connection_log.MAX_TIME}].", urgency=2)
+                continue
+
+            valid.append((name1, name2, start, end))
+
+            by_pair.setdefault((name1, name2) if name1 <= name2 else (name2, name1), []).append((start, end))
+
+        return valid, {key: connection_log.from_intervals(pair_intervals, self.EXISTING_CONNECTION_END_PLACEHOLDER) for (key, pair_intervals) in by_pair.items()}
+
+
+    def _bulk_load_memory(self, components: list, connections: list) -> list:
+        """
+        bulk_load for the 'memory' backend, which writes everything in a single batch.
+        """
+
+        now = datetime.now()
+
+        for (name, type_) in components:
+
+            if self.memory_graph.has_name(name):
+                continue
+
+            component_id = self.memory_graph.add_vertex('component', name)
+
+            type_id = self.memory_graph.vertex_id('type', type_) if type_ is not None else None
+
+            if type_id is not None:
+                self.memory_graph.add_type_edge(component_id, type_id)
+
+        intervals = self.connection_events_to_intervals(connections)
+
+        for (name1, name2, start, end) in intervals:
+
+            id1, id2 = self.memory_graph.vertex_id('component', name1), self.memory_graph.vertex_id('component', name2)
+
+            if id1 is None or id2 is None:
+                log_to_file(message=f"Bulk load: failed to add connection between {name1} and {name2}: no such component.", urgency=2)
+                continue
+
+            self.memory_graph.add_connection(id1, id2, start, end)
+
+        # The change points are read from the memory graph when they are next needed.
+        self.snapshot_cache.clear()
+
+        self.reachability_index.clear()
+
+        return [self._log_bulk_batch(kind='components and connections', size=len(components) + len(intervals), seconds=(datetime.now() - now).total_seconds())]
+
+
+    def _vertex_traversal(self, label: str, name: str):
+        """
+        Return an anonymous traversal starting at the vertex with label :param label: and 'name' property of :param name:,
+        by its ID if it is cached and by its name otherwise. Does not query the graph.
+
+        :param label: The label of the vertex, 'component' or 'type'.
+        :type label: str
+        :param name: The 'name' property of the vertex.
+        :type name: str
+        :return: An anonymous traversal starting at the vertex.
+        :rtype: GraphTraversal
+        """
+
+        vertex_id = self.vertex_id_cache.get((label, name))
+
+        if vertex_id is None:
+            return __.V().has(label, 'name', name)
+
+        return __.V(vertex_id)
+
+
+    @staticmethod
+    def _log_bulk_batch(kind: str, size: int, seconds: float) -> dict:
+        """
+        Log the throughput of a single bulk_load traversal and return it as a dictionary.
+
+        :param kind: What the traversal wrote, 'components' or 'connections'.
+        :type kind: str
+        :param size: The number of components or connections written.
+        :type size: int
+        :param seconds: How long the traversal took.
+        :type seconds: float
+        :return: A dictionary of the format {'kind': :param kind:, 'size': :param size:, 'seconds': :param seconds:, 'error': None}.
+        :rtype: dict
+        """
+
+        rate = size / seconds if seconds > 0 else float('inf')
+
+        log_to_file(message=f"Bulk load: wrote {size} {kind} in {seconds} seconds ({rate:.1f} per second).")
+
+        return {'kind': kind, 'size': size, 'seconds': seconds, 'error': None}
+
+
+    @instrumented
+    def reset_graph(self, labels: list=None, chunk_size: int=DEFAULT_RESET_CHUNK_SIZE, pool=None, max_retries: int=DEFAULT_RESET_MAX_RETRIES, max_backoff: float=DEFAULT_RESET_MAX_BACKOFF, progress=None) -> dict:
+        """
+        Drop the vertices with a label in :param labels: (all vertices if None) and their edges, in chunks of at most :param chunk_size:
+        vertices, each dropped in its own transactions, instead of in one transaction over the whole graph.
+
+        For each chunk, the edges of its vertices are dropped :param chunk_size: at a time first, so that no transaction grows with the
+        degree of a vertex (such as the correlator input), and then the vertices themselves. A chunk whose request fails is retried up to
+        :param max_retries: times, waiting RESET_INITIAL_BACKOFF seconds before the first retry and twice as long before each next one,
+        capped at :param max_backoff: seconds; the reset then gives up, leaving the graph partially reset.
+
+        If :param pool: is given, the IDs of the vertices are listed first, and the chunks are dropped in parallel by the workers of the
+        pool. Edges between vertices of two chunks may then be dropped by both workers, so the edge count is approximate.
+
+        :param labels: The labels of the vertices to drop, defaults to None (every vertex)
+        :type labels: list[str], optional
+        :param chunk_size: The maximum number of vertices or edges dropped per request, defaults to DEFAULT_RESET_CHUNK_SIZE
+        :type chunk_size: int, optional
+        :param pool: A GraphInterfacePool to drop the chunks in parallel with, defaults to None (drop the chunks one at a time)
+        :type pool: GraphInterfacePool, optional
+        :param max_retries: The number of times a failed chunk is retried, defaults to DEFAULT_RESET_MAX_RETRIES
+        :type max_retries: int, optional
+        :param max_backoff: The longest wait before a retry in seconds, defaults to DEFAULT_RESET_MAX_BACKOFF
+        :type max_backoff: float, optional
+        :param progress: A function called with the numbers of vertices and edges dropped so far after every chunk, defaults to None
+        :type progress: Callable[[int, int], None], optional
+        :return: A dictionary of the format {'vertices': ..., 'edges': ..., 'seconds': ..., 'complete': ...}, where 'complete' is False if the reset gave up.
+        :rtype: dict
+        """
+
+        now = datetime.now()
+
+        stats = {'vertices': 0, 'edges': 0, 'seconds': 0, 'complete': True}
+
+        log_to_file(message=f"Resetting graph: dropping vertices with labels {'any' if labels is None else labels} in chunks of {chunk_size}.", urgency=1)
+
+        if self.memory_graph is not None:
+
+            if labels is None:
+                stats['vertices'], stats['edges'] = len(self.memory_graph.vertices), len(self.memory_graph.edges)
+                self.memory_graph.clear()
+
+            else:
+                log_to_file(message=f"Cannot reset vertices with labels {labels}: not supported by the 'memory' backend.", urgency=2)
+                stats['complete'] = False
+
+        elif pool is None:
+            stats['complete'] = self._reset_chunks(labels, chunk_size, max_retries, max_backoff, stats, progress)
+
+        else:
+            stats['complete'] = self._reset_chunks_parallel(labels, chunk_size, pool, max_retries, max_backoff, stats, progress)
+
+        self.clear_local_state()
+
+        stats['seconds'] = (datetime.now() - now).total_seconds()
+
+        log_to_file(message=f"Graph reset {'complete' if stats['complete'] else 'incomplete'}: dropped {stats['vertices']} vertices and {stats['edges']} edges in {stats['seconds']} seconds.", urgency=1 if stats['complete'] else 2)
+
+        return stats
+
+
+    def _reset_chunks(self, labels: list, chunk_size: int, max_retries: int, max_backoff: float, stats: dict, progress) -> bool:
+        """
+        reset_graph without a pool: repeatedly drop the first :param chunk_size: vertices left, adding the counts to :param stats:.
+
+        :return: Whether every vertex was dropped.
+        :rtype: bool
+        """
+
+        def next_chunk() -> list:
+            traversal = self.g.V() if labels is None else self.g.V().hasLabel(*labels)
+            return traversal.limit(chunk_size).id_().toList()
+
+        try:
+            while True:
+
+                ids = self._with_backoff(next_chunk, "list the next vertices to drop", max_retries, max_backoff)
+
+                if len(ids) == 0:
+                    return True
+
+                vertices, edges = self._drop_vertices(ids, chunk_size, max_retries, max_backoff)
+
+                stats['vertices'] += vertices
+                stats['edges'] += edges
+
+                if progress is not None:
+                    progress(stats['vertices'], stats['edges'])
+
+        except GremlinServerError as e:
+            log_to_file(message=f"Giving up resetting the graph after {max_retries} retries. {e}", urgency=2)
+
+            return False
+
+
+    def _reset_chunks_parallel(self, labels: list, chunk_size: int, pool, max_retries: int, max_backoff: float, stats: dict, progress) -> bool:
+        """
+        reset_graph with a pool: list the IDs of the vertices to drop, and drop them in chunks of :param chunk_size: on the workers of :param pool:.
+
+        :return: Whether every vertex was dropped.
+        :rtype: bool
+        """
+
+        try:
+            ids = []
+
+            for page in self._pages(lambda source: (source.V() if labels is None else source.V().hasLabel(*labels)).id_(), self.DEFAULT_PAGE_SIZE):
+                ids += page
+
+        except GremlinServerError as e:
+            log_to_file(message=f"Could not list the vertices to drop. {e}", urgency=2)
+
+            return False
+
+        lock = threading.Lock()
+
+        def drop(gi: GraphInterface, chunk: list) -> tuple:
+            vertices, edges = gi._drop_vertices(chunk, chunk_size, max_retries, max_backoff)
+
+            with lock:
+                stats['vertices'] += vertices
+                stats['edges'] += edges
+
+                if progress is not None:
+                    progress(stats['vertices'], stats['edges'])
+
+            return vertices, edges
+
+        results = pool.map(drop, (ids[i:i + chunk_size] for i in range(0, len(ids), chunk_size)))
+
+        for gi in pool.interfaces:
+            gi.clear_local_state()
+
+        return all(result['error'] is None for result in results)
+
+
+    def _drop_vertices(self, ids: list, chunk_size: int, max_retries: int, max_backoff: float) -> tuple:
+        """
+        Drop the edges of the vertices of IDs :param ids: :param chunk_size: at a time, then the vertices, retrying failed requests.
+
+        :return: A 2-tuple of the numbers of vertices and edges dropped.
+        :rtype: tuple[int, int]
+        :raises GremlinServerError: If a request still fails after :param max_retries: retries.
+        """
+
+        edges = 0
+
+        while True:
+
+            # sideEffect(drop()) passes the dropped elements on, so that they can be counted. An edge between two vertices of the
+            # chunk is reached from both ends, so it is deduplicated to be counted (and to take a place in the limit) once.
+            dropped = self._with_backoff(
+                lambda: self.g.V(*ids).bothE().dedup().limit(chunk_size).sideEffect(__.drop()).count().next(), f"drop the edges of {len(ids)} vertices", max_retries, max_backoff
+            )
+
+            edges += dropped
+
+            if dropped < chunk_size:
+                break
+
+        vertices = self._with_backoff(lambda: self.g.V(*ids).sideEffect(__.drop()).count().next(), f"drop {len(ids)} vertices", max_retries, max_backoff)
+
+        return vertices, edges
+
+
+    @classmethod
+    def _with_backoff(cls, fn, description: str, max_retries: int, max_backoff: float):
+        """
+        Return fn(), retrying it up to :param max_retries: times with a capped exponential backoff if it raises a GremlinServerError.
+
+        :param fn: The function to call.
+        :type fn: Callable[[], Any]
+        :param description: What :param fn: does, for the log.
+        :type description: str
+        :raises GremlinServerError: The error of the last attempt, if every attempt failed.
+        """
+
+        backoff = cls.RESET_INITIAL_BACKOFF
+
+        for attempt in range(max_retries + 1):
+
+            try:
+                return fn()
+
+            except GremlinServerError as e:
+
+                if attempt == max_retries:
+                    raise
+
+                log_to_file(message=f"Failed to {description} (attempt {attempt + 1} of {max_retries + 1}), retrying in {min(backoff, max_backoff)} seconds. {e}", urgency=1)
+
+                sleep(min(backoff, max_backoff))
+
+                backoff *= 2
+
+
+    def close(self) -> None:
+        """
+        Close the connection to the Gremlin server.
+        """
+
+        if self.remote_connection is not None:
+            self.remote_connection.close()
+
+        if self._script_client is not None:
+            self._script_client.close()
+
+
+    @instrumented
+    def export_graph(self, file_name: str) -> None:
+        """
+        Export the graph to :param file_name:.
+
+        :param file_name: A file path.
+        :type file_name: str
+        """
+
+        if self.memory_graph is not None:
+            log_to_file(message=f"Cannot export graph to {file_name}: not supported by the 'memory' backend.", urgency=2)
+            return
+
         log_to_file(message=f"Exporting graph to {file_name}.")
 
         try:
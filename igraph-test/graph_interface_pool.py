@@ -0,0 +1,192 @@
+"""
+graph_interface_pool.py
+
+Contains the GraphInterfacePool class, which holds several GraphInterface instances, each with its own connection to the Gremlin server,
+and runs independent work on them in parallel threads.
+
+Anatoly Zavyalov, 2021
+"""
+
+import queue
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from log_to_file import log_to_file
+
+from graph_interface import GraphInterface
+
+
+class GraphInterfacePool():
+    """
+    A pool of GraphInterface instances used by a thread pool, one GraphInterface per worker.
+
+    Work is submitted through map(), which blocks once :ivar max_pending: items are waiting or running (back-pressure), so that
+    items can be streamed from a generator without being materialized. Every item reports its own result or error.
+
+    :ivar interfaces: The GraphInterface instances of the pool. interfaces[i] is used by worker i only.
+    :ivar max_pending: The maximum number of items submitted but not finished.
+    """
+
+    interfaces: list
+
+    max_pending: int
+
+
+    def __init__(self, size: int, max_pending: int=None, **kwargs) -> None:
+        """
+        Instantiate :param size: GraphInterface instances and a thread pool of :param size: workers.
+
+        :param size: The number of workers and connections.
+        :type size: int
+        :param max_pending: The maximum number of items submitted but not finished, defaults to None (2 * :param size:)
+        :type max_pending: int, optional
+        :param kwargs: Keyword arguments passed on to each GraphInterface constructor.
+        """
+
+        log_to_file(message=f"Instantiating graph interface pool of size {size}.")
+
+        # Each worker only ever submits one traversal at a time, so one connection per GraphInterface is enough.
+        kwargs.setdefault('pool_size', 1)
+
+        self.interfaces = [GraphInterface(**kwargs) for _ in range(size)]
+
+        self.max_pending = max_pending if max_pending is not None else 2 * size
+
+        self._executor = ThreadPoolExecutor(max_workers=size)
+
+        # The indices of the GraphInterface instances not used by any worker right now.
+        self._free = queue.Queue()
+
+        for i in range(size):
+            self._free.put(i)
+
+
+    def _run(self, fn, item, check=None) -> dict:
+        """
+        Run fn(gi, :param item:) on a free GraphInterface gi.
+
+        :param fn: The function to run.
+        :type fn: Callable[[GraphInterface, Any], Any]
+        :param item: The second argument to :param fn:.
+        :param check: A function returning an error message if the result of :param fn: reports a failure (GraphInterface methods log
+            server errors instead of raising them), and None otherwise, defaults to None (only exceptions are failures)
+        :type check: Callable[[Any], Optional[str]], optional
+        :return: A dictionary of the format {'item': :param item:, 'worker': ..., 'result': ..., 'error': ...}, where 'error' is None if :param fn: succeeded.
+        :rtype: dict
+        """
+
+        worker = self._free.get()
+
+        try:
+            result = fn(self.interfaces[worker], item)
+
+            error = None if check is None else check(result)
+
+            if error is not None:
+                log_to_file(message=f"Worker {worker} failed on {item}. {error}", urgency=2)
+
+            return {'item': item, 'worker': worker, 'result': result, 'error': error}
+
+        except Exception as e:
+            log_to_file(message=f"Worker {worker} failed on {item}. {e}", urgency=2)
+
+            return {'item': item, 'worker': worker, 'result': None, 'error': e}
+
+        finally:
+            self._free.put(worker)
+
+
+    def map(self, fn, items, check=None) -> list:
+        """
+        Run fn(gi, item) for every item in :param items: in parallel, where gi is a GraphInterface of the pool.
+
+        :param fn: The function to run. Calls may run at the same time on different GraphInterface instances.
+        :type fn: Callable[[GraphInterface, Any], Any]
+        :param items: The items to run :param fn: on. May be a generator; it is consumed as workers become free.
+        :type items: Iterable
+        :param check: A function returning an error message if a result of :param fn: reports a failure, and None otherwise, defaults to None
+        :type check: Callable[[Any], Optional[str]], optional
+        :return: A list of dictionaries of the format {'item': ..., 'worker': ..., 'result': ..., 'error': ...}, in the order of :param items:.
+        :rtype: list[dict]
+        """
+
+        pending = threading.BoundedSemaphore(self.max_pending)
+
+        futures = []
+
+        for item in items:
+
+            # Blocks while :ivar max_pending: items are waiting or running.
+            pending.acquire()
+
+            future = self._executor.submit(self._run, fn, item, check)
+            future.add_done_callback(lambda _: pending.release())
+
+            futures.append(future)
+
+        results = [future.result() for future in futures]
+
+        errors = sum(1 for result in results if result['error'] is not None)
+
+        if errors > 0:
+            log_to_file(message=f"Graph interface pool: {errors} of {len(results)} items failed.", urgency=2)
+
+        return results
+
+
+    def bulk_load(self, chains, batch_size: int=GraphInterface.DEFAULT_BULK_BATCH_SIZE) -> list:
+        """
+        Load signal chains in parallel with GraphInterface.bulk_load.
+
+        The chains must not share components, except for components that already exist in the graph (such as the correlator input),
+        otherwise two workers may add the same component.
+
+        :param chains: The (components, connections) 2-tuples to load, in the format of the arguments of GraphInterface.bulk_load. May be a generator.
+        :type chains: Iterable[tuple[list, list]]
+        :param batch_size: The maximum number of components or edges written per traversal, defaults to GraphInterface.DEFAULT_BULK_BATCH_SIZE
+        :type batch_size: int, optional
+        :return: The results of map(), where each 'result' is the list of per-batch statistics returned by GraphInterface.bulk_load,
+            and 'error' is set if any batch of the chain failed.
+        :rtype: list[dict]
+        """
+
+        return self.map(lambda gi, chain: gi.bulk_load(components=chain[0], connections=chain[1], batch_size=batch_size), chains, check=self._failed_batches)
+
+
+    def find_paths(self, queries) -> list:
+        """
+        Run GraphInterface.find_paths for every query in parallel.
+
+        :param queries: The (name1, name2, avoid_type, time) 4-tuples to query, in the order of the arguments of GraphInterface.find_paths. May be a generator.
+        :type queries: Iterable[tuple[str, str, str, float]]
+        :return: The results of map(), where each 'result' is the list of paths returned by GraphInterface.find_paths, and 'error' is set if it failed.
+        :rtype: list[dict]
+        """
+
+        return self.map(lambda gi, query: gi.find_paths(*query), queries, check=lambda paths: "find_paths failed." if paths is None else None)
+
+
+    @staticmethod
+    def _failed_batches(stats: list):
+        """
+        Return an error message if any of the per-batch statistics :param stats: returned by GraphInterface.bulk_load failed, and None otherwise.
+        """
+
+        failed = [batch for batch in stats if batch['error'] is not None]
+
+        if len(failed) == 0:
+            return None
+
+        return f"{len(failed)} of {len(stats)} bulk load batches failed. {failed[0]['error']}"
+
+
+    def close(self) -> None:
+        """
+        Wait for all running work to finish, stop the workers and close the connections.
+        """
+
+        self._executor.shutdown(wait=True)
+
+        for gi in self.interfaces:
+            gi.close()
@@ -0,0 +1,70 @@
+"""
+hirax.py
+
+Contains the naming scheme and signal chain topology of a HIRAX-style graph.
+
+
+(Temporary) Naming scheme:
+ - COR######: Correlator input
+ - ANT######: Antenna
+ - DPF######: Dual-Polarization Feed
+ - BLN######: (Active) Balun
+ - RFT######: RFoF transmitter
+ - OPF######: Optical Fiber
+ - RFR######: RFoF receiver
+ - ADC######: Analog-to-Digital converter
+
+
+Anatoly Zavyalov, 2021
+"""
+
+
+# Correlator node name
+CORRELATOR = 'COR000000'
+
+# The types of the components.
+TYPES = ['COR', 'ANT', 'DPF', 'BLN', 'RFT', 'OPF', 'RFR', 'ADC']
+
+
+def dish_signal_chain(i: int, cor: str, connections: list) -> tuple:
+    """
+
+    Return the components of the signal chain of dish number :param i: and the connection events between them, in the format expected by GraphInterface.bulk_load.
+
+    :param i: The number of the dish.
+    :type i: int
+    :param cor: Name of the correlator input the signal chain ends at. It is not included in the returned components.
+    :type cor: str
+    :param connections: A list of (float, bool) 2-tuples, where the first element is the time and the second element is whether a connection was started or stopped at that time.
+    :type connections: list
+    :return: A 2-tuple of a list of (name, type) 2-tuples and a list of (name1, name2, time, connection) 4-tuples.
+    :rtype: tuple[list, list]
+    """
+
+    # The names of the components to refer to
+    ant = f'ANT{str(i).zfill(6)}'
+    dpf = f'DPF{str(i).zfill(6)}'
+    bln = (f'BLN{str(2 * i - 1).zfill(6)}', f'BLN{str(2 * i).zfill(6)}')
+    rft = (f'RFT{str(2 * i - 1).zfill(6)}', f'RFT{str(2 * i).zfill(6)}')
+    opf = (f'OPF{str(2 * i - 1).zfill(6)}', f'OPF{str(2 * i).zfill(6)}')
+    rfr = (f'RFR{str(2 * i - 1).zfill(6)}', f'RFR{str(2 * i).zfill(6)}')
+    adc = (f'ADC{str(2 * i - 1).zfill(6)}', f'ADC{str(2 * i).zfill(6)}')
+
+    components = [(ant, 'ANT'), (dpf, 'DPF')]
+
+    events = []
+
+    for ind in (0, 1):
+        components += [(bln[ind], 'BLN'), (rft[ind], 'RFT'), (opf[ind], 'OPF'), (rfr[ind], 'RFR'), (adc[ind], 'ADC')]
+
+    for (time, connection) in connections:
+
+        for ind in (0, 1):
+
+            # Pairs of names to connect
+            pairs = [(ant, dpf), (dpf, bln[ind]), (bln[ind], rft[ind]), (rft[ind], opf[ind]), (opf[ind], rfr[ind]), (rfr[ind], adc[ind]), (adc[ind], cor)]
+
+            for pair in pairs:
+                events.append((pair[0], pair[1], time, connection))
+
+    return components, events
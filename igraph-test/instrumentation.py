@@ -0,0 +1,451 @@
+"""
+instrumentation.py
+
+Contains the Instrumentation class, which records the latency, round trips, result size and errors of the GraphInterface methods
+in in-process histograms, and the InstrumentedConnection class, which wraps the connection to the Gremlin server to count and time
+every traversal submitted through it.
+
+Anatoly Zavyalov, 2021
+"""
+
+import contextvars
+import functools
+import json
+import threading
+import time
+
+from collections import deque
+from concurrent.futures import Future
+
+from gremlin_python.driver.remote_connection import RemoteConnection, RemoteTraversal
+from gremlin_python.process.traversal import Bytecode, Traversal
+
+
+# Upper bounds of the histogram buckets, in seconds for latencies and in counts otherwise.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 10000, 100000)
+
+# Steps that write to the graph. Traversals containing them are never re-submitted to be profiled.
+MUTATING_STEPS = frozenset(('addV', 'addE', 'property', 'drop', 'mergeV', 'mergeE', 'io'))
+
+
+class Histogram():
+    """
+    A histogram of observed values with fixed buckets, in the style of a Prometheus histogram.
+
+    :ivar buckets: The sorted upper bounds of the buckets. Values above the last one are only counted in :ivar count:.
+    :ivar counts: The number of observed values in each bucket (not cumulative).
+    :ivar count: The number of observed values.
+    :ivar sum: The sum of the observed values.
+    """
+
+    buckets: tuple
+
+    counts: list
+
+    count: int
+
+    sum: float
+
+
+    def __init__(self, buckets: tuple) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0
+
+
+    def observe(self, value: float) -> None:
+        """
+        Add :param value: to the histogram.
+        """
+
+        for (i, bound) in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+        self.count += 1
+        self.sum += value
+
+
+    def to_dict(self) -> dict:
+        """
+        Return the histogram as a dictionary of the format {'count': ..., 'sum': ..., 'buckets': {upper bound: cumulative count, ...}}.
+        """
+
+        cumulative, total = {}, 0
+
+        for (bound, count) in zip(self.buckets, self.counts):
+            total += count
+            cumulative[bound] = total
+
+        return {'count': self.count, 'sum': self.sum, 'buckets': cumulative}
+
+
+class _Operation():
+    """
+    A GraphInterface method call in progress.
+    """
+
+    __slots__ = ('name', 'round_trips', 'result_size', 'errors')
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.round_trips = 0
+        self.result_size = 0
+        self.errors = 0
+
+
+class Instrumentation():
+    """
+    Records statistics of GraphInterface method calls ("operations") and of the traversals they submit.
+
+    Every operation gets histograms of its latency, its number of round trips to the server and the number of results it received, and
+    a count of its errors. Traversals submitted outside of any operation are recorded under the operation 'traversal'. If
+    :ivar profile_threshold: is set, read-only traversals slower than it are submitted again with the profile() step, and the
+    server's metrics are kept in :ivar slow_queries:.
+
+    :ivar profile_threshold: The latency in seconds above which traversals are profiled, or None to never profile.
+    :ivar operations: Dictionary of style {..., name: {'latency': Histogram, 'round_trips': Histogram, 'result_size': Histogram, 'errors': int}, ...}.
+    :ivar slow_queries: A bounded deque of dictionaries of the format {'operation': ..., 'seconds': ..., 'bytecode': ..., 'profile': ...}.
+    """
+
+    DEFAULT_MAX_SLOW_QUERIES: int = 100
+
+    profile_threshold: float
+
+    operations: dict
+
+    slow_queries: deque
+
+
+    def __init__(self, profile_threshold: float=None, max_slow_queries: int=DEFAULT_MAX_SLOW_QUERIES) -> None:
+        """
+        Instantiate empty statistics.
+
+        :param profile_threshold: The latency in seconds above which traversals are profiled, defaults to None (never)
+        :type profile_threshold: float, optional
+        :param max_slow_queries: The maximum number of profiled traversals to keep, defaults to DEFAULT_MAX_SLOW_QUERIES
+        :type max_slow_queries: int, optional
+        """
+
+        self.profile_threshold = profile_threshold
+
+        self.operations = {}
+
+        self.slow_queries = deque(maxlen=max_slow_queries)
+
+        self._lock = threading.Lock()
+
+        # The operation running in the current thread or task, if any.
+        self._current = contextvars.ContextVar('operation', default=None)
+
+
+    def _stats(self, name: str) -> dict:
+        stats = self.operations.get(name)
+
+        if stats is None:
+            stats = self.operations[name] = {
+                'latency': Histogram(LATENCY_BUCKETS), 'round_trips': Histogram(COUNT_BUCKETS), 'result_size': Histogram(COUNT_BUCKETS), 'errors': 0
+            }
+
+        return stats
+
+
+    def call(self, name: str, fn, *args, **kwargs):
+        """
+        Call fn(*:param args:, **:param kwargs:) as the operation :param name:, and record its statistics.
+
+        Operations may be nested (e.g. set_connection calls get_vertex_id): the round trips, results and failed requests of an inner
+        operation count towards the outer one as well.
+
+        The call counts as an error if it raises, or if any of its requests failed: the GraphInterface methods log a GremlinServerError
+        and return normally, so the exception itself never reaches this method.
+
+        :param name: The name of the operation, usually the name of the GraphInterface method.
+        :type name: str
+        :param fn: The function to call.
+        :type fn: Callable
+        :return: The return value of :param fn:.
+        """
+
+        operation = _Operation(name)
+
+        parent = self._current.get()
+
+        token = self._current.set(operation)
+
+        error = False
+
+        now = time.perf_counter()
+
+        try:
+            return fn(*args, **kwargs)
+
+        except Exception:
+            error = True
+            raise
+
+        finally:
+            seconds = time.perf_counter() - now
+
+            self._current.reset(token)
+
+            if parent is not None:
+                parent.round_trips += operation.round_trips
+                parent.result_size += operation.result_size
+                parent.errors += operation.errors
+
+            self._observe(name, seconds, operation.round_trips, operation.result_size, error or operation.errors > 0)
+
+
+    def _observe(self, name: str, seconds: float, round_trips: int, result_size: int, error: bool) -> None:
+        with self._lock:
+            stats = self._stats(name)
+
+            stats['latency'].observe(seconds)
+            stats['round_trips'].observe(round_trips)
+            stats['result_size'].observe(result_size)
+
+            if error:
+                stats['errors'] += 1
+
+
+    def current_operation(self):
+        """
+        Return the operation running in the current thread or task, or None.
+        """
+
+        return self._current.get()
+
+
+    def record_submit(self, operation, seconds: float, result_size: int, error: bool) -> None:
+        """
+        Record one round trip to the server, made by :param operation: (see current_operation), or outside of any operation if None.
+
+        :param operation: The operation that submitted the request, or None.
+        :param seconds: The latency of the round trip.
+        :type seconds: float
+        :param result_size: The number of results received.
+        :type result_size: int
+        :param error: Whether the request failed.
+        :type error: bool
+        """
+
+        if operation is not None:
+            operation.round_trips += 1
+            operation.result_size += result_size
+            operation.errors += int(error)
+
+        else:
+            self._observe('traversal', seconds, 1, result_size, error)
+
+
+    def should_profile(self, bytecode: Bytecode, seconds: float) -> bool:
+        """
+        Return whether the traversal of :param bytecode:, which took :param seconds:, should be profiled.
+        """
+
+        return self.profile_threshold is not None and seconds > self.profile_threshold and not self._is_mutating(bytecode)
+
+
+    @classmethod
+    def _is_mutating(cls, bytecode: Bytecode) -> bool:
+        """
+        Return whether :param bytecode: or any of its child traversals writes to the graph.
+        """
+
+        for (step, *args) in bytecode.step_instructions:
+
+            if step in MUTATING_STEPS:
+                return True
+
+            for arg in args:
+
+                child = arg.bytecode if isinstance(arg, Traversal) else arg
+
+                if isinstance(child, Bytecode) and cls._is_mutating(child):
+                    return True
+
+        return False
+
+
+    def record_profile(self, operation, seconds: float, bytecode: Bytecode, profile) -> None:
+        """
+        Keep the server's profile() metrics :param profile: of a slow traversal.
+        """
+
+        self.slow_queries.append({'operation': operation.name if operation is not None else 'traversal', 'seconds': seconds, 'bytecode': str(bytecode), 'profile': profile})
+
+
+    def to_dict(self) -> dict:
+        """
+        Return all statistics as a dictionary of the format {'operations': {name: {...}, ...}, 'slow_queries': [...]}.
+        """
+
+        with self._lock:
+            operations = {
+                name: {'latency': stats['latency'].to_dict(), 'round_trips': stats['round_trips'].to_dict(), 'result_size': stats['result_size'].to_dict(), 'errors': stats['errors']}
+                for (name, stats) in self.operations.items()
+            }
+
+        return {'operations': operations, 'slow_queries': [{**query, 'profile': str(query['profile'])} for query in self.slow_queries]}
+
+
+    def to_json(self) -> str:
+        """
+        Return to_dict() as a JSON string.
+        """
+
+        return json.dumps(self.to_dict(), indent=2)
+
+
+    def to_prometheus(self, prefix: str='graph_interface') -> str:
+        """
+        Return the histograms and error counts in the Prometheus text exposition format.
+
+        :param prefix: The prefix of the metric names, defaults to 'graph_interface'
+        :type prefix: str, optional
+        :rtype: str
+        """
+
+        lines = []
+
+        operations = self.to_dict()['operations']
+
+        for (metric, unit) in (('latency', 'seconds'), ('round_trips', 'count'), ('result_size', 'count')):
+
+            name = f'{prefix}_{metric}_{unit}' if unit == 'seconds' else f'{prefix}_{metric}'
+
+            lines.append(f'# TYPE {name} histogram')
+
+            for (operation, stats) in sorted(operations.items()):
+
+                histogram = stats[metric]
+
+                for (bound, count) in histogram['buckets'].items():
+                    lines.append(f'{name}_bucket{{operation="{operation}",le="{bound}"}} {count}')
+
+                lines.append(f'{name}_bucket{{operation="{operation}",le="+Inf"}} {histogram["count"]}')
+                lines.append(f'{name}_sum{{operation="{operation}"}} {histogram["sum"]}')
+                lines.append(f'{name}_count{{operation="{operation}"}} {histogram["count"]}')
+
+        lines.append(f'# TYPE {prefix}_errors_total counter')
+
+        for (operation, stats) in sorted(operations.items()):
+            lines.append(f'{prefix}_errors_total{{operation="{operation}"}} {stats["errors"]}')
+
+        return '\n'.join(lines) + '\n'
+
+
+class InstrumentedConnection(RemoteConnection):
+    """
+    A RemoteConnection that submits through another one and records every submission in an Instrumentation.
+
+    :ivar connection: The wrapped connection.
+    :ivar instrumentation: Where the submissions are recorded.
+    """
+
+    def __init__(self, connection: RemoteConnection, instrumentation: Instrumentation) -> None:
+        super().__init__(connection.url, connection.traversal_source)
+
+        self.connection = connection
+
+        self.instrumentation = instrumentation
+
+
+    def submit(self, bytecode: Bytecode) -> RemoteTraversal:
+        operation = self.instrumentation.current_operation()
+
+        now = time.perf_counter()
+
+        try:
+            # The results are already all received, so listing them only copies references, and gives their number.
+            results = list(self.connection.submit(bytecode).traversers)
+
+        except Exception:
+            self.instrumentation.record_submit(operation, time.perf_counter() - now, 0, True)
+            raise
+
+        seconds = time.perf_counter() - now
+
+        self.instrumentation.record_submit(operation, seconds, len(results), False)
+
+        self._profile_if_slow(operation, seconds, bytecode)
+
+        return RemoteTraversal(iter(results))
+
+
+    def submitAsync(self, bytecode: Bytecode) -> Future:
+        # Callbacks run in another thread, so the operation is read here.
+        operation = self.instrumentation.current_operation()
+
+        now = time.perf_counter()
+
+        future = Future()
+
+        def done(f: Future) -> None:
+            seconds = time.perf_counter() - now
+
+            try:
+                results = list(f.result().traversers)
+
+            except Exception as e:
+                self.instrumentation.record_submit(operation, seconds, 0, True)
+                future.set_exception(e)
+                return
+
+            self.instrumentation.record_submit(operation, seconds, len(results), False)
+
+            future.set_result(RemoteTraversal(iter(results)))
+
+        self.connection.submitAsync(bytecode).add_done_callback(done)
+
+        return future
+
+
+    def _profile_if_slow(self, operation, seconds: float, bytecode: Bytecode) -> None:
+        """
+        Submit :param bytecode: again with the profile() step if it was slow and does not write to the graph.
+        """
+
+        if not self.instrumentation.should_profile(bytecode, seconds):
+            return
+
+        profiled = Bytecode(bytecode)
+
+        # A traversal ending in iterate() has a none() step, which would discard the metrics.
+        if len(profiled.step_instructions) > 0 and profiled.step_instructions[-1][0] == 'none':
+            profiled.step_instructions.pop()
+
+        profiled.add_step('profile')
+
+        try:
+            profile = list(self.connection.submit(profiled).traversers)
+
+        except Exception as e:
+            profile = f"Failed to profile: {e}"
+
+        self.instrumentation.record_profile(operation, seconds, bytecode, profile[0] if isinstance(profile, list) and len(profile) == 1 else profile)
+
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def instrumented(method):
+    """
+    Decorate a GraphInterface method so that its calls are recorded as operations in the instrumentation of the GraphInterface, if
+    it has one.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.instrumentation is None:
+            return method(self, *args, **kwargs)
+
+        return self.instrumentation.call(method.__name__, method, self, *args, **kwargs)
+
+    return wrapper
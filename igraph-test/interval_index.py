@@ -0,0 +1,506 @@
+"""
+interval_index.py
+
+Contains the IntervalIndex class, a client-side index of the [start, end) intervals of the 'connection' edges of a graph.
+Used by GraphInterface to answer which pairs of components were connected at a time without querying the Gremlin server.
+
+Anatoly Zavyalov, 2021
+"""
+
+from bisect import bisect_left, bisect_right
+
+
+def _insert_sorted(items: list, keys: list, interval: list, key: float) -> None:
+    """
+    Insert :param interval: into :param items:, sorted by :param keys:, after the intervals with the same key.
+    """
+
+    i = bisect_right(keys, key)
+
+    items.insert(i, interval)
+    keys.insert(i, key)
+
+
+def _remove_sorted(items: list, keys: list, interval: list, key: float) -> None:
+    """
+    Remove :param interval: (compared by identity) from :param items:, sorted by :param keys:, where its key is :param key:.
+    """
+
+    i = bisect_left(keys, key)
+
+    while items[i] is not interval:
+        i += 1
+
+    del items[i], keys[i]
+
+
+class _IntervalTreeNode():
+    """
+    A node of a centered interval tree.
+
+    :ivar center: The point that all intervals stored in this node contain.
+    :ivar by_start: The intervals containing :ivar center:, sorted by increasing start.
+    :ivar starts: The starts of :ivar by_start:.
+    :ivar by_end: The intervals containing :ivar center:, sorted by increasing end.
+    :ivar ends: The ends of :ivar by_end:.
+    :ivar left: The subtree of the intervals ending at or before :ivar center:, or None.
+    :ivar right: The subtree of the intervals starting after :ivar center:, or None.
+    """
+
+    __slots__ = ('center', 'by_start', 'starts', 'by_end', 'ends', 'left', 'right')
+
+    def __init__(self, intervals: list) -> None:
+        """
+        Build the subtree containing :param intervals:, a non-empty list of [pair, start, end] lists.
+
+        :param intervals: The intervals to store in the subtree.
+        :type intervals: list[list]
+        """
+
+        endpoints = sorted([interval[1] for interval in intervals] + [interval[2] for interval in intervals])
+
+        # Taking the lower median guarantees that neither subtree receives all of :param intervals:, as long as none are empty.
+        self.center = endpoints[(len(endpoints) - 1) // 2]
+
+        left, right, here = [], [], []
+
+        for interval in intervals:
+
+            # Intervals are half-open, so an interval ending at the center does not contain it.
+            if interval[2] <= self.center:
+                left.append(interval)
+
+            elif interval[1] > self.center:
+                right.append(interval)
+
+            else:
+                here.append(interval)
+
+        self.by_start = sorted(here, key=lambda interval: interval[1])
+        self.starts = [interval[1] for interval in self.by_start]
+
+        self.by_end = sorted(here, key=lambda interval: interval[2])
+        self.ends = [interval[2] for interval in self.by_end]
+
+        self.left = _IntervalTreeNode(left) if len(left) > 0 else None
+        self.right = _IntervalTreeNode(right) if len(right) > 0 else None
+
+
+    def insert(self, interval: list) -> None:
+        """
+        Insert the non-empty :param interval: into the node of this subtree whose center it contains, adding a leaf if there is none.
+        """
+
+        node = self
+
+        while True:
+
+            if interval[2] <= node.center:
+                if node.left is None:
+                    node.left = _IntervalTreeNode([interval])
+                    return
+
+                node = node.left
+
+            elif interval[1] > node.center:
+                if node.right is None:
+                    node.right = _IntervalTreeNode([interval])
+                    return
+
+                node = node.right
+
+            else:
+                _insert_sorted(node.by_start, node.starts, interval, interval[1])
+                _insert_sorted(node.by_end, node.ends, interval, interval[2])
+                return
+
+
+    def remove(self, interval: list) -> None:
+        """
+        Remove :param interval:, which must be stored in this subtree, from its node. Emptied nodes are kept until the next rebuild.
+        """
+
+        node = self
+
+        while interval[2] <= node.center or interval[1] > node.center:
+            node = node.left if interval[2] <= node.center else node.right
+
+        _remove_sorted(node.by_start, node.starts, interval, interval[1])
+        _remove_sorted(node.by_end, node.ends, interval, interval[2])
+
+
+class IntervalIndex():
+    """
+    An index of the [start, end) intervals during which pairs of components were connected.
+
+    Answers which pairs were connected at a time in O(log n + k), where n is the number of intervals and k the number of pairs returned,
+    using a centered interval tree. The tree is built lazily on the first query, then connect and disconnect update it in place.
+    Inserted intervals do not rebalance the tree, so it is rebuilt once more intervals have changed since the last build than it holds.
+
+    :ivar open_end: The end of an interval of a connection that has not been terminated.
+    :ivar intervals: A list of [pair, start, end] lists, one per interval.
+    :ivar pair_intervals: Dictionary of style {..., key: [interval, ...], ...} where key is the pair sorted by name.
+    """
+
+    open_end: float
+
+    intervals: list
+
+    pair_intervals: dict
+
+
+    def __init__(self, open_end: float) -> None:
+        """
+        Instantiate an empty index.
+
+        :param open_end: The end of an interval of a connection that has not been terminated.
+        :type open_end: float
+        """
+
+        self.open_end = open_end
+
+        self.clear()
+
+
+    def clear(self) -> None:
+        """
+        Remove all intervals from the index.
+        """
+
+        self.intervals = []
+
+        self.pair_intervals = {}
+
+        self._tree = None
+
+        # The intervals sorted by start and by end, with their starts and ends, for deltas().
+        self._by_start, self._starts = [], []
+        self._by_end, self._ends = [], []
+
+        # Whether the tree and the sorted lists must be rebuilt before the next query, and the number of intervals inserted or
+        # closed in place since they were last built.
+        self._dirty = True
+        self._changes = 0
+
+
+    @staticmethod
+    def _key(name1: str, name2: str) -> tuple:
+        return (name1, name2) if name1 <= name2 else (name2, name1)
+
+
+    def add(self, name1: str, name2: str, start: float, end: float) -> None:
+        """
+        Add the interval [:param start:, :param end:) during which :param name1: and :param name2: were connected.
+
+        :param name1: Name of the first component. Queries return the pair as (:param name1:, :param name2:).
+        :type name1: str
+        :param name2: Name of the second component.
+        :type name2: str
+        :param start: Time at which the connection was created.
+        :type start: float
+        :param end: Time at which the connection was terminated, or :ivar open_end: if it has not been.
+        :type end: float
+        """
+
+        interval = [(name1, name2), start, end]
+
+        self.intervals.append(interval)
+
+        self.pair_intervals.setdefault(self._key(name1, name2), []).append(interval)
+
+        self._insert(interval)
+
+
+    def _insert(self, interval: list) -> None:
+        """
+        Insert :param interval: into the tree and the sorted lists, unless they are rebuilt before the next query anyway.
+        """
+
+        if self._dirty or not interval[1] < interval[2]:
+            return
+
+        if self._tree is None:
+            self._tree = _IntervalTreeNode([interval])
+        else:
+            self._tree.insert(interval)
+
+        _insert_sorted(self._by_start, self._starts, interval, interval[1])
+        _insert_sorted(self._by_end, self._ends, interval, interval[2])
+
+        self._count_change()
+
+
+    def _close(self, interval: list, end: float) -> None:
+        """
+        Set the end of the open :param interval: to :param end:, moving it in the tree and the sorted lists.
+        """
+
+        if self._dirty:
+            interval[2] = end
+            return
+
+        if interval[1] < interval[2]:
+            self._tree.remove(interval)
+
+            _remove_sorted(self._by_start, self._starts, interval, interval[1])
+            _remove_sorted(self._by_end, self._ends, interval, interval[2])
+
+        interval[2] = end
+
+        self._insert(interval)
+
+
+    def _count_change(self) -> None:
+        """
+        Count a change made in place, and schedule a rebuild once the changes may have unbalanced the tree.
+        """
+
+        self._changes += 1
+
+        if self._changes > len(self.intervals):
+            self._dirty = True
+
+
+    def _rebuild(self) -> None:
+        """
+        Rebuild the interval tree and the sorted lists if they were not kept up to date since they were last built.
+        """
+
+        if not self._dirty:
+            return
+
+        # Empty intervals (a connection terminated at the time it was created) never contain any time.
+        intervals = [interval for interval in self.intervals if interval[1] < interval[2]]
+
+        self._tree = _IntervalTreeNode(intervals) if len(intervals) > 0 else None
+
+        self._by_start = sorted(intervals, key=lambda interval: interval[1])
+        self._starts = [interval[1] for interval in self._by_start]
+
+        self._by_end = sorted(intervals, key=lambda interval: interval[2])
+        self._ends = [interval[2] for interval in self._by_end]
+
+        self._dirty = False
+        self._changes = 0
+
+
+    def is_connected(self, name1: str, name2: str, time: float) -> bool:
+        """
+        Return whether :param name1: and :param name2: were connected at :param time:.
+
+        :param name1: Name of the first component.
+        :type name1: str
+        :param name2: Name of the second component.
+        :type name2: str
+        :param time: Time to check.
+        :type time: float
+        :rtype: bool
+        """
+
+        return any(start <= time < end for (_, start, end) in self.pair_intervals.get(self._key(name1, name2), []))
+
+
+    def connect(self, name1: str, name2: str, time: float) -> None:
+        """
+        Mirror GraphInterface.set_connection(name1, name2, time, True): open a new interval at :param time: unless the pair is already connected then.
+
+        :param name1: Name of the first component. Queries return the pair as (:param name1:, :param name2:).
+        :type name1: str
+        :param name2: Name of the second component.
+        :type name2: str
+        :param time: Time at which the connection was created.
+        :type time: float
+        """
+
+        if not self.is_connected(name1, name2, time):
+            self.add(name1, name2, time, self.open_end)
+
+
+    def disconnect(self, name1: str, name2: str, time: float) -> None:
+        """
+        Mirror GraphInterface.set_connection(name1, name2, time, False): end all open intervals of the pair at :param time:.
+
+        :param name1: Name of the first component.
+        :type name1: str
+        :param name2: Name of the second component.
+        :type name2: str
+        :param time: Time at which the connection was terminated.
+        :type time: float
+        """
+
+        for interval in self.pair_intervals.get(self._key(name1, name2), []):
+            if interval[2] == self.open_end:
+                self._close(interval, time)
+
+
+    def pairs_at(self, time: float) -> list:
+        """
+        Return the pairs of components that were connected at :param time:.
+
+        :param time: Time to check.
+        :type time: float
+        :return: List of 2-tuples containing the names of the pairs of vertices connected at :param time:.
+        :rtype: list[tuple[str, str]]
+        """
+
+        self._rebuild()
+
+        pairs = []
+
+        node = self._tree
+
+        while node is not None:
+
+            if time < node.center:
+                # Every interval here ends after the center, so it contains :param time: if it starts at or before it.
+                pairs += [pair for (pair, _, _) in node.by_start[:bisect_right(node.starts, time)]]
+
+                node = node.left
+
+            else:
+                # Every interval here starts at or before the center, so it contains :param time: if it ends after it.
+                pairs += [pair for (pair, _, _) in node.by_end[bisect_right(node.ends, time):]]
+
+                node = node.right
+
+        return pairs
+
+
+    def deltas(self, time1: float, time2: float) -> tuple:
+        """
+        Return the connections that differ between :param time1: and :param time2:, in O(log n + c) where c is the number of
+        intervals starting or ending between the two times. :param time2: may be before :param time1:.
+
+        :param time1: Time to go from.
+        :type time1: float
+        :param time2: Time to go to.
+        :type time2: float
+        :return: A 2-tuple (added, removed) of lists of pairs connected at :param time2: but not :param time1:, and vice versa.
+        :rtype: tuple[list[tuple[str, str]], list[tuple[str, str]]]
+        """
+
+        self._rebuild()
+
+        low, high = min(time1, time2), max(time1, time2)
+
+        # An interval containing exactly one of the two times must start or end in (low, high].
+        candidates = self._by_start[bisect_right(self._starts, low):bisect_right(self._starts, high)]
+        candidates += self._by_end[bisect_right(self._ends, low):bisect_right(self._ends, high)]
+
+        return self.classify_deltas(candidates, time1, time2)
+
+
+    def overlapping(self, time1: float, time2: float) -> list:
+        """
+        Return the intervals that overlap [:param time1:, :param time2:], i.e. that start at or before :param time2: and end after :param time1:.
+
+        :rtype: list[list]
+        """
+
+        self._rebuild()
+
+        return [interval for interval in self._by_start[:bisect_right(self._starts, time2)] if interval[2] > time1]
+
+
+    @staticmethod
+    def sweep(intervals: list, time1: float, time2: float):
+        """
+        Replay the connections of :param intervals: from :param time1: to :param time2:.
+
+        The first item is (:param time1:, pairs connected at :param time1:, []). It is followed by one item per time in
+        (:param time1:, :param time2:] at which the connected pairs changed, in order, so that memory is proportional to the number
+        of changes rather than to the number of snapshots.
+
+        :param intervals: A list of (pair, start, end) 3-tuples or lists, including every interval overlapping [:param time1:, :param time2:]. Duplicates are allowed, and empty intervals are ignored.
+        :type intervals: list
+        :param time1: Time to start at.
+        :type time1: float
+        :param time2: Time to stop at. Must not be before :param time1:.
+        :type time2: float
+        :return: A generator of (time, added, removed) 3-tuples, where added and removed are lists of pairs.
+        :rtype: Generator[tuple[float, list[tuple[str, str]], list[tuple[str, str]]], None, None]
+        """
+
+        # Dictionary of style {..., key: number of intervals of the pair containing the current time, ...}.
+        counts = {}
+
+        # Dictionary of style {..., time: [(key, pair, +1 or -1), ...], ...} of the changes after :param time1:.
+        events = {}
+
+        initial = {}
+
+        for (pair, start, end) in intervals:
+
+            # Empty intervals (a connection terminated at the time it was created) never contain any time, like in _rebuild.
+            if start >= end:
+                continue
+
+            key = IntervalIndex._key(*pair)
+
+            if start <= time1 < end:
+                counts[key] = counts.get(key, 0) + 1
+                initial[key] = pair
+
+            elif time1 < start <= time2:
+                events.setdefault(start, []).append((key, pair, 1))
+
+            if time1 < end <= time2:
+                events.setdefault(end, []).append((key, pair, -1))
+
+        yield time1, list(initial.values()), []
+
+        for time in sorted(events):
+
+            before = {key: counts.get(key, 0) > 0 for (key, _, _) in events[time]}
+
+            pairs = {}
+
+            for (key, pair, change) in events[time]:
+                counts[key] = counts.get(key, 0) + change
+                pairs[key] = pair
+
+            added = [pairs[key] for (key, was_connected) in before.items() if counts[key] > 0 and not was_connected]
+            removed = [pairs[key] for (key, was_connected) in before.items() if counts[key] == 0 and was_connected]
+
+            if len(added) > 0 or len(removed) > 0:
+                yield time, added, removed
+
+
+    @staticmethod
+    def classify_deltas(intervals: list, time1: float, time2: float) -> tuple:
+        """
+        Given intervals that include every interval containing exactly one of :param time1: and :param time2: (and possibly others),
+        return the connections that differ between the two times.
+
+        :param intervals: A list of (pair, start, end) 3-tuples or lists. Duplicates are allowed.
+        :type intervals: list
+        :param time1: Time to go from.
+        :type time1: float
+        :param time2: Time to go to.
+        :type time2: float
+        :return: A 2-tuple (added, removed) of lists of pairs connected at :param time2: but not :param time1:, and vice versa.
+        :rtype: tuple[list[tuple[str, str]], list[tuple[str, str]]]
+        """
+
+        # Dictionaries of style {..., key: pair, ...} where key is the pair sorted by name.
+        added, removed = {}, {}
+
+        for (pair, start, end) in intervals:
+
+            before, after = start <= time1 < end, start <= time2 < end
+
+            if after and not before:
+                added[IntervalIndex._key(*pair)] = pair
+
+            elif before and not after:
+                removed[IntervalIndex._key(*pair)] = pair
+
+        # A pair that was reconnected by a different interval is connected at both times.
+        for key in set(added) & set(removed):
+            del added[key], removed[key]
+
+        return list(added.values()), list(removed.values())
+
+
+    def __len__(self) -> int:
+        return len(self.intervals)
@@ -9,19 +9,108 @@ Anatoly Zavyalov, 2021
 
 from log_to_file import log_to_file
 from datetime import datetime
+from array import array
+
+import math
+import mmap
+import os
+import struct
+import sys
+import warnings
 
 import igraph
 
+from bisect import bisect_right
+
+from itertools import chain, count
+
+from collections.abc import Mapping
+
+import component_ids
+
+from lru_cache import LRUCache
+
+
+# Header of the files written by LocalGraph.save_snapshot: magic, flags, vertex count, edge count, length of the name table, number
+# of types, length of the type table, time (NaN if unknown). Everything is little-endian, and every section starts at a multiple of 8 bytes.
+SNAPSHOT_MAGIC = b'LGSNAP01'
+
+SNAPSHOT_HEADER = struct.Struct('<8sQQQQQQd')
+
+# Flags of the optional sections.
+SNAPSHOT_HAS_INTERVALS = 1
+SNAPSHOT_HAS_TYPES = 2
+
+
+def _padding(size: int) -> bytes:
+    return b'\0' * (-size % 8)
+
+
+def _little_endian(a: array) -> bytes:
+    """
+    Return the bytes of :param a: in little-endian order.
+    """
+
+    if sys.byteorder != 'little':
+        a = array(a.typecode, a)
+        a.byteswap()
+
+    return a.tobytes()
+
+
+class _NameIndex(Mapping):
+    """
+    A read-only mapping of vertex names to indices, backed by a dictionary of interned component IDs to indices (see component_ids.py).
+    """
+
+    def __init__(self, id_to_ind: dict) -> None:
+        self.id_to_ind = id_to_ind
+
+    def __getitem__(self, name: str) -> int:
+        component_id = component_ids.lookup(name)
+
+        if component_id is None:
+            raise KeyError(name)
+
+        return self.id_to_ind[component_id]
+
+    def __contains__(self, name) -> bool:
+        return isinstance(name, str) and component_ids.lookup(name) in self.id_to_ind
+
+    def __iter__(self):
+        return (component_ids.decode(component_id) for component_id in self.id_to_ind)
+
+    def __len__(self) -> int:
+        return len(self.id_to_ind)
+
+
 class LocalGraph():
     """
 
     A wrapper class for an igraph.Graph instance.
 
+    Vertices are stored by their interned component IDs (see component_ids.py) rather than by name: :ivar graph: has no name or
+    label attributes, and names are only encoded and decoded at the edge of the methods. A graph created from names keeps them
+    and only encodes them, in bulk, the first time :ivar vertex_ids: or :ivar vertex_id_to_ind: is used, so that snapshots that are
+    only labeled or saved (see ReachabilityIndex and save_snapshot) never pay for it. Callers that read the 'name' and 'label'
+    vertex attributes of :ivar graph: (such as plotting code or notebooks) call add_name_attributes first, which decodes them once.
+
+    Optionally (see create_from_intervals), :ivar graph: has a 'type' vertex attribute and 'start' and 'end' edge attributes, with
+    one edge per [start, end) interval of a connection, so that find_shortest_paths can answer the same queries as
+    GraphInterface.find_paths. The filtered views it searches are cached per set of avoided types and per change-point epoch.
+
     :ivar graph: Contains the igraph Graph.
+    :ivar vertex_ids: array('q') of the interned component ID of each vertex, by index in :ivar graph:.
+    :ivar vertex_id_to_ind: Dictionary of style {..., component_id: index, ...} mapping the IDs of the vertices to their indices in :ivar graph:.
+    :ivar time: The time the connections in :ivar graph: are a snapshot of, or None if unknown.
     """
 
     graph: igraph.Graph
 
+    time: float
+
+    DEFAULT_VIEW_CACHE_SIZE: int = 8
+
 
     def __init__(self) -> None:
         """
@@ -30,13 +119,124 @@ class LocalGraph():
 
         self.graph = igraph.Graph()
 
+        self._set_names([])
+
+        self.time = None
+
+        self._clear_views()
+
 
-    def create_from_connections_undirected(self, vertex_connections: list) -> None:
+    def _clear_views(self) -> None:
+        """
+        Forget the cached masks and filtered views. Called whenever the graph changes.
+        """
+
+        # Dictionary of style {..., frozenset of types: set of vertex indices, ...}.
+        self._avoided = {}
+
+        # The sorted 'start' and 'end' times of the edges, or None until needed.
+        self._change_points = None
+
+        # Dictionary of style {..., epoch: set of edge IDs, ...} of the edges that exist during each change-point epoch.
+        self._edges_by_epoch = {}
+
+        # Filtered igraph.Graph views keyed by (frozenset of types, epoch).
+        self._views = LRUCache(max_size=self.DEFAULT_VIEW_CACHE_SIZE)
+
+
+    def _set_names(self, names: list) -> None:
+        """
+        Set the names of the vertices, by index in self.graph, leaving their IDs to be encoded on first use.
+        """
+
+        # The names of the vertices, or None once vertices were added by ID only.
+        self._names = names
+
+        self._vertex_ids = None
+        self._vertex_id_to_ind = None
+
+
+    @property
+    def vertex_ids(self) -> array:
+        """
+        array('q') of the interned component ID of each vertex, by index in self.graph.
+        """
+
+        if self._vertex_ids is None:
+            self._vertex_ids = array('q', component_ids.encode_all(self._names))
+
+        return self._vertex_ids
+
+
+    @property
+    def vertex_id_to_ind(self) -> dict:
+        """
+        Dictionary of style {..., component_id: index, ...} mapping the IDs of the vertices to their indices in self.graph.
+        """
+
+        if self._vertex_id_to_ind is None:
+            self._vertex_id_to_ind = dict(zip(self.vertex_ids, count()))
+
+        return self._vertex_id_to_ind
+
+
+    @property
+    def vertex_name_to_ind(self) -> Mapping:
+        """
+        A read-only mapping of style {..., name: index, ...} of the names of the vertices to their indices in self.graph.
+        """
+
+        return _NameIndex(self.vertex_id_to_ind)
+
+
+    def name_of(self, index: int) -> str:
+        """
+        Return the name of the vertex of index :param index: in self.graph.
+        """
+
+        if self._names is not None:
+            return self._names[index]
+
+        return component_ids.decode(self.vertex_ids[index])
+
+
+    def names(self) -> list:
+        """
+        Return the names of all vertices, by index in self.graph.
+
+        :rtype: list[str]
+        """
+
+        if self._names is not None:
+            return list(self._names)
+
+        return [component_ids.decode(component_id) for component_id in self.vertex_ids]
+
+
+    def add_name_attributes(self) -> None:
+        """
+        Set the 'name' and 'label' vertex attributes of self.graph to the names of the vertices, which it does not have otherwise.
+
+        apply_deltas keeps the attributes up to date from then on. A graph replaced by create_from_connections_undirected,
+        create_from_intervals or load_snapshot does not have them until this is called again.
+        """
+
+        names = self.names()
+
+        self.graph.vs['name'] = names
+        self.graph.vs['label'] = names
+
+
+    def create_from_connections_undirected(self, vertex_connections: list, time: float=None, interned: bool=False) -> None:
         """
         Instantiate a simple undirected igraph.Graph given pairs of vertices to connect.
 
-        :param vertex_connections: A list of the format [(name1, name2), (name3, name4), ...] where name# represents the names of the vertices.
+        :param vertex_connections: A list of the format [(name1, name2), (name3, name4), ...] where name# represents the names of the vertices. May be any iterable, such as GraphInterface.iter_connected_vertices_at_time.
         :type vertex_connections: list[tuple[str, str]]
+        :param time: The time the connections are a snapshot of, defaults to None
+        :type time: float, optional
+        :param interned: Whether the pairs are of component IDs (see component_ids.py) instead of names, defaults to False
+        :type interned: bool, optional
         """
 
         # See https://igraph.org/python/doc/tutorial/tutorial.html#setting-and-retrieving-attributes for help regarding igraph vertex/edge attributes.
@@ -44,57 +244,534 @@ class LocalGraph():
         now = datetime.now()
 
 
-        # vertex_names[i] denotes the name of the i'th vertex in the local graph.
-        vertex_name_arr = []
+        # The names (or IDs) of both ends of every pair, flattened.
+        ends = list(chain.from_iterable(vertex_connections))
+
+        # Dictionary of style {..., name: i, ...} of the index of every distinct name, in order of first appearance.
+        name_to_ind = dict(zip(dict.fromkeys(ends), count()))
 
-        # Dictionary of style {..., vertex_names[i]: i, ...}.   
-        vertex_name_to_ind = {}
+        indices = list(map(name_to_ind.__getitem__, ends))
 
         # List of 2-tuples containing the indices of the pairs of vertices to be added (instead of the names).
-        vertex_index_connections = []
+        vertex_index_connections = list(zip(indices[0::2], indices[1::2]))
 
-        for pair in vertex_connections:
+        log_to_file(message="Making local graph.")
 
-            indices = []
+        self.graph = igraph.Graph(n=len(name_to_ind), edges=vertex_index_connections)
 
-            for i in range(len(pair)):
+        if interned:
+            self._set_names(None)
+            self._vertex_ids = array('q', name_to_ind)
+            self._vertex_id_to_ind = name_to_ind
 
-                if pair[i] not in vertex_name_to_ind:
-                    vertex_name_to_ind[pair[i]] = len(vertex_name_arr)
-                    vertex_name_arr.append(pair[i])
+        else:
+            # The distinct names are encoded in bulk on first use (see vertex_ids).
+            self._set_names(list(name_to_ind))
 
-                indices.append(vertex_name_to_ind[pair[i]])
+        self.time = time
 
-            vertex_index_connections.append(tuple(indices))
+        self._clear_views()
 
-        log_to_file(message="Making local graph.")
+        log_to_file(message=f"Done making local graph, that took {(datetime.now() - now).total_seconds()} seconds.")
+        
 
-        self.graph = igraph.Graph(vertex_index_connections)
+    def create_from_intervals(self, intervals: list, vertex_types: dict=None) -> None:
+        """
+        Instantiate an undirected igraph.Graph of every connection in :param intervals:, with one edge per interval storing its
+        'start' and 'end' times, so that find_shortest_paths can be queried at any time the intervals cover.
 
-        self.graph.vs['name'] = vertex_name_arr
+        :param intervals: A list of (pair, start, end) 3-tuples, as returned by IntervalIndex or GraphInterface._intervals_overlapping.
+        :type intervals: list[tuple[tuple[str, str], float, float]]
+        :param vertex_types: Dictionary of style {..., name: type, ...} of the types of the vertices, defaults to None (the type prefix of the names, see component_ids.type_of)
+        :type vertex_types: dict, optional
+        """
 
-        self.graph.vs['label'] = self.graph.vs['name']
+        intervals = list(intervals)
 
-        log_to_file(message=f"Done making local graph, that took {(datetime.now() - now).total_seconds()} seconds.")
-        
+        self.create_from_connections_undirected([pair for (pair, _, _) in intervals])
+
+        self.graph.es['start'] = [start for (_, start, _) in intervals]
+        self.graph.es['end'] = [end for (_, _, end) in intervals]
+
+        if vertex_types is not None:
+            self.graph.vs['type'] = [vertex_types.get(name) for name in self.names()]
+
+
+    def vertex_type(self, index: int) -> str:
+        """
+        Return the type of the vertex of index :param index:: its 'type' attribute if it has one, the type prefix of its name otherwise.
+        """
+
+        if 'type' in self.graph.vs.attributes():
+            type_ = self.graph.vs[index]['type']
+
+            if type_ is not None:
+                return type_
+
+        return component_ids.type_of(self.vertex_ids[index])
+
+
+    def _avoided_vertices(self, avoid_types: frozenset) -> set:
+        """
+        Return the indices of the vertices of a type in :param avoid_types:, cached per set of types.
+        """
+
+        avoided = self._avoided.get(avoid_types)
+
+        if avoided is None:
+            avoided = self._avoided[avoid_types] = {i for i in range(self.graph.vcount()) if self.vertex_type(i) in avoid_types}
+
+        return avoided
+
+
+    def _epoch(self, time: float) -> int:
+        """
+        Return the index of the change-point epoch of :param time:. All times in the same epoch have the same edges.
+        """
+
+        if self._change_points is None:
+            self._change_points = sorted((set(self.graph.es['start']) | set(self.graph.es['end'])) - {None})
+
+        return bisect_right(self._change_points, time)
+
+
+    def _edges_at(self, time: float) -> set:
+        """
+        Return the IDs of the edges that exist at :param time:, cached per change-point epoch. Edges without an interval always exist.
+        """
+
+        if 'start' not in self.graph.es.attributes():
+            return set(range(self.graph.ecount()))
+
+        epoch = self._epoch(time)
+
+        edges = self._edges_by_epoch.get(epoch)
+
+        if edges is None:
+            edges = self._edges_by_epoch[epoch] = {
+                eid for (eid, (start, end)) in enumerate(zip(self.graph.es['start'], self.graph.es['end'])) if start is None or start <= time < end
+            }
+
+        return edges
+
+
+    def _view(self, avoid_types: frozenset, time: float) -> igraph.Graph:
+        """
+        Return a copy of self.graph without the edges that do not exist at :param time: (all edges if None) and without the edges of
+        the vertices of a type in :param avoid_types:. Vertex indices are unchanged. Views are cached.
+        """
+
+        key = (avoid_types, self._epoch(time) if time is not None and 'start' in self.graph.es.attributes() else None)
+
+        view = self._views.get(key)
+
+        if view is None:
+            edges = self._edges_at(time) if time is not None else range(self.graph.ecount())
+
+            avoided = self._avoided_vertices(avoid_types)
+
+            edge_list = self.graph.get_edgelist()
+
+            keep = [eid for eid in edges if edge_list[eid][0] not in avoided and edge_list[eid][1] not in avoided]
+
+            view = self.graph.subgraph_edges(keep, delete_vertices=False)
+
+            self._views.put(key, view)
+
+        return view
+
+
+    def apply_deltas(self, added: list, removed: list) -> None:
+        """
+        Modify the graph in place by removing the connections in :param removed:, then adding the connections in :param added:.
+
+        Vertices are never removed, so that the indices in self.vertex_id_to_ind stay valid; a vertex whose connections were
+        all removed is left isolated. Removing a connection that does not exist or adding one that already exists does nothing.
 
-    def find_shortest_paths(self, name1: str, name2: str):
+        :param added: A list of the format [(name1, name2), (name3, name4), ...] of the connections to add.
+        :type added: list[tuple[str, str]]
+        :param removed: A list of the format [(name1, name2), (name3, name4), ...] of the connections to remove.
+        :type removed: list[tuple[str, str]]
+        """
+
+        id_to_ind = self.vertex_id_to_ind
+
+        # Removing vertices from an igraph.Graph renumbers them, but removing edges does not, so removals are done in one call.
+        lookup = component_ids.lookup
+
+        removed_pairs = [(id_to_ind.get(lookup(a)), id_to_ind.get(lookup(b))) for (a, b) in removed]
+        removed_pairs = [pair for pair in removed_pairs if None not in pair]
+
+        if len(removed_pairs) > 0:
+            self.graph.delete_edges([eid for eid in self.graph.get_eids(pairs=removed_pairs, directed=False, error=False) if eid != -1])
+
+        added = component_ids.encode_pairs(added)
+
+        new_vertices = 0
+
+        for pair in added:
+            for component_id in pair:
+                if component_id not in id_to_ind:
+                    id_to_ind[component_id] = len(self.vertex_ids)
+                    self.vertex_ids.append(component_id)
+
+                    if self._names is not None:
+                        self._names.append(component_ids.decode(component_id))
+                    new_vertices += 1
+
+        if new_vertices > 0:
+            if 'name' in self.graph.vs.attributes():
+                # The name attributes were added by add_name_attributes, so the new vertices get them as well.
+                new_names = [self.name_of(i) for i in range(len(self.vertex_ids) - new_vertices, len(self.vertex_ids))]
+
+                self.graph.add_vertices(new_vertices, attributes={'name': new_names, 'label': new_names})
+
+            else:
+                self.graph.add_vertices(new_vertices)
+
+        # The graph is undirected, so each pair is normalized to add a connection given in both orders only once.
+        added_pairs = {tuple(sorted((id_to_ind[a], id_to_ind[b]))) for (a, b) in added}
+
+        if len(added_pairs) > 0:
+            existing = self.graph.get_eids(pairs=list(added_pairs), directed=False, error=False)
+
+            self.graph.add_edges([pair for (pair, eid) in zip(added_pairs, existing) if eid == -1])
+
+        self._clear_views()
+
+
+    def connect(self, name1: str, name2: str) -> None:
+        """
+        Connect the vertices named :param name1: and :param name2:, adding them if they do not exist.
+
+        :param name1: Name of the first vertex.
+        :type name1: str
+        :param name2: Name of the second vertex.
+        :type name2: str
+        """
+
+        self.apply_deltas(added=[(name1, name2)], removed=[])
+
+
+    def disconnect(self, name1: str, name2: str) -> None:
+        """
+        Remove the connection between the vertices named :param name1: and :param name2:, if it exists.
+
+        :param name1: Name of the first vertex.
+        :type name1: str
+        :param name2: Name of the second vertex.
+        :type name2: str
+        """
+
+        self.apply_deltas(added=[], removed=[(name1, name2)])
+
+
+    def find_shortest_paths(self, name1: str, name2: str, avoid_types: list=(), time: float=None):
         """
         Given two vertices labelled with <name1> and <name2>, return the SHORTEST paths between the vertices.
 
+        With the same semantics as GraphInterface.find_paths, the paths only use edges that exist at :param time: and do not step onto
+        a vertex of a type in :param avoid_types: (the starting vertex may be of such a type). The search runs on a cached filtered view
+        of the graph (see _view).
+
         See https://igraph.org/python/doc/api/igraph._igraph.GraphBase.html#get_all_shortest_paths for documentation.
 
         :param name1: name property of the vertex to start the traversal at
         :type name1: str
         :param name2: name property of the vertex to end the traversal at
         :type name2: str
+        :param avoid_types: Types of the vertices to avoid, defaults to ()
+        :type avoid_types: list[str], optional
+        :param time: Time to check the edges at, defaults to None (all edges). Only has an effect if the graph has edge intervals (see create_from_intervals).
+        :type time: float, optional
+        :return: A list of paths, each a list of vertex indices, sorted by the component IDs of their vertices (see _sorted_paths).
+        :rtype: list[list[int]]
         """
 
         # TODO: maybe perform a check to see if the vertices exist?
 
-        return self.graph.get_all_shortest_paths(name1, to=name2, weights=None, mode='all')
+        source, target = self.vertex_name_to_ind[name1], self.vertex_name_to_ind[name2]
+
+        avoid_types = frozenset(avoid_types)
+
+        if len(avoid_types) == 0 and time is None:
+            return self._sorted_paths(self.graph.get_all_shortest_paths(source, to=target, weights=None, mode='all'))
+
+        if source == target:
+            return [[source]]
+
+        avoided = self._avoided_vertices(avoid_types)
+
+        if target in avoided:
+            return []
+
+        view = self._view(avoid_types, time)
+
+        if source not in avoided:
+            return self._sorted_paths(view.get_all_shortest_paths(source, to=target, weights=None, mode='all'))
+
+        # The view has no edges of the starting vertex, so search from each of its neighbours that may be stepped onto.
+        edges = self._edges_at(time) if time is not None else None
+
+        neighbours = {self.graph.es[eid].source + self.graph.es[eid].target - source for eid in self.graph.incident(source) if edges is None or eid in edges}
+
+        paths = [[source] + path for neighbour in neighbours - avoided for path in view.get_all_shortest_paths(neighbour, to=target, weights=None, mode='all')]
+
+        shortest = min((len(path) for path in paths), default=0)
+
+        return self._sorted_paths([path for path in paths if len(path) == shortest])
+
+
+    def _sorted_paths(self, paths: list) -> list:
+        """
+        Sort :param paths: by the component IDs of their vertices. igraph returns paths of equal length in the order of the edges of
+        the graph, so without this the order would depend on the order the connections were added in, and a cached or reloaded
+        snapshot could order its paths differently from a freshly built one.
+        """
+
+        vertex_ids = self.vertex_ids
+
+        return sorted(paths, key=lambda path: [vertex_ids[i] for i in path])
         
 
+    def find_shortest_paths_many(self, sources: list, target: str) -> tuple:
+        """
+        Return a shortest path from each of :param sources: to :param target:, using a single breadth-first search from :param target:.
+
+        The paths are returned as two compact arrays: the path from sources[i] is vertices[offsets[i]:offsets[i + 1]], a list of
+        vertex indices starting at sources[i] and ending at :param target:. The path is empty if sources[i] is not connected to
+        :param target: or is not in the graph. Use self.name_of(index) to get the name of a vertex.
+
+        :param sources: Names of the vertices to start the paths at.
+        :type sources: list[str]
+        :param target: Name of the vertex to end the paths at.
+        :type target: str
+        :return: A 2-tuple (offsets, vertices) of array('l').
+        :rtype: tuple[array, array]
+        """
+
+        offsets, vertices = array('l', [0]), array('l')
+
+        name_to_ind = self.vertex_name_to_ind
+
+        if target not in name_to_ind:
+            offsets.extend([0] * len(sources))
+            return offsets, vertices
+
+        # Only the sources in the graph are searched for, but a path is returned for every source.
+        indices = [name_to_ind.get(name) for name in sources]
+
+        with warnings.catch_warnings():
+            # igraph warns about every source it cannot reach, which is expected here.
+            warnings.simplefilter('ignore', RuntimeWarning)
+
+            found = self.graph.get_shortest_paths(name_to_ind[target], to=[i for i in indices if i is not None], weights=None, mode='all', output='vpath')
+
+        found = iter(found)
+
+        for i in indices:
+
+            if i is not None:
+                # The search went from the target, so the path is reversed to start at the source.
+                vertices.extend(reversed(next(found)))
+
+            offsets.append(len(vertices))
+
+        return offsets, vertices
+
+
+    def find_shortest_path_lengths(self, sources: list, targets: list) -> list:
+        """
+        Return the length of the shortest path from each of :param sources: to each of :param targets:, using one breadth-first
+        search per target.
+
+        :param sources: Names of the vertices to start the paths at.
+        :type sources: list[str]
+        :param targets: Names of the vertices to end the paths at.
+        :type targets: list[str]
+        :return: A list with an array('d') per target, where element i is the number of edges on a shortest path from sources[i], or inf if there is no path.
+        :rtype: list[array]
+        """
+
+        name_to_ind = self.vertex_name_to_ind
+
+        source_indices = [name_to_ind.get(name) for name in sources]
+        target_indices = [name_to_ind.get(name) for name in targets]
+
+        found_sources = [i for i in source_indices if i is not None]
+        found_targets = [i for i in target_indices if i is not None]
+
+        distances = iter(self.graph.distances(source=found_targets, target=found_sources, weights=None, mode='all') if len(found_sources) > 0 and len(found_targets) > 0 else [[]] * len(found_targets))
+
+        lengths = []
+
+        for t in target_indices:
+
+            row = iter(next(distances)) if t is not None else None
+
+            lengths.append(array('d', [next(row) if (row is not None and s is not None) else float('inf') for s in source_indices]))
+
+        return lengths
+
+
+    def save_snapshot(self, file_name: str) -> None:
+        """
+        Write the graph to :param file_name: in a compact columnar binary format that load_snapshot reads back.
+
+        The file holds the table of vertex names, the source and target index of every edge as int64 arrays, and, if the graph has
+        them, the 'start' and 'end' edge attributes as float64 arrays and the 'type' vertex attribute as a table of type names with
+        an int32 index per vertex. Edges without an interval (e.g. added by apply_deltas) are written as [-inf, inf), which exists
+        at every time just like an edge without one.
+
+        :param file_name: A file path.
+        :type file_name: str
+        """
+
+        now = datetime.now()
+
+        names = '\0'.join(self.names()).encode()
+
+        edges = self.graph.get_edgelist()
+
+        flags = 0
+
+        sections = [
+            names, _padding(len(names)),
+            _little_endian(array('q', [source for (source, _) in edges])),
+            _little_endian(array('q', [target for (_, target) in edges])),
+        ]
+
+        if 'start' in self.graph.es.attributes() and 'end' in self.graph.es.attributes():
+            flags |= SNAPSHOT_HAS_INTERVALS
+            starts = [-math.inf if start is None else start for start in self.graph.es['start']]
+            ends = [math.inf if end is None else end for end in self.graph.es['end']]
+
+            sections += [_little_endian(array('d', starts)), _little_endian(array('d', ends))]
+
+        types = b''
+        type_names = []
+
+        if 'type' in self.graph.vs.attributes():
+            flags |= SNAPSHOT_HAS_TYPES
+
+            type_names = sorted({type_ for type_ in self.graph.vs['type'] if type_ is not None})
+            type_to_ind = {type_: i for (i, type_) in enumerate(type_names)}
+
+            types = '\0'.join(type_names).encode()
+
+            vertex_types = array('i', [type_to_ind[type_] if type_ is not None else -1 for type_ in self.graph.vs['type']])
+
+            sections += [types, _padding(len(types)), _little_endian(vertex_types)]
+
+        header = SNAPSHOT_HEADER.pack(
+            SNAPSHOT_MAGIC, flags, self.graph.vcount(), len(edges), len(names), len(type_names), len(types),
+            self.time if self.time is not None else math.nan
+        )
+
+        with open(file_name, 'wb') as file:
+            file.write(header)
+
+            for section in sections:
+                file.write(section)
+
+        log_to_file(message=f"Saved local graph of {self.graph.vcount()} vertices and {len(edges)} edges to {file_name}, that took {(datetime.now() - now).total_seconds()} seconds.")
+
+
+    def load_snapshot(self, file_name: str) -> None:
+        """
+        Replace the graph with the one saved to :param file_name: by save_snapshot.
+
+        The file is memory-mapped read-only and each column is copied out of the map in a single bulk read, without parsing it
+        value by value in Python. Loading is still O(n) and nothing stays backed by the file, so processes loading the same snapshot
+        do not share its pages: igraph.Graph keeps its edges and attributes in its own memory, so they are copied out of the map,
+        and the map is closed before this method returns.
+
+        A file that is not a snapshot, or whose sections are shorter than its header says, is logged and leaves the graph unchanged.
+
+        :param file_name: A file path.
+        :type file_name: str
+        """
+
+        now = datetime.now()
+
+        with open(file_name, 'rb') as file:
+
+            # Shorter files cannot hold a header, and an empty file cannot be memory-mapped.
+            if os.fstat(file.fileno()).st_size < SNAPSHOT_HEADER.size:
+                log_to_file(message=f"Cannot load local graph from {file_name}: not a snapshot file.", urgency=2)
+                return
+
+            view = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, flags, vertex_count, edge_count, names_length, type_count, types_length, time = SNAPSHOT_HEADER.unpack_from(view, 0)
+
+            if magic != SNAPSHOT_MAGIC:
+                log_to_file(message=f"Cannot load local graph from {file_name}: not a snapshot file.", urgency=2)
+                return
+
+            offset = SNAPSHOT_HEADER.size
+
+            size = offset + names_length + len(_padding(names_length)) + 16 * edge_count
+
+            if flags & SNAPSHOT_HAS_INTERVALS:
+                size += 16 * edge_count
+
+            if flags & SNAPSHOT_HAS_TYPES:
+                size += types_length + len(_padding(types_length)) + 4 * vertex_count
+
+            if len(view) < size:
+                log_to_file(message=f"Cannot load local graph from {file_name}: the file is truncated ({len(view)} of {size} bytes).", urgency=2)
+                return
+
+            def read(typecode: str, count: int) -> array:
+                nonlocal offset
+
+                a = array(typecode)
+                a.frombytes(view[offset:offset + count * a.itemsize])
+
+                if sys.byteorder != 'little':
+                    a.byteswap()
+
+                offset += count * a.itemsize
+
+                return a
+
+            names = view[offset:offset + names_length].decode().split('\0') if vertex_count > 0 else []
+            offset += names_length + len(_padding(names_length))
+
+            sources, targets = read('q', edge_count), read('q', edge_count)
+
+            if len(names) != vertex_count or (edge_count > 0 and not (0 <= min(min(sources), min(targets)) and max(max(sources), max(targets)) < vertex_count)):
+                log_to_file(message=f"Cannot load local graph from {file_name}: the vertices do not match the header.", urgency=2)
+                return
+
+            graph = igraph.Graph(n=vertex_count, edges=list(zip(sources, targets)))
+
+            if flags & SNAPSHOT_HAS_INTERVALS:
+                graph.es['start'] = read('d', edge_count).tolist()
+                graph.es['end'] = read('d', edge_count).tolist()
+
+            if flags & SNAPSHOT_HAS_TYPES:
+                type_names = view[offset:offset + types_length].decode().split('\0') if type_count > 0 else []
+                offset += types_length + len(_padding(types_length))
+
+                graph.vs['type'] = [type_names[i] if i >= 0 else None for i in read('i', vertex_count)]
+
+        finally:
+            view.close()
+
+        self.graph = graph
+
+        self._set_names(names)
+
+        self.time = None if math.isnan(time) else time
+
+        self._clear_views()
+
+        log_to_file(message=f"Loaded local graph of {vertex_count} vertices and {edge_count} edges from {file_name}, that took {(datetime.now() - now).total_seconds()} seconds.")
+
+
     def visualize_graph(self, target: str) -> None:
         """
         Export the graph as an image to :param target:.
@@ -103,5 +780,5 @@ class LocalGraph():
         :type target: str
         """
 
-        igraph.plot(self.graph, target=target)
+        igraph.plot(self.graph, target=target, vertex_label=self.names())
     
\ No newline at end of file
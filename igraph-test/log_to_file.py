@@ -3,14 +3,283 @@ log_to_file.py
 
 Contains methods for outputting log data into a text file.
 
+Messages are queued in memory and written by a background thread (see BufferedLogger), so logging does not wait on disk I/O.
+
 Anatoly Zavyalov, 2021
 """
 
-from datetime import datetime
+import atexit
+import os
+import queue
+import sys
+import threading
+import time
+
+
+# The names of the urgency levels accepted by log_to_file.
+URGENCY_NAMES = {0: "INFO", 1: "WARN", 2: "ERROR"}
+
+
+class BufferedLogger():
+    """
+    Writes log messages to a file from a background thread.
+
+    Messages of a known urgency (see URGENCY_NAMES) below :ivar min_urgency: are dropped before being queued; messages of any other
+    urgency are written as "UNDEF", like log_to_file always did. If :ivar max_bytes: is positive, the file is rotated once it grows
+    past :ivar max_bytes:: file_location is renamed to file_location.1, file_location.1 to file_location.2 and so on, keeping at most
+    :ivar backup_count: old files.
+
+    :ivar file_location: The location of the log file to output to.
+    :ivar min_urgency: The lowest urgency level that is written.
+    :ivar max_bytes: The size in bytes after which the file is rotated, or 0 to never rotate.
+    :ivar backup_count: The number of rotated files to keep.
+    """
+
+    file_location: str
+
+    min_urgency: int
+
+    max_bytes: int
+
+    backup_count: int
+
+
+    def __init__(self, file_location: str, min_urgency: int=0, max_bytes: int=0, backup_count: int=5) -> None:
+        """
+        Instantiate the logger and start its writer thread.
+
+        :param file_location: The location of the log file to output to.
+        :type file_location: str
+        :param min_urgency: The lowest urgency level that is written, defaults to 0
+        :type min_urgency: int, optional
+        :param max_bytes: The size in bytes after which the file is rotated, or 0 to never rotate, defaults to 0
+        :type max_bytes: int, optional
+        :param backup_count: The number of rotated files to keep, defaults to 5
+        :type backup_count: int, optional
+        """
+
+        self.file_location = file_location
+        self.min_urgency = min_urgency
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+
+        self._queue = queue.Queue()
+
+        self._closed = False
+
+        # Held around the closed check and the enqueue in log(), so that no message is queued behind the sentinel of close().
+        self._lock = threading.Lock()
+
+        # strftime is only called once per second of log messages.
+        self._last_second, self._last_timestamp = None, None
+
+        self._thread = threading.Thread(target=self._run, name=f"log_to_file({file_location})", daemon=True)
+        self._thread.start()
+
+
+    def log(self, message: str, urgency: int=0) -> None:
+        """
+        Queue a log message, unless its urgency is a known level below self.min_urgency.
+
+        :param message: The message to log
+        :type message: str
+        :param urgency: The urgency level of the log message, defaults to 0
+        :type urgency: int, optional
+        """
+
+        if urgency in URGENCY_NAMES and urgency < self.min_urgency:
+            return
+
+        with self._lock:
+            if not self._closed:
+                self._queue.put((time.time(), urgency, message))
+                return
+
+        # The writer thread is stopping or gone (e.g. during interpreter shutdown), so wait for it to write the queued messages, then
+        # write directly.
+        self._thread.join()
+
+        with self._lock:
+            with open(self.file_location, 'a') as file:
+                file.write(self._format(time.time(), urgency, message))
+
+
+    def flush(self) -> None:
+        """
+        Block until every message queued so far has been written to the file.
+        """
+
+        if not self._closed:
+            self._queue.join()
+
+
+    def close(self) -> None:
+        """
+        Write all queued messages and stop the writer thread.
+        """
+
+        with self._lock:
+            if self._closed:
+                return
+
+            self._closed = True
+
+            self._queue.put(None)
+
+        self._thread.join()
+
+
+    def _format(self, timestamp: float, urgency: int, message: str) -> str:
+        """
+        Format a log message as `[TIME] | [URGENCY] | [MESSAGE]`.
+        """
+
+        second = int(timestamp)
+
+        if second != self._last_second:
+            self._last_second, self._last_timestamp = second, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(second))
+
+        return f'{self._last_timestamp} \t | \t {URGENCY_NAMES.get(urgency, "UNDEF")} \t | \t {message}\n'
+
+
+    def _rotate(self) -> None:
+        """
+        Rename the log file and its rotated copies, deleting the oldest one.
+        """
+
+        for i in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(f'{self.file_location}.{i}'):
+                os.replace(f'{self.file_location}.{i}', f'{self.file_location}.{i + 1}')
+
+        if self.backup_count > 0:
+            os.replace(self.file_location, f'{self.file_location}.1')
+        else:
+            os.remove(self.file_location)
+
+
+    def _run(self) -> None:
+        """
+        Writer thread: write queued messages in batches until close() is called.
+
+        An error while writing or rotating is reported to stderr and the batch is dropped, but the thread keeps draining the queue (and
+        reopens the file for the next batch), so that flush() and close() never wait on a dead thread.
+        """
+
+        file = None
+
+        done = False
+
+        while not done:
+
+            # Wait for a message, then take everything else already queued so that it is written with one write() call.
+            batch = [self._queue.get()]
+
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                lines = []
+
+                for record in batch:
+                    if record is None:
+                        done = True
+                    else:
+                        lines.append(self._format(*record))
+
+                if len(lines) == 0:
+                    continue
+
+                if file is None:
+                    file = open(self.file_location, 'a')
+
+                file.write(''.join(lines))
+                file.flush()
+
+                if self.max_bytes > 0 and file.tell() >= self.max_bytes:
+                    file.close()
+                    file = None
+                    self._rotate()
+
+            except Exception as e:
+                print(f"log_to_file: could not write {len(batch)} messages to {self.file_location}. {e}", file=sys.stderr)
+
+                if file is not None:
+                    try:
+                        file.close()
+                    except Exception:
+                        pass
+
+                    file = None
+
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+        if file is not None:
+            file.close()
+
+
+# Dictionary of style {..., file_location: BufferedLogger, ...} of the loggers used by log_to_file.
+_loggers = {}
+
+_loggers_lock = threading.Lock()
+
+
+def get_logger(file_location: str='log.txt', **kwargs) -> BufferedLogger:
+    """Return the BufferedLogger writing to :param file_location:, creating it if it does not exist.
+
+    :param file_location: The location of the log file, defaults to 'log.txt'
+    :type file_location: str, optional
+    :param kwargs: Keyword arguments passed on to the BufferedLogger constructor if it is created, or set on the existing logger otherwise (min_urgency, max_bytes, backup_count).
+    :return: The logger of :param file_location:.
+    :rtype: BufferedLogger
+    """
+
+    with _loggers_lock:
+
+        logger = _loggers.get(file_location)
+
+        if logger is None:
+            logger = _loggers[file_location] = BufferedLogger(file_location, **kwargs)
+
+        else:
+            for (key, value) in kwargs.items():
+                setattr(logger, key, value)
+
+    return logger
+
+
+def flush_logs() -> None:
+    """Block until every message logged so far has been written.
+    """
+
+    for logger in list(_loggers.values()):
+        logger.flush()
+
+
+def close_logs() -> None:
+    """Write all queued messages and stop the writer threads. Called automatically when the interpreter exits.
+    """
+
+    with _loggers_lock:
+        loggers = list(_loggers.values())
+        _loggers.clear()
+
+    for logger in loggers:
+        logger.close()
+
+
+atexit.register(close_logs)
+
 
 def log_to_file(message: str, urgency: int=0, file_location: str='log.txt') -> None:
     """Append a log message to :param file_location: with the format `[TIME] | :param urgency: | :param message:`. Time will be added automatically.
 
+    The message is queued and written by a background thread; call flush_logs() to wait for it to be written.
+
     :param message: The message to log
     :type message: str
     :param urgency: The urgency level of the log message. 0 is "INFO", 1 is "WARN", 2 is "ERROR", "UNDEF" otherwise.
@@ -19,21 +288,12 @@ def log_to_file(message: str, urgency: int=0, file_location: str='log.txt') -> N
     :type file_location: str, optional
     """
 
-    # Using 'with' will automatically close the log file.
-    with open(file_location, 'a') as file:
-
-        if urgency == 0:
-            urgency_msg = "INFO"
+    logger = _loggers.get(file_location)
 
-        elif urgency == 1:
-            urgency_msg = "WARN"
-
-        elif urgency == 2:
-            urgency_msg = "ERROR"
-
-        else:
-            urgency_msg = "UNDEF"
+    if logger is None:
+        logger = get_logger(file_location)
 
-            log_to_file(message=f"Urgency value out of bounds: {urgency}, expected: 0, 1, 2.", urgency=1)
+    logger.log(message, urgency)
 
-        file.write(f'{datetime.now().strftime("%Y-%m-%d %H:%M:%S")} \t | \t {urgency_msg} \t | \t {message}\n')
+    if urgency not in URGENCY_NAMES:
+        logger.log(f"Urgency value out of bounds: {urgency}, expected: 0, 1, 2.", 1)
@@ -0,0 +1,100 @@
+"""
+lru_cache.py
+
+Contains the LRUCache class, a bounded dictionary that evicts its least recently used entries.
+Used by GraphInterface to remember results of lookups that would otherwise need a round trip to the Gremlin server.
+
+Anatoly Zavyalov, 2021
+"""
+
+from collections import OrderedDict
+
+
+class LRUCache():
+    """
+    A dictionary holding at most :ivar max_size: entries. Reading or writing an entry marks it as the most recently used,
+    and adding an entry to a full cache evicts the least recently used one.
+
+    :ivar max_size: The maximum number of entries the cache holds. A value of 0 disables the cache.
+    :ivar entries: An OrderedDict of the entries, from least to most recently used.
+    """
+
+    max_size: int
+
+    entries: OrderedDict
+
+
+    def __init__(self, max_size: int) -> None:
+        """
+        Instantiate an empty cache.
+
+        :param max_size: The maximum number of entries the cache holds. A value of 0 disables the cache.
+        :type max_size: int
+        """
+
+        self.max_size = max_size
+
+        self.entries = OrderedDict()
+
+
+    def get(self, key, default=None):
+        """
+        Return the value of :param key:, or :param default: if it is not cached.
+
+        :param key: The key to look up.
+        :param default: What to return if :param key: is not cached, defaults to None
+        :return: The cached value or :param default:.
+        """
+
+        if key not in self.entries:
+            return default
+
+        self.entries.move_to_end(key)
+
+        return self.entries[key]
+
+
+    def put(self, key, value) -> None:
+        """
+        Cache :param value: under :param key:, evicting the least recently used entry if the cache is full.
+
+        :param key: The key to cache the value under.
+        :param value: The value to cache.
+        """
+
+        if self.max_size <= 0:
+            return
+
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+
+    def pop(self, key, default=None):
+        """
+        Remove :param key: from the cache and return its value, or :param default: if it is not cached.
+
+        :param key: The key to remove.
+        :param default: What to return if :param key: is not cached, defaults to None
+        :return: The removed value or :param default:.
+        """
+
+        return self.entries.pop(key, default)
+
+
+    def clear(self) -> None:
+        """
+        Remove all entries from the cache.
+        """
+
+        self.entries.clear()
+
+
+    def __contains__(self, key) -> bool:
+        return key in self.entries
+
+
+    def __len__(self) -> int:
+        return len(self.entries)
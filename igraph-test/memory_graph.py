@@ -0,0 +1,256 @@
+"""
+memory_graph.py
+
+Contains the MemoryGraph class, a pure-Python, in-process store of a HIRAX-style graph.
+Used by GraphInterface(backend='memory') in place of the Gremlin server, so that workloads that fit in memory run without any round trips.
+
+Anatoly Zavyalov, 2021
+"""
+
+from gremlin_python.structure.graph import Vertex, Edge, Path
+
+from interval_index import IntervalIndex
+
+from property_history import PropertyHistory
+
+
+class MemoryGraph():
+    """
+    An in-process graph of 'component' and 'type' vertices, 'type' edges and temporal 'connection' edges.
+
+    Vertices and edges have integer IDs. Vertices are indexed by (label, name), components by their types, and 'connection' edges by
+    their endpoints and by their [start, end) intervals (see IntervalIndex), which covers every lookup GraphInterface needs.
+
+    :ivar open_end: The 'end' of a connection that has not been terminated.
+    :ivar vertices: Dictionary of style {..., id: (label, name), ...}.
+    :ivar vertex_ids: Dictionary of style {..., (label, name): id, ...}, the property index of the vertices.
+    :ivar vertex_types: Dictionary of style {..., component_id: set of type_ids, ...} of the 'type' edges.
+    :ivar edges: Dictionary of style {..., edge_id: [out_id, in_id, start, end], ...} of the 'connection' edges.
+    :ivar adjacency: Dictionary of style {..., vertex_id: list of edge_ids, ...} of the 'connection' edges of each vertex.
+    :ivar connections: An IntervalIndex of the 'connection' edges, with pairs in the order of GraphInterface.get_connected_vertices_at_time.
+    :ivar property_histories: Dictionary of style {..., component_id: PropertyHistory, ...} of the property vertices of the components.
+    """
+
+    open_end: float
+
+    vertices: dict
+
+    vertex_ids: dict
+
+    vertex_types: dict
+
+    edges: dict
+
+    adjacency: dict
+
+    connections: IntervalIndex
+
+    property_histories: dict
+
+
+    def __init__(self, open_end: float) -> None:
+        """
+        Instantiate an empty graph.
+
+        :param open_end: The 'end' of a connection that has not been terminated.
+        :type open_end: float
+        """
+
+        self.open_end = open_end
+
+        self.connections = IntervalIndex(open_end=open_end)
+
+        self.clear()
+
+
+    def clear(self) -> None:
+        """
+        Remove all vertices and edges.
+        """
+
+        self.vertices = {}
+        self.vertex_ids = {}
+        self.vertex_types = {}
+        self.edges = {}
+        self.adjacency = {}
+        self.property_histories = {}
+
+        self.connections.clear()
+
+        # Vertex and edge IDs share one counter, like in JanusGraph.
+        self._next_id = 0
+
+        # The number of vertices of each name, over all labels.
+        self._name_counts = {}
+
+
+    def _new_id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+
+    def add_vertex(self, label: str, name: str) -> int:
+        """
+        Add a vertex and return its ID. If a vertex of the same label and name exists, the index keeps pointing to the first one.
+
+        :param label: The label of the vertex.
+        :type label: str
+        :param name: The 'name' property of the vertex.
+        :type name: str
+        :return: The ID of the new vertex.
+        :rtype: int
+        """
+
+        vertex_id = self._new_id()
+
+        self.vertices[vertex_id] = (label, name)
+
+        self.vertex_ids.setdefault((label, name), vertex_id)
+
+        self._name_counts[name] = self._name_counts.get(name, 0) + 1
+
+        return vertex_id
+
+
+    def vertex_id(self, label: str, name: str):
+        """
+        Return the ID of the vertex with label :param label: and 'name' property of :param name:, or None if it does not exist.
+        """
+
+        return self.vertex_ids.get((label, name))
+
+
+    def has_name(self, name: str) -> bool:
+        """
+        Return whether a vertex of any label has the 'name' property :param name:.
+        """
+
+        return name in self._name_counts
+
+
+    def add_type_edge(self, component_id: int, type_id: int) -> None:
+        """
+        Add a 'type' edge from the component vertex of ID :param component_id: to the type vertex of ID :param type_id:.
+        """
+
+        self.vertex_types.setdefault(component_id, set()).add(type_id)
+
+
+    def set_property(self, component_id: int, key: str, value, time: float) -> None:
+        """
+        Same as GraphInterface.set_property, for the component vertex of ID :param component_id:.
+        """
+
+        self.property_histories.setdefault(component_id, PropertyHistory()).set(key, value, time)
+
+
+    def add_connection(self, out_id: int, in_id: int, start: float, end: float) -> int:
+        """
+        Add a 'connection' edge from :param out_id: to :param in_id: that existed during [:param start:, :param end:) and return its ID.
+        """
+
+        edge_id = self._new_id()
+
+        self.edges[edge_id] = [out_id, in_id, start, end]
+
+        self.adjacency.setdefault(out_id, []).append(edge_id)
+        self.adjacency.setdefault(in_id, []).append(edge_id)
+
+        self.connections.add(self.vertices[in_id][1], self.vertices[out_id][1], start, end)
+
+        return edge_id
+
+
+    def set_connection(self, id1: int, id2: int, time: float, connection: bool) -> None:
+        """
+        Same as GraphInterface.set_connection, for the component vertices of IDs :param id1: and :param id2:.
+        """
+
+        between = [edge_id for edge_id in self.adjacency.get(id1, []) if id2 in self.edges[edge_id][:2]]
+
+        if connection:
+            if not any(self.edges[edge_id][2] <= time < self.edges[edge_id][3] for edge_id in between):
+                self.add_connection(id1, id2, time, self.open_end)
+
+        else:
+            for edge_id in between:
+                if self.edges[edge_id][3] == self.open_end:
+                    self.edges[edge_id][3] = time
+
+            self.connections.disconnect(self.vertices[id2][1], self.vertices[id1][1], time)
+
+
+    def find_paths(self, id1: int, id2: int, avoid_type_id, time: float, max_depth: int=None) -> list:
+        """
+        Same as GraphInterface.find_paths, for the component vertices of IDs :param id1: and :param id2:.
+
+        :param avoid_type_id: ID of the type vertex of the components to avoid, or None.
+        :param max_depth: The maximum number of edges of a path, defaults to None (unbounded)
+        :type max_depth: int, optional
+        :return: A list of gremlin_python Path objects of alternating Vertex and Edge objects, like the ones returned by the Gremlin server.
+        :rtype: list[Path]
+        """
+
+        return list(self.iter_paths(id1, id2, avoid_type_id, time, max_depth))
+
+
+    def iter_paths(self, id1: int, id2: int, avoid_type_id, time: float, max_depth: int=None):
+        """
+        Generator version of find_paths, yielding each path as soon as it is found. Paths are yielded shortest first.
+
+        :rtype: Generator[Path, None, None]
+        """
+
+        # Breadth-first, like repeat(...simplePath()).until(...): each entry is the list of vertex and edge IDs of a path so far.
+        frontier = [[id1]]
+
+        depth = 0
+
+        while len(frontier) > 0 and (max_depth is None or depth < max_depth):
+
+            depth += 1
+
+            next_frontier = []
+
+            for path in frontier:
+
+                vertex_id = path[-1]
+
+                for edge_id in self.adjacency.get(vertex_id, []):
+
+                    out_id, in_id, start, end = self.edges[edge_id]
+
+                    if not start <= time < end:
+                        continue
+
+                    other_id = in_id if out_id == vertex_id else out_id
+
+                    # simplePath(), and the not_() on the type of the vertex stepped onto.
+                    if other_id in path[::2] or (avoid_type_id is not None and avoid_type_id in self.vertex_types.get(other_id, ())):
+                        continue
+
+                    if other_id == id2:
+                        yield self._path(path + [edge_id, other_id])
+                    else:
+                        next_frontier.append(path + [edge_id, other_id])
+
+            frontier = next_frontier
+
+
+    def _path(self, ids: list) -> Path:
+        """
+        Return a gremlin_python Path of the alternating vertex and edge IDs :param ids:.
+        """
+
+        objects = []
+
+        for (i, element_id) in enumerate(ids):
+
+            if i % 2 == 0:
+                objects.append(Vertex(element_id, self.vertices[element_id][0]))
+
+            else:
+                out_id, in_id, _, _ = self.edges[element_id]
+                objects.append(Edge(element_id, Vertex(out_id, self.vertices[out_id][0]), 'connection', Vertex(in_id, self.vertices[in_id][0])))
+
+        return Path([set() for _ in objects], objects)
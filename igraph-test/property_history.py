@@ -0,0 +1,104 @@
+"""
+property_history.py
+
+Contains the PropertyHistory class, the time-sorted history of the properties of one component, used to answer as-of reads of the
+property vertices of GraphInterface (see demo_notebooks/property_vertices.ipynb) without querying the graph again.
+
+Anatoly Zavyalov, 2021
+"""
+
+from bisect import bisect_right
+
+
+class PropertyHistory():
+    """
+    The values every property of a component had over time.
+
+    Each key has a sorted list of times and the list of values set at those times, so the value of a key at a time is found by a
+    binary search, in O(log n) for n changes of the key.
+
+    :ivar times: Dictionary of style {..., key: sorted list of times, ...}.
+    :ivar values: Dictionary of style {..., key: list of values, ...}, parallel to :ivar times:.
+    """
+
+    times: dict
+
+    values: dict
+
+
+    def __init__(self, changes: list=()) -> None:
+        """
+        Instantiate the history from a list of changes, in any order.
+
+        :param changes: A list of (key, value, time) 3-tuples, defaults to ()
+        :type changes: list[tuple[str, Any, float]], optional
+        """
+
+        self.times = {}
+        self.values = {}
+
+        # sorted() is stable, so of two changes of a key at the same time the one given last wins.
+        for (key, value, time) in sorted(changes, key=lambda change: change[2]):
+            self.times.setdefault(key, []).append(time)
+            self.values.setdefault(key, []).append(value)
+
+
+    def set(self, key: str, value, time: float) -> None:
+        """
+        Record that the property :param key: was set to :param value: at :param time:.
+
+        :param key: The name of the property.
+        :type key: str
+        :param value: The new value of the property.
+        :param time: Time at which the property was set.
+        :type time: float
+        """
+
+        times, values = self.times.setdefault(key, []), self.values.setdefault(key, [])
+
+        # After any change at the same time, so that it wins.
+        i = bisect_right(times, time)
+
+        times.insert(i, time)
+        values.insert(i, value)
+
+
+    def get(self, key: str, time: float, default=None):
+        """
+        Return the value of the property :param key: at :param time:, or :param default: if it was not set yet.
+        """
+
+        times = self.times.get(key)
+
+        if times is None:
+            return default
+
+        i = bisect_right(times, time)
+
+        return self.values[key][i - 1] if i > 0 else default
+
+
+    def as_of(self, time: float) -> dict:
+        """
+        Return the properties of the component at :param time:.
+
+        :param time: Time to check.
+        :type time: float
+        :return: A dictionary of style {..., key: value, ...} of the properties set at or before :param time:.
+        :rtype: dict
+        """
+
+        properties = {}
+
+        for (key, times) in self.times.items():
+
+            i = bisect_right(times, time)
+
+            if i > 0:
+                properties[key] = self.values[key][i - 1]
+
+        return properties
+
+
+    def __len__(self) -> int:
+        return sum(len(times) for times in self.times.values())
@@ -0,0 +1,163 @@
+"""
+reachability_index.py
+
+Contains the ReachabilityIndex class, which caches the connected components of the snapshots of a graph per change-point epoch.
+Used by GraphInterface to answer whether two components are connected through any signal chain at a time without a path query.
+
+Anatoly Zavyalov, 2021
+"""
+
+from local_graph import LocalGraph
+
+from lru_cache import LRUCache
+
+
+class _Components():
+    """
+    The connected components of one epoch.
+
+    :ivar labels: Dictionary of style {..., component_id: label, ...} of the component label of every connected vertex, by interned component ID (see component_ids.py).
+    :ivar members: Dictionary of style {..., label: list of component IDs, ...}.
+    :ivar next_label: A label not used by :ivar members:.
+    """
+
+    __slots__ = ('labels', 'members', 'next_label')
+
+    def __init__(self, labels: dict, members: dict, next_label: int) -> None:
+        self.labels = labels
+        self.members = members
+        self.next_label = next_label
+
+
+class ReachabilityIndex():
+    """
+    A bounded cache of connected-component labelings, keyed by epoch like SnapshotCache.
+
+    Once the labeling of an epoch is built, whether two vertices are connected is a comparison of two labels, in O(1). A connection
+    made at a new change point is applied incrementally to the labeling of the epoch before it, by relabeling the smaller of the two
+    merged components; any other change drops the labelings it affects, which are rebuilt on their next use.
+
+    The types of the components, which reports over the labelings (such as GraphInterface.unreachable_at) need on every call, are
+    kept next to them in :ivar component_types: until the index is cleared.
+
+    :ivar components: A LRUCache mapping the start of an epoch to its _Components.
+    :ivar component_types: Dictionary of style {..., name: type, ...} of the types of the components, or None until it is set.
+    """
+
+    components: LRUCache
+
+    component_types: dict
+
+
+    def __init__(self, max_size: int) -> None:
+        """
+        Instantiate an empty index.
+
+        :param max_size: The maximum number of epochs to keep.
+        :type max_size: int
+        """
+
+        self.components = LRUCache(max_size=max_size)
+
+        self.component_types = None
+
+
+    def clear(self) -> None:
+        """
+        Forget all labelings and the types of the components.
+        """
+
+        self.components.clear()
+
+        self.component_types = None
+
+
+    def get(self, epoch: float) -> _Components:
+        """
+        Return the labeling of the epoch starting at :param epoch:, or None if it is not cached.
+        """
+
+        return self.components.get(epoch)
+
+
+    def build(self, epoch: float, local_graph: LocalGraph) -> _Components:
+        """
+        Label the connected components of :param local_graph:, the snapshot of the epoch starting at :param epoch:, and cache them.
+
+        :param epoch: The start of the epoch.
+        :type epoch: float
+        :param local_graph: The snapshot of the epoch.
+        :type local_graph: LocalGraph
+        :rtype: _Components
+        """
+
+        membership = local_graph.graph.connected_components().membership
+
+        # The labels are keyed by component ID, so that building them does not decode the names of the snapshot.
+        labels = dict(zip(local_graph.vertex_ids, membership))
+
+        members = {}
+
+        for (component_id, label) in labels.items():
+            members.setdefault(label, []).append(component_id)
+
+        components = _Components(labels, members, max(membership, default=-1) + 1)
+
+        self.components.put(epoch, components)
+
+        return components
+
+
+    def record_change(self, time: float, parent: float=None, pair: tuple=None, connection: bool=None) -> None:
+        """
+        Record that a connection started or ended at :param time:, dropping the labelings of the epochs starting at or after it.
+
+        If :param time: is a new change point, the epoch it starts only differs from the epoch :param parent: it splits by this one change,
+        so a new connection of :param pair: is applied to a copy of the labeling of :param parent: instead of being rebuilt.
+
+        :param time: Time at which a connection was changed.
+        :type time: float
+        :param parent: The start of the epoch :param time: splits, if :param time: is a new change point, defaults to None
+        :type parent: float, optional
+        :param pair: The component IDs of the two vertices whose connection changed, defaults to None
+        :type pair: tuple[int, int], optional
+        :param connection: True if the connection was made, False otherwise, defaults to None
+        :type connection: bool, optional
+        """
+
+        for epoch in [epoch for epoch in self.components.entries if epoch >= time]:
+            self.components.pop(epoch)
+
+        if parent is None or pair is None or not connection:
+            return
+
+        before = self.components.get(parent)
+
+        if before is None:
+            return
+
+        after = _Components(dict(before.labels), dict(before.members), before.next_label)
+
+        for component_id in pair:
+            if component_id not in after.labels:
+                after.labels[component_id] = after.next_label
+                after.members[after.next_label] = [component_id]
+                after.next_label += 1
+
+        label1, label2 = after.labels[pair[0]], after.labels[pair[1]]
+
+        if label1 != label2:
+
+            small, large = (label1, label2) if len(after.members[label1]) < len(after.members[label2]) else (label2, label1)
+
+            # The lists are shared with :param parent:, so the merged one is a new list.
+            after.members[large] = after.members[large] + after.members[small]
+
+            for component_id in after.members.pop(small):
+                after.labels[component_id] = large
+
+        self.components.put(time, after)
+
+
+    def __len__(self) -> int:
+        return len(self.components)
@@ -0,0 +1,134 @@
+"""
+snapshot_cache.py
+
+Contains the SnapshotCache class, which caches LocalGraph snapshots of a graph per change-point epoch.
+Used by GraphInterface so that queries at different times between the same two connection changes reuse one LocalGraph.
+
+Anatoly Zavyalov, 2021
+"""
+
+from bisect import bisect_right, insort
+
+from local_graph import LocalGraph
+
+from lru_cache import LRUCache
+
+
+class SnapshotCache():
+    """
+    A bounded cache of LocalGraph snapshots, keyed by epoch.
+
+    The change points are the times at which any connection started or ended. Every time in [change_points[i], change_points[i + 1])
+    sees the same connections, so an epoch is identified by the change point it starts at (or -inf for the times before the first one).
+
+    :ivar change_points: The sorted list of change points, or None if they have not been loaded yet.
+    :ivar snapshots: A LRUCache mapping the start of an epoch to the LocalGraph of that epoch.
+    """
+
+    change_points: list
+
+    snapshots: LRUCache
+
+
+    def __init__(self, max_size: int) -> None:
+        """
+        Instantiate an empty cache.
+
+        :param max_size: The maximum number of snapshots to keep.
+        :type max_size: int
+        """
+
+        self.snapshots = LRUCache(max_size=max_size)
+
+        self.clear()
+
+
+    def clear(self) -> None:
+        """
+        Forget all change points and snapshots.
+        """
+
+        self.change_points = None
+
+        self.snapshots.clear()
+
+
+    def set_change_points(self, change_points: list) -> None:
+        """
+        Replace the change points, dropping all snapshots.
+
+        :param change_points: The times at which any connection started or ended, in any order.
+        :type change_points: list[float]
+        """
+
+        self.change_points = sorted(set(change_points))
+
+        self.snapshots.clear()
+
+
+    def epoch_of(self, time: float) -> float:
+        """
+        Return the start of the epoch containing :param time:. The change points must be loaded.
+
+        :param time: Time to look up.
+        :type time: float
+        :return: The largest change point at or before :param time:, or -inf if there is none.
+        :rtype: float
+        """
+
+        i = bisect_right(self.change_points, time)
+
+        return self.change_points[i - 1] if i > 0 else float('-inf')
+
+
+    def get(self, time: float) -> LocalGraph:
+        """
+        Return the cached snapshot of the epoch containing :param time:, or None if it is not cached.
+
+        :param time: Time to look up.
+        :type time: float
+        :rtype: LocalGraph
+        """
+
+        return self.snapshots.get(self.epoch_of(time))
+
+
+    def put(self, time: float, local_graph: LocalGraph) -> None:
+        """
+        Cache :param local_graph: as the snapshot of the epoch containing :param time:.
+
+        :param time: Time the snapshot was taken at.
+        :type time: float
+        :param local_graph: The snapshot.
+        :type local_graph: LocalGraph
+        """
+
+        self.snapshots.put(self.epoch_of(time), local_graph)
+
+
+    def record_change(self, time: float) -> None:
+        """
+        Record that a connection started or ended at :param time:.
+
+        This changes the graph at every time from :param time: on, so exactly the snapshots of the epochs starting at or after
+        :param time: are dropped. The epoch that :param time: splits keeps its start, and its snapshot is still valid for the
+        times before :param time:.
+
+        :param time: Time at which a connection was changed.
+        :type time: float
+        """
+
+        if self.change_points is None:
+            return
+
+        i = bisect_right(self.change_points, time)
+
+        if i == 0 or self.change_points[i - 1] != time:
+            insort(self.change_points, time)
+
+        for epoch in [epoch for epoch in self.snapshots.entries if epoch >= time]:
+            self.snapshots.pop(epoch)
+
+
+    def __len__(self) -> int:
+        return len(self.snapshots)
@@ -0,0 +1,139 @@
+"""
+test_connection_log.py
+
+Contains tests of the change logs of connection_log.py.
+
+Anatoly Zavyalov, 2021
+"""
+
+import math
+import random
+
+import connection_log
+from workload_generator import WorkloadGenerator
+
+
+def test_encode_entry():
+    assert connection_log.encode_entry(42, True) == '10000000042'
+    assert connection_log.encode_entry(0, False) == '00000000000'
+
+
+def test_is_valid_time():
+    assert connection_log.is_valid_time(0)
+    assert connection_log.is_valid_time(5.0)
+    assert connection_log.is_valid_time(connection_log.MAX_TIME)
+
+    assert not connection_log.is_valid_time(0.5)
+    assert not connection_log.is_valid_time(-1)
+    assert not connection_log.is_valid_time(connection_log.MAX_TIME + 1)
+    assert not connection_log.is_valid_time(math.inf)
+    assert not connection_log.is_valid_time(-math.inf)
+    assert not connection_log.is_valid_time(math.nan)
+
+
+def test_state_at():
+    log = connection_log.from_intervals([(10, 20), (30, 2**63 - 1)], open_end=2**63 - 1)
+
+    assert not connection_log.state_at(log, 9.5)
+    assert connection_log.state_at(log, 10)
+    assert connection_log.state_at(log, 19.9)
+    assert not connection_log.state_at(log, 20)
+    assert connection_log.state_at(log, 10**12)
+    assert not connection_log.state_at(log, -1)
+
+
+def test_append_in_order():
+    log = connection_log.append('', 10, True)
+    log = connection_log.append(log, 20, False)
+
+    assert connection_log.entries(log) == [(10, True), (20, False)]
+
+    # Already disconnected.
+    assert connection_log.append(log, 25, False) is None
+    assert connection_log.append('', 5, False) is None
+
+
+def test_append_out_of_order_drops_redundant_following_entry():
+    log = connection_log.from_intervals([(0, 10), (20, 30)], open_end=None)
+
+    # Reconnecting at 15 makes the reconnection at 20 redundant.
+    log = connection_log.append(log, 15, True)
+
+    assert connection_log.entries(log) == [(0, True), (10, False), (15, True), (30, False)]
+
+
+def test_append_at_the_time_of_the_previous_entry_cancels_it():
+    log = connection_log.from_intervals([(0, 10)], open_end=None)
+
+    # Reconnecting at the time of the disconnection: the connection never broke.
+    assert connection_log.entries(connection_log.append(log, 10, True)) == [(0, True)]
+
+    # Disconnecting at the time of the connection: the connection never existed.
+    assert connection_log.append(connection_log.append('', 0, True), 0, False) == ''
+
+
+def test_append_keeps_log_normalized():
+    rng = random.Random(0)
+
+    for _ in range(200):
+
+        log = ''
+
+        # The expected state at every time, updated like a connection that changes at time and keeps that state until the next change.
+        states = [False] * 12
+
+        for _ in range(8):
+
+            time, connection = rng.randint(0, 10), rng.random() < 0.5
+
+            changes = [t for (t, _) in connection_log.entries(log) if t > time]
+
+            for t in range(time, min(changes, default=12)):
+                states[t] = connection
+
+            new_log = connection_log.append(log, time, connection)
+
+            if new_log is not None:
+                log = new_log
+
+            entries = connection_log.entries(log)
+
+            assert all(a[1] != b[1] and a[0] < b[0] for (a, b) in zip(entries, entries[1:]))
+            assert [connection_log.state_at(log, t) for t in range(12)] == states
+
+
+def test_intervals_round_trip():
+    open_end = 2**63 - 1
+
+    intervals = [(0, 10), (15, 20), (30, open_end)]
+
+    assert connection_log.to_intervals(connection_log.from_intervals(intervals, open_end), open_end) == intervals
+
+
+def test_spare_logs_only_hold_their_own_changes():
+    # Few enough serials per type that every dish has a single spare balun, which is then put back and forth.
+    workload = WorkloadGenerator(dishes=333333, churn_rate=0.01, history=40000, weights={'balun_swap': 1}, seed=0)
+
+    assert workload.spares == 1
+
+    _, events = workload.dish(1)
+
+    logs = {}
+
+    for (name1, name2, time, connection) in events:
+        key = frozenset((name1, name2))
+        logs[key] = connection_log.append(logs.get(key, ''), time, connection) or logs[key]
+
+    spare = workload._spare('BLN', 1, 0)
+
+    swapped_in = min(time for (name1, name2, time, connection) in events if spare in (name1, name2))
+
+    spare_logs = {key: log for (key, log) in logs.items() if spare in key}
+
+    assert len(spare_logs) >= 3
+
+    # The balun the spare replaced already had a history, but the log of every pair of the spare only holds the changes of that pair.
+    for (key, log) in spare_logs.items():
+        assert connection_log.entries(log) == [(time, connection) for (name1, name2, time, connection) in events if frozenset((name1, name2)) == key]
+        assert connection_log.entries(log)[0][0] >= swapped_in
+        assert connection_log.entries(log)[0][1]
@@ -0,0 +1,103 @@
+"""
+test_find_paths_batch.py
+
+Contains tests of GraphInterface.find_paths_batch, on the 'memory' backend and against a fake remote connection.
+
+Anatoly Zavyalov, 2021
+"""
+
+import pytest
+
+from gremlin_python.driver.remote_connection import RemoteConnection, RemoteTraversal
+from gremlin_python.process.traversal import Traverser
+from gremlin_python.structure.graph import Graph
+
+from graph_interface import GraphInterface
+
+
+@pytest.fixture
+def gi():
+    """
+    A GraphInterface on the 'memory' backend of two dishes, each with two baluns in parallel, landing on the same RFT.
+    """
+
+    gi = GraphInterface(backend='memory')
+
+    gi.add_component('RFT000001')
+
+    for (ant, dpf, baluns) in (('ANT000001', 'DPF000001', ('BLN000001', 'BLN000002')), ('ANT000002', 'DPF000002', ('BLN000003', 'BLN000004'))):
+
+        for name in (ant, dpf, *baluns):
+            gi.add_component(name)
+
+        gi.set_connection(ant, dpf, 0, True)
+
+        for balun in baluns:
+            gi.set_connection(dpf, balun, 0, True)
+            gi.set_connection(balun, 'RFT000001', 0, True)
+
+    yield gi
+
+    gi.close()
+
+
+QUERIES = [('ANT000001', 'RFT000001', None, 5), ('ANT000002', 'RFT000001', None, 5)]
+
+
+def test_limit_applies_per_query(gi):
+    for limit in (None, 1, 2, 3):
+
+        results = gi.find_paths_batch(QUERIES, limit=limit)
+
+        assert list(results) == QUERIES
+
+        for q in QUERIES:
+            assert len(results[q]) == min(2, limit or 2)
+            assert results[q] == gi.find_paths(*q, limit=limit)
+
+
+class RecordingConnection(RemoteConnection):
+    """
+    A RemoteConnection that records the bytecode submitted to it and answers every request with :ivar result:.
+
+    :ivar result: The single result of every request.
+    :ivar submitted: The list of the bytecode submitted so far.
+    """
+
+    def __init__(self, result) -> None:
+        super().__init__(None, None)
+
+        self.result = result
+
+        self.submitted = []
+
+    def submit(self, bytecode):
+        self.submitted.append(bytecode)
+
+        return RemoteTraversal(iter([Traverser(self.result)]))
+
+
+def test_limit_is_local_to_each_query_of_a_request():
+    connection = RecordingConnection({'q0': ['path 1', 'path 2'], 'q1': ['path 3', 'path 4']})
+
+    gi = GraphInterface(backend='memory')
+
+    # Use the remote code path, through the fake connection, with the vertex IDs already cached.
+    gi.memory_graph = None
+    gi.g = Graph().traversal().withRemote(connection)
+
+    for (i, name) in enumerate(('ANT000001', 'ANT000002', 'RFT000001')):
+        gi.vertex_id_cache.put(('component', name), i)
+
+    results = gi.find_paths_batch(QUERIES, limit=2)
+
+    assert results == {QUERIES[0]: ['path 1', 'path 2'], QUERIES[1]: ['path 3', 'path 4']}
+
+    assert len(connection.submitted) == 1
+
+    modulators = [args[0] for (step, *args) in connection.submitted[0].step_instructions if step == 'by']
+
+    assert len(modulators) == 2
+
+    for modulator in modulators:
+        assert modulator.step_instructions[-2:] == [['limit', 2], ['fold']]
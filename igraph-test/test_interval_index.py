@@ -0,0 +1,149 @@
+"""
+test_interval_index.py
+
+Contains tests of the IntervalIndex class, checked against a brute-force scan of its intervals.
+
+Anatoly Zavyalov, 2021
+"""
+
+import random
+
+from interval_index import IntervalIndex
+
+
+OPEN_END = 2**63 - 1
+
+
+def connected_at(index: IntervalIndex, time: float) -> set:
+    """
+    Return the pairs of :param index: connected at :param time:, by scanning every interval.
+    """
+
+    return {IntervalIndex._key(*pair) for (pair, start, end) in index.intervals if start <= time < end}
+
+
+def keys(pairs: list) -> set:
+    return {IntervalIndex._key(*pair) for pair in pairs}
+
+
+def test_pairs_at_half_open():
+    index = IntervalIndex(open_end=OPEN_END)
+
+    index.add('ANT000001', 'DPF000001', 10, 20)
+    index.add('DPF000001', 'BLN000001', 15, OPEN_END)
+
+    assert index.pairs_at(9) == []
+    assert keys(index.pairs_at(10)) == {('ANT000001', 'DPF000001')}
+    assert keys(index.pairs_at(15)) == {('ANT000001', 'DPF000001'), ('BLN000001', 'DPF000001')}
+    assert keys(index.pairs_at(20)) == {('BLN000001', 'DPF000001')}
+
+
+def test_empty_intervals_are_never_connected():
+    index = IntervalIndex(open_end=OPEN_END)
+
+    index.add('ANT000001', 'DPF000001', 5, 5)
+
+    assert index.pairs_at(5) == []
+    assert index.overlapping(0, 10) == []
+    assert len(index) == 1
+
+
+def test_connect_and_disconnect_mirror_set_connection():
+    index = IntervalIndex(open_end=OPEN_END)
+
+    index.connect('ANT000001', 'DPF000001', 0)
+
+    # Already connected, so no second interval is opened.
+    index.connect('DPF000001', 'ANT000001', 5)
+
+    index.disconnect('ANT000001', 'DPF000001', 10)
+
+    assert len(index) == 1
+    assert index.is_connected('DPF000001', 'ANT000001', 9)
+    assert not index.is_connected('ANT000001', 'DPF000001', 10)
+
+
+def test_updates_after_queries_match_brute_force():
+    rng = random.Random(0)
+
+    names = [f'ANT{i:06d}' for i in range(6)]
+
+    index = IntervalIndex(open_end=OPEN_END)
+
+    for step in range(2000):
+
+        name1, name2 = rng.sample(names, 2)
+
+        time = rng.randint(0, 50)
+
+        if rng.random() < 0.5:
+            index.connect(name1, name2, time)
+        else:
+            index.disconnect(name1, name2, time)
+
+        # Queries build the tree, so the following updates are applied to it in place.
+        if step % 7 == 0:
+            query = rng.randint(-1, 60)
+
+            assert keys(index.pairs_at(query)) == connected_at(index, query)
+
+
+def test_deltas():
+    index = IntervalIndex(open_end=OPEN_END)
+
+    index.add('ANT000001', 'DPF000001', 0, 10)
+    index.add('DPF000001', 'BLN000001', 5, OPEN_END)
+    index.add('BLN000001', 'RFT000001', 12, 15)
+
+    added, removed = index.deltas(2, 12)
+
+    assert keys(added) == {('BLN000001', 'DPF000001'), ('BLN000001', 'RFT000001')}
+    assert keys(removed) == {('ANT000001', 'DPF000001')}
+
+    # Going back in time swaps the two lists.
+    assert index.deltas(12, 2) == (removed, added)
+
+
+def test_overlapping():
+    index = IntervalIndex(open_end=OPEN_END)
+
+    index.add('ANT000001', 'DPF000001', 0, 10)
+    index.add('DPF000001', 'BLN000001', 5, OPEN_END)
+    index.add('BLN000001', 'RFT000001', 12, 15)
+
+    assert keys(pair for (pair, _, _) in index.overlapping(10, 11)) == {('BLN000001', 'DPF000001')}
+
+
+def test_sweep_replays_changes():
+    intervals = [(('ANT000001', 'DPF000001'), 0, 10), (('DPF000001', 'BLN000001'), 5, 8)]
+
+    steps = list(IntervalIndex.sweep(intervals, 2, 20))
+
+    assert steps == [
+        (2, [('ANT000001', 'DPF000001')], []),
+        (5, [('DPF000001', 'BLN000001')], []),
+        (8, [], [('DPF000001', 'BLN000001')]),
+        (10, [], [('ANT000001', 'DPF000001')]),
+    ]
+
+
+def test_sweep_ignores_empty_and_inverted_intervals():
+    assert list(IntervalIndex.sweep([(('ANT000001', 'DPF000001'), 5, 5)], 0, 10)) == [(0, [], [])]
+    assert list(IntervalIndex.sweep([(('ANT000001', 'DPF000001'), 5, 3)], 0, 10)) == [(0, [], [])]
+
+    # A connection made and terminated at the same time, next to one that lasts.
+    steps = list(IntervalIndex.sweep([(('ANT000001', 'DPF000001'), 5, 5), (('ANT000001', 'DPF000001'), 7, 9)], 0, 10))
+
+    assert steps == [(0, [], []), (7, [('ANT000001', 'DPF000001')], []), (9, [], [('ANT000001', 'DPF000001')])]
+
+
+def test_clear():
+    index = IntervalIndex(open_end=OPEN_END)
+
+    index.add('ANT000001', 'DPF000001', 0, 10)
+    index.pairs_at(5)
+
+    index.clear()
+
+    assert len(index) == 0
+    assert index.pairs_at(5) == []
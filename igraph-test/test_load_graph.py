@@ -19,10 +19,15 @@ Anatoly Zavyalov, 2021
 """
 
 from graph_interface import GraphInterface
+from graph_interface_pool import GraphInterfacePool
 from gremlin_python.driver.protocol import GremlinServerError # Gremlin server error
 
 from log_to_file import log_to_file
 
+from hirax import dish_signal_chain
+
+from workload_generator import WorkloadGenerator
+
 from datetime import datetime
 
 import matplotlib.pyplot as plt
@@ -41,15 +46,8 @@ def clear_graph(gi: GraphInterface) -> None:
 
     log_to_file(message=f"Dropping graph!", urgency=1)
 
-    success = False
-    while not success:
-        
-        try:
-            gi.g.V().drop().iterate()
-            success = True
-
-        except GremlinServerError as e:
-            log_to_file(message=f"Error while trying to drop all vertices. {e}", urgency=1)
+    # Drops the graph in bounded chunks, retrying each with a capped backoff instead of retrying the whole drop forever.
+    gi.reset_graph()
 
     
 
@@ -243,6 +241,161 @@ def load_graph_v2(dishes: int, mod: int) -> GraphInterface:
     return gi
 
 
+def load_graph_bulk(dishes: int, mod: int, batch_size: int=GraphInterface.DEFAULT_BULK_BATCH_SIZE) -> GraphInterface:
+    """
+
+    Same as load_graph_v2, but load the signal chains with GraphInterface.bulk_load in chunked traversals instead of one traversal per component and connection.
+
+    :param dishes: Number of dishes the graph will contain.
+    :type dishes: int
+    :param mod: What to modulo each time of dish signal chain connectedness by
+    :type mod: int
+    :param batch_size: The maximum number of components or edges written per traversal, defaults to GraphInterface.DEFAULT_BULK_BATCH_SIZE
+    :type batch_size: int, optional
+    :return: A GraphInterface instance containing the graph traversal to the instantiated graph.
+    :rtype: GraphInterface
+    """
+
+    gi = GraphInterface()
+
+    # Clear entire graph.
+    clear_graph(gi)
+
+    # Correlator node name
+    cor = 'COR000000'
+
+    # Set up the types
+    types = ['COR', 'ANT', 'DPF', 'BLN', 'RFT', 'OPF', 'RFR', 'ADC']
+
+    now = datetime.now()
+
+    for t in types:
+        gi.add_type(t)
+
+    components = [(cor, 'COR')]
+
+    connections = []
+
+    for i in range(1, dishes + 1):
+
+        dish_components, dish_connections = dish_signal_chain(i=i, cor=cor, connections=[(i % mod, True), (i % mod + 1, False)])
+
+        components += dish_components
+        connections += dish_connections
+
+    stats = gi.bulk_load(components=components, connections=connections, batch_size=batch_size)
+
+    log_to_file(message=f"Graph with {dishes} dishes loaded in {len(stats)} batches, took {(datetime.now() - now).total_seconds()} total seconds.")
+
+    return gi
+
+
+def load_graph_parallel(dishes: int, mod: int, workers: int, dishes_per_chunk: int=32, batch_size: int=GraphInterface.DEFAULT_BULK_BATCH_SIZE) -> GraphInterfacePool:
+    """
+
+    Same as load_graph_bulk, but load chunks of :param dishes_per_chunk: dishes in parallel on a GraphInterfacePool of :param workers: connections.
+
+    :param dishes: Number of dishes the graph will contain.
+    :type dishes: int
+    :param mod: What to modulo each time of dish signal chain connectedness by
+    :type mod: int
+    :param workers: Number of parallel workers.
+    :type workers: int
+    :param dishes_per_chunk: Number of dishes loaded by a worker at once, defaults to 32
+    :type dishes_per_chunk: int, optional
+    :param batch_size: The maximum number of components or edges written per traversal, defaults to GraphInterface.DEFAULT_BULK_BATCH_SIZE
+    :type batch_size: int, optional
+    :return: A GraphInterfacePool containing the graph traversals to the instantiated graph.
+    :rtype: GraphInterfacePool
+    """
+
+    pool = GraphInterfacePool(size=workers)
+
+    gi = pool.interfaces[0]
+
+    # Clear entire graph.
+    clear_graph(gi)
+
+    # Correlator node name
+    cor = 'COR000000'
+
+    # Set up the types
+    types = ['COR', 'ANT', 'DPF', 'BLN', 'RFT', 'OPF', 'RFR', 'ADC']
+
+    now = datetime.now()
+
+    for t in types:
+        gi.add_type(t)
+
+    # The correlator input is shared by all signal chains, so it is added before they are loaded in parallel.
+    gi.add_component(cor)
+    gi.set_type(cor, 'COR')
+
+    def chunks():
+        for first in range(1, dishes + 1, dishes_per_chunk):
+
+            components, connections = [], []
+
+            for i in range(first, min(first + dishes_per_chunk, dishes + 1)):
+
+                dish_components, dish_connections = dish_signal_chain(i=i, cor=cor, connections=[(i % mod, True), (i % mod + 1, False)])
+
+                components += dish_components
+                connections += dish_connections
+
+            yield components, connections
+
+    results = pool.bulk_load(chunks(), batch_size=batch_size)
+
+    failed = [result['item'][0][0][0] for result in results if result['error'] is not None]
+
+    log_to_file(message=f"Graph with {dishes} dishes loaded by {workers} workers, took {(datetime.now() - now).total_seconds()} total seconds. Failed chunks starting at: {failed}")
+
+    return pool
+
+
+def load_graph_workload(workload: WorkloadGenerator, dishes_per_chunk: int=32, batch_size: int=GraphInterface.DEFAULT_BULK_BATCH_SIZE) -> GraphInterface:
+    """
+
+    Load the components and connection events of :param workload: with GraphInterface.bulk_load, one chunk of :param dishes_per_chunk: dishes at a time, so that the whole workload is never in memory.
+
+    :param workload: The workload to load.
+    :type workload: WorkloadGenerator
+    :param dishes_per_chunk: Number of dishes loaded at once, defaults to 32
+    :type dishes_per_chunk: int, optional
+    :param batch_size: The maximum number of components or edges written per traversal, defaults to GraphInterface.DEFAULT_BULK_BATCH_SIZE
+    :type batch_size: int, optional
+    :return: A GraphInterface instance containing the graph traversal to the instantiated graph.
+    :rtype: GraphInterface
+    """
+
+    gi = GraphInterface()
+
+    # Clear entire graph.
+    clear_graph(gi)
+
+    # Set up the types
+    types = ['COR', 'ANT', 'DPF', 'BLN', 'RFT', 'OPF', 'RFR', 'ADC']
+
+    now = datetime.now()
+
+    for t in types:
+        gi.add_type(t)
+
+    gi.add_component(workload.cor)
+    gi.set_type(workload.cor, 'COR')
+
+    batches, events = 0, 0
+
+    for (components, connections) in workload.chunks(dishes_per_chunk=dishes_per_chunk):
+        batches += len(gi.bulk_load(components=components, connections=connections, batch_size=batch_size))
+        events += len(connections)
+
+    log_to_file(message=f"Workload with {workload.dishes} dishes and {events} connection events loaded in {batches} batches, took {(datetime.now() - now).total_seconds()} total seconds.")
+
+    return gi
+
+
 def benchmark_paths(time: int, dishes: int, mod: int) -> None:
     """Run a benchmark performing path queries on the entire graph stored in GraphInterface and an igraph.Graph LocalGraph, and compare the two.
 
@@ -260,9 +413,7 @@ def benchmark_paths(time: int, dishes: int, mod: int) -> None:
 
     now = datetime.now()
 
-    pairs = gi.get_connected_vertices_at_time(time)
-
-    gi.local_graph.create_from_connections_undirected(pairs)
+    local_graph = gi.get_local_graph_at_time(time)
 
     subgraph_load_time = (datetime.now() - now).total_seconds()
 
@@ -286,10 +437,17 @@ def benchmark_paths(time: int, dishes: int, mod: int) -> None:
 
         now = datetime.now()
 
-        gi.local_graph.find_shortest_paths(name1=ant, name2='COR000000')
+        local_graph.find_shortest_paths(name1=ant, name2='COR000000')
 
         times2.append((datetime.now() - now).total_seconds())
 
+    # All antennas at once, with a single search from the correlator input.
+    now = datetime.now()
+
+    local_graph.find_shortest_paths_many(sources=[f'ANT{str(d).zfill(6)}' for d in dishes_to_test], target='COR000000')
+
+    batch_time = (datetime.now() - now).total_seconds()
+
     plt.plot(dishes_to_test, times1, label="Entire Graph")
     plt.plot(dishes_to_test, times2, label="igraph Subgraph")
     plt.title(f"{dishes} dishes, time {time}, modulo {mod}")
@@ -301,13 +459,14 @@ def benchmark_paths(time: int, dishes: int, mod: int) -> None:
     log_to_file(message=f"Benchmark: entire graph query times: {times1}")
     log_to_file(message=f"Benchmark: Making subgraph took {subgraph_load_time} seconds.")
     log_to_file(message=f"Benchmark: subgraph query times: {times2}")
+    log_to_file(message=f"Benchmark: batched subgraph query of all {len(dishes_to_test)} antennas took {batch_time} seconds.")
 
     log_to_file(message=f"Benchmark: total for entire graph: {sum(times1)} seconds.")
     log_to_file(message=f"Benchmark: total for subgraph: {sum(times2)} + {subgraph_load_time} = {sum(times2) + subgraph_load_time} seconds.")
 
     log_to_file(message=f"Benchmark: Finished benchmark with {dishes} dishes, modulo of {mod} and at time {time}.")
 
-    # gi.local_graph.visualize_graph('subgraph.pdf')
+    # local_graph.visualize_graph('subgraph.pdf')
 
     # gi.export_graph('test_load_graph.xml')
 
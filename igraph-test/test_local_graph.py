@@ -0,0 +1,177 @@
+"""
+test_local_graph.py
+
+Contains tests of the LocalGraph class.
+
+Anatoly Zavyalov, 2021
+"""
+
+import math
+
+import component_ids
+from local_graph import LocalGraph
+
+
+def edge_names(local_graph: LocalGraph) -> set:
+    return {tuple(sorted((local_graph.name_of(a), local_graph.name_of(b)))) for (a, b) in local_graph.graph.get_edgelist()}
+
+
+def test_create_from_connections_undirected():
+    local_graph = LocalGraph()
+    local_graph.create_from_connections_undirected([('ANT000001', 'DPF000001'), ('DPF000001', 'BLN000001')], time=5)
+
+    assert local_graph.names() == ['ANT000001', 'DPF000001', 'BLN000001']
+    assert local_graph.vertex_name_to_ind['BLN000001'] == 2
+    assert local_graph.vertex_ids[0] == component_ids.encode('ANT000001')
+    assert local_graph.time == 5
+
+    assert local_graph.find_shortest_paths('ANT000001', 'BLN000001') == [[0, 1, 2]]
+
+
+def test_snapshot_round_trip(tmp_path):
+    local_graph = LocalGraph()
+    local_graph.create_from_intervals(
+        [(('ANT000001', 'DPF000001'), 0.0, 10.0), (('DPF000001', 'BLN000001'), 5.0, 20.0)],
+        vertex_types={'ANT000001': 'ANT', 'DPF000001': 'DPF'}
+    )
+
+    local_graph.save_snapshot(str(tmp_path / 'snapshot.bin'))
+
+    loaded = LocalGraph()
+    loaded.load_snapshot(str(tmp_path / 'snapshot.bin'))
+
+    assert loaded.names() == local_graph.names()
+    assert edge_names(loaded) == edge_names(local_graph)
+    assert loaded.graph.es['start'] == [0.0, 5.0]
+    assert loaded.graph.es['end'] == [10.0, 20.0]
+    assert loaded.graph.vs['type'] == ['ANT', 'DPF', None]
+    assert loaded.time is None
+
+    assert loaded.find_shortest_paths('ANT000001', 'BLN000001', time=6) == [[0, 1, 2]]
+    assert loaded.find_shortest_paths('ANT000001', 'BLN000001', time=12) == []
+
+
+def test_snapshot_of_edges_without_interval(tmp_path):
+    local_graph = LocalGraph()
+    local_graph.create_from_intervals([(('ANT000001', 'DPF000001'), 0.0, 10.0)])
+    local_graph.apply_deltas(added=[('DPF000001', 'BLN000001')], removed=[])
+    local_graph.time = 3
+
+    local_graph.save_snapshot(str(tmp_path / 'snapshot.bin'))
+
+    loaded = LocalGraph()
+    loaded.load_snapshot(str(tmp_path / 'snapshot.bin'))
+
+    assert loaded.graph.es['start'] == [0.0, -math.inf]
+    assert loaded.graph.es['end'] == [10.0, math.inf]
+    assert loaded.time == 3
+
+    assert loaded.find_shortest_paths('ANT000001', 'BLN000001', time=1) == [[0, 1, 2]]
+
+
+def test_load_snapshot_rejects_other_files(tmp_path):
+    (tmp_path / 'other.bin').write_bytes(b'not a snapshot file' * 8)
+
+    local_graph = LocalGraph()
+    local_graph.create_from_connections_undirected([('ANT000001', 'DPF000001')])
+
+    local_graph.load_snapshot(str(tmp_path / 'other.bin'))
+
+    assert local_graph.names() == ['ANT000001', 'DPF000001']
+
+
+def test_load_snapshot_rejects_short_files(tmp_path):
+    local_graph = LocalGraph()
+    local_graph.create_from_connections_undirected([('ANT000001', 'DPF000001')])
+
+    for content in (b'', b'LGSNAP01'):
+        (tmp_path / 'short.bin').write_bytes(content)
+
+        local_graph.load_snapshot(str(tmp_path / 'short.bin'))
+
+        assert local_graph.names() == ['ANT000001', 'DPF000001']
+
+
+def test_load_snapshot_rejects_truncated_files(tmp_path):
+    local_graph = LocalGraph()
+    local_graph.create_from_intervals([(('ANT000001', 'DPF000001'), 0.0, 10.0), (('DPF000001', 'BLN000001'), 5.0, 20.0)])
+
+    local_graph.save_snapshot(str(tmp_path / 'snapshot.bin'))
+
+    content = (tmp_path / 'snapshot.bin').read_bytes()
+
+    loaded = LocalGraph()
+    loaded.create_from_connections_undirected([('RFT000001', 'OPF000001')])
+
+    for length in (len(content) - 1, len(content) - 16, 72):
+        (tmp_path / 'truncated.bin').write_bytes(content[:length])
+
+        loaded.load_snapshot(str(tmp_path / 'truncated.bin'))
+
+        assert loaded.names() == ['RFT000001', 'OPF000001']
+        assert loaded.graph.ecount() == 1
+
+
+def test_apply_deltas():
+    local_graph = LocalGraph()
+    local_graph.create_from_connections_undirected([('ANT000001', 'DPF000001'), ('DPF000001', 'BLN000001')])
+
+    local_graph.apply_deltas(added=[('BLN000001', 'RFT000001'), ('DPF000001', 'ANT000001')], removed=[('BLN000001', 'DPF000001')])
+
+    assert edge_names(local_graph) == {('ANT000001', 'DPF000001'), ('BLN000001', 'RFT000001')}
+    assert local_graph.names() == ['ANT000001', 'DPF000001', 'BLN000001', 'RFT000001']
+
+
+def test_membership_does_not_intern_names():
+    local_graph = LocalGraph()
+    local_graph.create_from_connections_undirected([('ANT000001', 'not-a-hirax-name')])
+
+    assert 'not-a-hirax-name' in local_graph.vertex_name_to_ind
+
+    fallback_names = len(component_ids._fallback_names)
+
+    assert 'never-seen-before' not in local_graph.vertex_name_to_ind
+    assert component_ids.lookup('never-seen-before') is None
+
+    local_graph.apply_deltas(added=[], removed=[('never-seen-either', 'ANT000001')])
+
+    assert len(component_ids._fallback_names) == fallback_names
+
+
+def test_add_name_attributes():
+    local_graph = LocalGraph()
+    local_graph.create_from_connections_undirected([(component_ids.encode('ANT000001'), component_ids.encode('DPF000001'))], interned=True)
+
+    assert 'name' not in local_graph.graph.vs.attributes()
+
+    local_graph.add_name_attributes()
+
+    assert local_graph.graph.vs['name'] == ['ANT000001', 'DPF000001']
+    assert local_graph.graph.vs['label'] == ['ANT000001', 'DPF000001']
+
+    local_graph.apply_deltas(added=[('DPF000001', 'BLN000001')], removed=[])
+
+    assert local_graph.graph.vs['name'] == ['ANT000001', 'DPF000001', 'BLN000001']
+    assert local_graph.graph.vs['label'] == ['ANT000001', 'DPF000001', 'BLN000001']
+
+    assert local_graph.find_shortest_paths('ANT000001', 'BLN000001') == [[0, 1, 2]]
+
+
+def test_paths_do_not_depend_on_the_order_of_the_connections(tmp_path):
+    pairs = [('ANT000001', 'DPF000001'), ('ANT000001', 'DPF000002'), ('DPF000001', 'BLN000001'), ('DPF000002', 'BLN000001')]
+
+    results = []
+
+    for order in (pairs, pairs[::-1]):
+        local_graph = LocalGraph()
+        local_graph.create_from_connections_undirected(order)
+
+        local_graph.save_snapshot(str(tmp_path / 'snapshot.bin'))
+
+        loaded = LocalGraph()
+        loaded.load_snapshot(str(tmp_path / 'snapshot.bin'))
+
+        for graph in (local_graph, loaded):
+            results.append([[graph.name_of(i) for i in path] for path in graph.find_shortest_paths('ANT000001', 'BLN000001')])
+
+    assert results == [[['ANT000001', 'DPF000001', 'BLN000001'], ['ANT000001', 'DPF000002', 'BLN000001']]] * 4
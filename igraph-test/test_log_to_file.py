@@ -0,0 +1,52 @@
+"""
+test_log_to_file.py
+
+Contains tests of the BufferedLogger class.
+
+Anatoly Zavyalov, 2021
+"""
+
+import threading
+
+from log_to_file import BufferedLogger
+
+
+def test_writes_undefined_urgencies(tmp_path):
+    logger = BufferedLogger(str(tmp_path / 'log.txt'), min_urgency=1)
+
+    logger.log('negative', urgency=-1)
+    logger.log('info', urgency=0)
+    logger.log('error', urgency=2)
+
+    logger.close()
+
+    lines = (tmp_path / 'log.txt').read_text().splitlines()
+
+    assert [line.split('|')[1].strip() for line in lines] == ['UNDEF', 'ERROR']
+    assert lines[0].endswith('negative')
+
+
+def test_no_message_is_lost_when_closing(tmp_path):
+    logger = BufferedLogger(str(tmp_path / 'log.txt'))
+
+    start = threading.Barrier(5)
+
+    def log_many(thread: int) -> None:
+        start.wait()
+
+        for i in range(200):
+            logger.log(f'{thread} {i}')
+
+    threads = [threading.Thread(target=log_many, args=(thread,)) for thread in range(4)]
+
+    for thread in threads:
+        thread.start()
+
+    start.wait()
+
+    logger.close()
+
+    for thread in threads:
+        thread.join()
+
+    assert len((tmp_path / 'log.txt').read_text().splitlines()) == 800
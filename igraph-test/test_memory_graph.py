@@ -0,0 +1,90 @@
+"""
+test_memory_graph.py
+
+Contains tests of the MemoryGraph class.
+
+Anatoly Zavyalov, 2021
+"""
+
+import pytest
+
+from memory_graph import MemoryGraph
+
+
+OPEN_END = 2**63 - 1
+
+
+@pytest.fixture
+def graph():
+    """
+    A MemoryGraph of the chain ANT - DPF - BLN - RFT, with a second balun in parallel to the first one from time 10 on.
+    """
+
+    graph = MemoryGraph(open_end=OPEN_END)
+
+    ids = {name: graph.add_vertex('component', name) for name in ('ANT000001', 'DPF000001', 'BLN000001', 'BLN000002', 'RFT000001')}
+
+    graph.add_type_edge(ids['BLN000002'], graph.add_vertex('type', 'BLN'))
+
+    for (name1, name2) in (('ANT000001', 'DPF000001'), ('DPF000001', 'BLN000001'), ('BLN000001', 'RFT000001')):
+        graph.set_connection(ids[name1], ids[name2], 0, True)
+
+    for (name1, name2) in (('DPF000001', 'BLN000002'), ('BLN000002', 'RFT000001')):
+        graph.set_connection(ids[name1], ids[name2], 10, True)
+
+    graph.ids = ids
+
+    return graph
+
+
+def vertex_names(graph: MemoryGraph, path) -> list:
+    return [graph.vertices[vertex.id][1] for vertex in path.objects[::2]]
+
+
+def test_vertex_index(graph):
+    assert graph.vertex_id('component', 'ANT000001') == graph.ids['ANT000001']
+    assert graph.vertex_id('type', 'ANT000001') is None
+    assert graph.has_name('BLN')
+    assert not graph.has_name('ADC000001')
+
+
+def test_find_paths_at_time(graph):
+    ant, rft = graph.ids['ANT000001'], graph.ids['RFT000001']
+
+    assert [vertex_names(graph, path) for path in graph.find_paths(ant, rft, None, 5)] == [['ANT000001', 'DPF000001', 'BLN000001', 'RFT000001']]
+
+    assert len(graph.find_paths(ant, rft, None, 10)) == 2
+
+    assert graph.find_paths(ant, rft, None, -1) == []
+
+
+def test_find_paths_avoids_type(graph):
+    paths = graph.find_paths(graph.ids['ANT000001'], graph.ids['RFT000001'], graph.vertex_id('type', 'BLN'), 10)
+
+    assert [vertex_names(graph, path) for path in paths] == [['ANT000001', 'DPF000001', 'BLN000001', 'RFT000001']]
+
+
+def test_find_paths_max_depth(graph):
+    ant, rft = graph.ids['ANT000001'], graph.ids['RFT000001']
+
+    assert graph.find_paths(ant, rft, None, 5, max_depth=2) == []
+    assert len(graph.find_paths(ant, rft, None, 5, max_depth=3)) == 1
+
+
+def test_disconnection_ends_connection(graph):
+    ids = graph.ids
+
+    graph.set_connection(ids['DPF000001'], ids['BLN000001'], 20, False)
+
+    assert len(graph.find_paths(ids['ANT000001'], ids['RFT000001'], None, 15)) == 2
+    assert [vertex_names(graph, path) for path in graph.find_paths(ids['ANT000001'], ids['RFT000001'], None, 20)] == [['ANT000001', 'DPF000001', 'BLN000002', 'RFT000001']]
+
+    assert ('BLN000001', 'DPF000001') in {tuple(sorted(pair)) for pair in graph.connections.pairs_at(15)}
+    assert ('BLN000001', 'DPF000001') not in {tuple(sorted(pair)) for pair in graph.connections.pairs_at(20)}
+
+
+def test_clear(graph):
+    graph.clear()
+
+    assert graph.vertices == {}
+    assert graph.connections.pairs_at(5) == []
@@ -0,0 +1,130 @@
+"""
+test_reachability_index.py
+
+Contains tests of the ReachabilityIndex class, and of GraphInterface.reaches, chain_of and unreachable_at on the 'memory' backend.
+
+Anatoly Zavyalov, 2021
+"""
+
+import pytest
+
+import component_ids
+from graph_interface import GraphInterface
+from hirax import CORRELATOR
+from local_graph import LocalGraph
+from reachability_index import ReachabilityIndex
+from workload_generator import WorkloadGenerator
+
+
+def local_graph_of(pairs: list) -> LocalGraph:
+    local_graph = LocalGraph()
+    local_graph.create_from_connections_undirected(pairs)
+    return local_graph
+
+
+def label_of(components, name: str) -> int:
+    return components.labels[component_ids.encode(name)]
+
+
+def test_build_labels_connected_components():
+    index = ReachabilityIndex(max_size=4)
+
+    components = index.build(0, local_graph_of([('ANT000001', 'DPF000001'), ('DPF000001', 'BLN000001'), ('ANT000002', 'DPF000002')]))
+
+    assert label_of(components, 'ANT000001') == label_of(components, 'BLN000001')
+    assert label_of(components, 'ANT000001') != label_of(components, 'ANT000002')
+    assert sorted(map(component_ids.decode, components.members[label_of(components, 'ANT000002')])) == ['ANT000002', 'DPF000002']
+
+    assert index.get(0) is components
+    assert len(index) == 1
+
+
+def test_record_change_merges_new_connection():
+    index = ReachabilityIndex(max_size=4)
+
+    index.build(0, local_graph_of([('ANT000001', 'DPF000001'), ('ANT000002', 'DPF000002')]))
+    index.build(20, local_graph_of([]))
+
+    index.record_change(10, parent=0, pair=(component_ids.encode('DPF000001'), component_ids.encode('DPF000002')), connection=True)
+
+    after = index.get(10)
+
+    assert len({label_of(after, name) for name in ('ANT000001', 'DPF000001', 'ANT000002', 'DPF000002')}) == 1
+
+    # The epoch that was split is unchanged, and the epochs after the change are dropped.
+    before = index.get(0)
+
+    assert label_of(before, 'ANT000001') != label_of(before, 'ANT000002')
+    assert index.get(20) is None
+
+
+def test_record_change_disconnection_drops_labelings():
+    index = ReachabilityIndex(max_size=4)
+
+    index.build(0, local_graph_of([('ANT000001', 'DPF000001')]))
+
+    index.record_change(0, parent=None, pair=(component_ids.encode('ANT000001'), component_ids.encode('DPF000001')), connection=False)
+
+    assert index.get(0) is None
+
+
+def test_clear_forgets_component_types():
+    index = ReachabilityIndex(max_size=4)
+
+    index.component_types = {'ANT000001': 'ANT'}
+    index.build(0, local_graph_of([('ANT000001', 'DPF000001')]))
+
+    index.clear()
+
+    assert index.component_types is None
+    assert len(index) == 0
+
+
+@pytest.fixture
+def array_interface():
+    """
+    A GraphInterface on the 'memory' backend holding three fully connected dishes.
+    """
+
+    gi = GraphInterface(backend='memory')
+
+    for type_ in ('ANT', 'DPF', 'BLN', 'RFT', 'OPF', 'RFR', 'ADC', 'COR'):
+        gi.add_type(type_)
+
+    gi.add_component(CORRELATOR)
+    gi.set_type(CORRELATOR, 'COR')
+
+    workload = WorkloadGenerator(dishes=3, churn_rate=0, history=100)
+
+    gi.bulk_load(list(workload.components()), list(workload.connections()))
+
+    yield gi
+
+    gi.close()
+
+
+def test_chain_of_stops_at_the_correlator(array_interface):
+    assert array_interface.chain_of('ANT000001', 50, 'ADC') == ['ADC000001', 'ADC000002']
+
+    assert len(array_interface.chain_of('ANT000001', 50, 'ADC', end=None)) == 6
+
+
+def test_reaches_and_unreachable_at(array_interface):
+    assert array_interface.reaches('ANT000002', CORRELATOR, 50)
+    assert array_interface.unreachable_at(CORRELATOR, 50) == []
+
+    array_interface.add_component('ANT000009')
+    array_interface.set_type('ANT000009', 'ANT')
+
+    assert not array_interface.reaches('ANT000009', CORRELATOR, 50)
+    assert array_interface.unreachable_at(CORRELATOR, 50) == ['ANT000009']
+
+
+def test_snapshots_are_interned(array_interface):
+    local_graph = array_interface.get_local_graph_at_time(50)
+
+    # The snapshot was built from component IDs, so it holds no names until they are asked for.
+    assert local_graph._names is None
+    assert 'name' not in local_graph.graph.vs.attributes()
+
+    assert 'ANT000001' in local_graph.names()
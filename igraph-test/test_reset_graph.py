@@ -0,0 +1,94 @@
+"""
+test_reset_graph.py
+
+Contains tests of GraphInterface.reset_graph, against a fake remote connection that answers its traversals from an in-process graph.
+
+Anatoly Zavyalov, 2021
+"""
+
+from gremlin_python.driver.remote_connection import RemoteConnection, RemoteTraversal
+from gremlin_python.process.traversal import Traverser
+from gremlin_python.structure.graph import Graph
+
+from graph_interface import GraphInterface
+from local_graph import LocalGraph
+
+
+class FakeConnection(RemoteConnection):
+    """
+    A RemoteConnection that runs the steps used by reset_graph on the vertices and edges of a LocalGraph.
+
+    :ivar vertices: The set of the IDs of the vertices left.
+    :ivar edges: Dictionary of style {..., edge_id: (id1, id2), ...} of the edges left.
+    """
+
+    def __init__(self, local_graph: LocalGraph) -> None:
+        super().__init__(None, None)
+
+        self.vertices = set(range(local_graph.graph.vcount()))
+
+        self.edges = dict(enumerate(local_graph.graph.get_edgelist()))
+
+    def _drop(self, elements: list) -> None:
+        for (kind, element_id) in elements:
+            if kind == 'e':
+                self.edges.pop(element_id, None)
+
+            else:
+                self.vertices.discard(element_id)
+                self.edges = {eid: ends for (eid, ends) in self.edges.items() if element_id not in ends}
+
+    def submit(self, bytecode):
+        elements = []
+
+        for (step, *args) in bytecode.step_instructions:
+
+            if step == 'V':
+                elements = [('v', i) for i in (args if len(args) > 0 else sorted(self.vertices)) if i in self.vertices]
+
+            elif step == 'bothE':
+                elements = [('e', eid) for (_, i) in elements for (eid, ends) in self.edges.items() if i in ends]
+
+            elif step == 'dedup':
+                elements = list(dict.fromkeys(elements))
+
+            elif step == 'limit':
+                elements = elements[:args[0]]
+
+            elif step == 'id':
+                elements = [element_id for (_, element_id) in elements]
+
+            elif step == 'sideEffect' and args[0].step_instructions == [['drop']]:
+                self._drop(elements)
+
+            elif step == 'count':
+                elements = [len(elements)]
+
+            else:
+                raise NotImplementedError(step)
+
+        return RemoteTraversal(iter([Traverser(element) for element in elements]))
+
+
+def test_reset_counts_every_edge_once():
+    local_graph = LocalGraph()
+    local_graph.create_from_connections_undirected([
+        ('ANT000001', 'DPF000001'), ('DPF000001', 'BLN000001'), ('BLN000001', 'RFT000001'), ('RFT000001', 'OPF000001'), ('DPF000001', 'BLN000002')
+    ])
+
+    connection = FakeConnection(local_graph)
+
+    gi = GraphInterface(backend='memory')
+
+    # Use the remote code path, through the fake connection.
+    gi.memory_graph = None
+    gi.g = Graph().traversal().withRemote(connection)
+
+    stats = gi.reset_graph(chunk_size=3)
+
+    assert stats['complete']
+    assert stats['vertices'] == local_graph.graph.vcount()
+    assert stats['edges'] == local_graph.graph.ecount()
+
+    assert connection.vertices == set()
+    assert connection.edges == {}
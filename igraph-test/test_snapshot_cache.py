@@ -0,0 +1,65 @@
+"""
+test_snapshot_cache.py
+
+Contains tests of the SnapshotCache class, and of the snapshots GraphInterface.get_local_graph_at_time returns from it.
+
+Anatoly Zavyalov, 2021
+"""
+
+from graph_interface import GraphInterface
+from snapshot_cache import SnapshotCache
+
+
+def test_epochs():
+    cache = SnapshotCache(max_size=2)
+    cache.set_change_points([10, 0, 10, 20])
+
+    assert cache.change_points == [0, 10, 20]
+    assert cache.epoch_of(-5) == float('-inf')
+    assert cache.epoch_of(15) == 10
+
+    cache.put(12, 'a')
+    cache.put(25, 'b')
+
+    assert cache.get(19) == 'a'
+
+    # Splitting the epoch of 'a' keeps it for the times before the change, and drops the later epochs.
+    cache.record_change(15)
+
+    assert cache.get(12) == 'a'
+    assert cache.get(25) is None
+    assert cache.epoch_of(17) == 15
+
+
+def paths_at(gi: GraphInterface, times: list) -> list:
+    results = []
+
+    for time in times:
+        local_graph = gi.get_local_graph_at_time(time)
+
+        results.append([[local_graph.name_of(i) for i in path] for path in local_graph.find_shortest_paths('ANT000001', 'BLN000001')])
+
+    return results
+
+
+def test_cached_snapshots_answer_like_fresh_ones():
+    interfaces = [GraphInterface(backend='memory', snapshot_cache_size=size) for size in (4, 0)]
+
+    for gi in interfaces:
+        for name in ('ANT000001', 'DPF000001', 'DPF000002', 'BLN000001'):
+            gi.add_component(name)
+
+        gi.set_connection('DPF000002', 'BLN000001', 0, True)
+        gi.set_connection('ANT000001', 'DPF000001', 5, True)
+        gi.set_connection('DPF000001', 'BLN000001', 5, True)
+        gi.set_connection('ANT000001', 'DPF000002', 10, True)
+
+    times = [12, 15, 30, 12]
+
+    cached, uncached = (paths_at(gi, times) for gi in interfaces)
+
+    assert cached == uncached
+    assert cached[0] == [['ANT000001', 'DPF000001', 'BLN000001'], ['ANT000001', 'DPF000002', 'BLN000001']]
+
+    for gi in interfaces:
+        gi.close()
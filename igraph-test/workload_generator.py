@@ -0,0 +1,294 @@
+"""
+workload_generator.py
+
+Contains the WorkloadGenerator class, which generates seeded synthetic connection histories of HIRAX-style arrays (see hirax.py) with
+realistic churn: swapped baluns, re-spliced fibres and repeated reconnects of antennas, over signal chains with redundant fibres.
+
+Everything is generated one dish at a time from a random generator seeded by the seed and the number of the dish, so a workload of
+millions of events is streamed in memory bounded by one dish, and any dish or chunk of dishes can be generated on its own (e.g. by
+parallel loaders) and is identical to the same dish of the whole workload.
+
+Example:
+
+    workload = WorkloadGenerator(dishes=1024, churn_rate=0.01, history=10000, redundancy=1, seed=0)
+
+    for (components, connections) in workload.chunks(dishes_per_chunk=32):
+        gi.bulk_load(components=components, connections=connections)
+
+Anatoly Zavyalov, 2021
+"""
+
+import random
+
+from collections import deque
+
+from math import ceil
+
+from hirax import CORRELATOR
+
+from component_ids import SERIALS
+
+
+class WorkloadGenerator():
+    """
+    A seeded generator of the components and connection events of :ivar dishes: signal chains over :ivar history: seconds.
+
+    Every dish starts as the signal chain of hirax.dish_signal_chain (ANT - DPF, then per polarization DPF - BLN - RFT - OPF - RFR - ADC -
+    correlator input), with :ivar redundancy: additional fibres in parallel to the OPF of each polarization, connected early in the history.
+    Changes then arrive as a Poisson process of :ivar churn_rate: changes per dish per second, each one of CHURN_KINDS, picked with
+    :ivar weights:. All times are whole seconds, so that workloads can be stored in every connection storage of GraphInterface.
+
+    Spare components (swapped-in baluns and redundant fibres) are numbered after the original ones: the k-th spare of a type of dish i
+    has serial (2 + k) * :ivar dishes: + i, so names are unique across the array without any shared state. Serials have 6 digits, so
+    each dish has :ivar spares: spares of each type; once its spare baluns are used up, a balun swap puts back the balun that was
+    swapped out the longest ago (as if it had been repaired), or reseats the same balun if none was.
+
+    :ivar dishes: The number of dishes, numbered from 1.
+    :ivar churn_rate: The expected number of changes per dish per second.
+    :ivar history: The length of the history in seconds. Dishes are first connected in its first tenth.
+    :ivar redundancy: The number of additional fibres of each polarization.
+    :ivar spares: The number of spare serials of each type of every dish.
+    :ivar seed: The seed of the workload.
+    :ivar weights: Dictionary of style {..., kind: weight, ...} of the relative frequency of every kind of change in CHURN_KINDS.
+    :ivar cor: The name of the correlator input every chain ends at.
+    """
+
+    # 'balun_swap' replaces a balun by a spare, 'fibre_resplice' disconnects a fibre and reconnects it after a repair time,
+    # 'reconnect' disconnects an antenna from its feed and reconnects it after a repair time.
+    CHURN_KINDS: tuple = ('balun_swap', 'fibre_resplice', 'reconnect')
+
+    DEFAULT_WEIGHTS: dict = {'balun_swap': 1, 'fibre_resplice': 2, 'reconnect': 4}
+
+    # The longest time a component stays disconnected during a change, in seconds.
+    MAX_REPAIR_TIME: int = 60
+
+    dishes: int
+
+    churn_rate: float
+
+    history: int
+
+    redundancy: int
+
+    spares: int
+
+    seed: int
+
+    weights: dict
+
+    cor: str
+
+
+    def __init__(self, dishes: int, churn_rate: float=0.001, history: int=86400, redundancy: int=0, seed: int=0, weights: dict=None, cor: str=CORRELATOR) -> None:
+        """
+        Configure the workload. Nothing is generated until it is iterated.
+
+        :param dishes: The number of dishes.
+        :type dishes: int
+        :param churn_rate: The expected number of changes per dish per second, defaults to 0.001
+        :type churn_rate: float, optional
+        :param history: The length of the history in seconds, defaults to 86400
+        :type history: int, optional
+        :param redundancy: The number of additional fibres of each polarization, defaults to 0
+        :type redundancy: int, optional
+        :param seed: The seed of the workload, defaults to 0
+        :type seed: int, optional
+        :param weights: The relative frequency of every kind of change, defaults to None (DEFAULT_WEIGHTS)
+        :type weights: dict, optional
+        :param cor: The name of the correlator input every chain ends at, defaults to hirax.CORRELATOR
+        :type cor: str, optional
+        :raises ValueError: If the serials of :param dishes: dishes and their redundant fibres do not fit in 6 digits.
+        """
+
+        # The original components of the dishes use serials up to 2 * :param dishes:.
+        spares = (SERIALS - 1 - 2 * dishes) // dishes if dishes > 0 else 0
+
+        if spares < 0 or spares < 2 * redundancy:
+            raise ValueError(f"{dishes} dishes with {redundancy} redundant fibres per polarization do not fit in 6-digit serials.")
+
+        self.dishes = dishes
+        self.churn_rate = churn_rate
+        self.history = int(history)
+        self.redundancy = redundancy
+        self.spares = spares
+        self.seed = seed
+        self.weights = dict(self.DEFAULT_WEIGHTS if weights is None else weights)
+        self.cor = cor
+
+
+    def _name(self, type_: str, serial: int) -> str:
+        """
+        Return the name of the component of type :param type_: and serial :param serial: in the naming scheme of hirax.py.
+        """
+
+        return f'{type_}{str(serial).zfill(6)}'
+
+
+    def _spare(self, type_: str, i: int, k: int) -> str:
+        """
+        Return the name of the spare number :param k: of type :param type_: of dish :param i:. :param k: must be less than :ivar spares:.
+        """
+
+        return self._name(type_, (2 + k) * self.dishes + i)
+
+
+    def dish(self, i: int) -> tuple:
+        """
+        Return the components of dish number :param i: and its connection events, in the format expected by GraphInterface.bulk_load.
+
+        :param i: The number of the dish, from 1 to :ivar dishes:.
+        :type i: int
+        :return: A 2-tuple of a list of (name, type) 2-tuples and a list of (name1, name2, time, connection) 4-tuples, sorted by time.
+        :rtype: tuple[list, list]
+        """
+
+        # A str seed is hashed deterministically, unlike a tuple.
+        rng = random.Random(f'{self.seed}:{i}')
+
+        ant, dpf = self._name('ANT', i), self._name('DPF', i)
+
+        components = [(ant, 'ANT'), (dpf, 'DPF')]
+
+        events = []
+
+        # The names of the components of each polarization, and the number of spares of each type used so far.
+        chains = []
+
+        spares = {'BLN': 0, 'OPF': 0}
+
+        # The baluns swapped out, oldest first, put back once the spares are used up.
+        removed = deque()
+
+        for serial in (2 * i - 1, 2 * i):
+            chain = {type_: self._name(type_, serial) for type_ in ('BLN', 'RFT', 'OPF', 'RFR', 'ADC')}
+            components += [(name, type_) for (type_, name) in chain.items()]
+            chains.append(chain)
+
+        time = rng.randrange(self.history // 10 + 1)
+
+        events.append((ant, dpf, time, True))
+
+        for chain in chains:
+            for pair in ((dpf, chain['BLN']), (chain['BLN'], chain['RFT']), (chain['RFT'], chain['OPF']), (chain['OPF'], chain['RFR']), (chain['RFR'], chain['ADC']), (chain['ADC'], self.cor)):
+                events.append((*pair, time, True))
+
+        # Redundant fibres, each spliced in a little later.
+        for chain in chains:
+            for _ in range(self.redundancy):
+
+                opf = self._spare('OPF', i, spares['OPF'])
+                spares['OPF'] += 1
+
+                components.append((opf, 'OPF'))
+
+                time += 1
+
+                events += [(chain['RFT'], opf, time, True), (opf, chain['RFR'], time, True)]
+
+        kinds = [kind for kind in self.CHURN_KINDS if self.weights.get(kind, 0) > 0]
+
+        if self.churn_rate <= 0 or len(kinds) == 0:
+            return components, events
+
+        kind_weights = [self.weights[kind] for kind in kinds]
+
+        while True:
+
+            # Changes never overlap, so each one starts after the previous one is repaired.
+            time += max(1, ceil(rng.expovariate(self.churn_rate)))
+
+            if time >= self.history:
+                break
+
+            kind = rng.choices(kinds, kind_weights)[0]
+
+            repair = rng.randint(1, self.MAX_REPAIR_TIME)
+
+            chain = rng.choice(chains)
+
+            if kind == 'balun_swap':
+
+                old = chain['BLN']
+
+                if spares['BLN'] < self.spares:
+                    new = self._spare('BLN', i, spares['BLN'])
+                    spares['BLN'] += 1
+
+                    components.append((new, 'BLN'))
+
+                else:
+                    new = removed.popleft() if len(removed) > 0 else old
+
+                if new != old:
+                    removed.append(old)
+
+                events += [(dpf, old, time, False), (old, chain['RFT'], time, False), (dpf, new, time + repair, True), (new, chain['RFT'], time + repair, True)]
+
+                chain['BLN'] = new
+
+            elif kind == 'fibre_resplice':
+
+                opf = chain['OPF']
+
+                events += [(chain['RFT'], opf, time, False), (chain['RFT'], opf, time + repair, True)]
+
+            else:
+                events += [(ant, dpf, time, False), (ant, dpf, time + repair, True)]
+
+            time += repair
+
+        return components, events
+
+
+    def dishes_iter(self, first: int=1, last: int=None):
+        """
+        Yield dish(i) for i from :param first: to :param last: (inclusive, :ivar dishes: if None).
+
+        :rtype: Generator[tuple[list, list], None, None]
+        """
+
+        for i in range(first, (self.dishes if last is None else last) + 1):
+            yield self.dish(i)
+
+
+    def components(self):
+        """
+        Yield the (name, type) 2-tuples of the components of every dish, without the correlator input.
+
+        :rtype: Generator[tuple[str, str], None, None]
+        """
+
+        for (components, _) in self.dishes_iter():
+            yield from components
+
+
+    def connections(self):
+        """
+        Yield the (name1, name2, time, connection) 4-tuples of the connection events of every dish, sorted by time within each dish.
+
+        :rtype: Generator[tuple[str, str, int, bool], None, None]
+        """
+
+        for (_, connections) in self.dishes_iter():
+            yield from connections
+
+
+    def chunks(self, dishes_per_chunk: int=32):
+        """
+        Yield the components and connection events of :param dishes_per_chunk: dishes at a time, in the format of the arguments of
+        GraphInterface.bulk_load and of the items of GraphInterfacePool.bulk_load. No connection spans two chunks.
+
+        :param dishes_per_chunk: The number of dishes per chunk, defaults to 32
+        :type dishes_per_chunk: int, optional
+        :rtype: Generator[tuple[list, list], None, None]
+        """
+
+        for first in range(1, self.dishes + 1, dishes_per_chunk):
+
+            components, connections = [], []
+
+            for (dish_components, dish_connections) in self.dishes_iter(first, min(first + dishes_per_chunk - 1, self.dishes)):
+                components += dish_components
+                connections += dish_connections
+
+            yield components, connections